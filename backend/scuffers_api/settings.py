@@ -3,6 +3,7 @@ import os
 from datetime import timedelta
 from dotenv import load_dotenv
 import cloudinary
+from corsheaders.defaults import default_headers
  
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / ".env")
@@ -70,10 +71,11 @@ MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "shop.middleware.CatalogWhiteNoiseMiddleware",  # WhiteNoise + snapshots del catálogo
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "shop.middleware.CustomerMiddleware",  # request.customer (Cliente / Carrito perezosos)
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -104,6 +106,10 @@ if os.getenv("DATABASE_URL"):
         "default": dj_database_url.config(conn_max_age=600)
     }
 else:
+    # MySQL: las restricciones únicas de shop son índices de expresión
+    # (COALESCE), hace falta MySQL 8.0.13+. Los índices parciales de
+    # Producto / ReservaStock no existen ahí (W037): la migración 0020
+    # crea índices comunes equivalentes, por eso se silencia el aviso.
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.mysql",
@@ -117,6 +123,72 @@ else:
             },
         }
     }
+    SILENCED_SYSTEM_CHECKS = ["models.W037"]
+ 
+# SQLite (desarrollo) no tiene SELECT ... FOR UPDATE: las transacciones
+# toman el lock de escritura al empezar, así dos checkouts simultáneos se
+# esperan (busy timeout) en vez de fallar con "database is locked".
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"].setdefault("OPTIONS", {})["transaction_mode"] = "IMMEDIATE"
+    # tests: base en archivo (no en memoria) para que los tests de
+    # concurrencia (shop/tests) puedan abrir una conexión por thread
+    DATABASES["default"].setdefault("TEST", {}).setdefault("NAME", str(BASE_DIR / "test_db.sqlite3"))
+ 
+# --- CACHE ---
+# Con REDIS_URL el cache es compartido entre workers (requiere el paquete
+# `redis`). Sin REDIS_URL cada proceso usa su LocMemCache.
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+ 
+# alias donde vive la generación del catálogo (shop/cache.py). Si es un
+# LocMemCache (sin REDIS_URL) la generación va a la base, así la ven
+# todos los workers.
+SHOP_CACHE_ALIAS = "default"
+ 
+# cache de respuestas del catálogo: LRU local + nivel compartido opcional
+SHOP_RESPONSE_CACHE = {
+    "LOCAL_MAX_ENTRIES": int(os.getenv("SHOP_RESPONSE_CACHE_ENTRIES", "512")),
+    "SHARED_ALIAS": "default" if REDIS_URL else None,
+    "TIMEOUT": 300,
+}
+ 
+# snapshots estáticos del catálogo (shop/snapshots.py): se rearman solos
+# cuando cambia un Producto, de a un proceso por vez (flock en el
+# directorio). Por defecto sólo fuera de development.
+SHOP_CATALOG_SNAPSHOTS = {
+    "ENABLED": os.getenv("SHOP_CATALOG_SNAPSHOTS", str(ENV != "development")) == "True",
+    "DIR": "catalog",
+}
+ 
+# catálogo en memoria (shop/catalog.py): listado y detalle de productos
+# sin consultas a la base. Pensado para catálogos chicos (hasta miles).
+SHOP_CATALOG_ENGINE = os.getenv("SHOP_CATALOG_ENGINE", "False") == "True"
+ 
+# Idempotency-Key (shop/idempotency.py): cuánto se guarda la respuesta
+# y cuánto espera un duplicado simultáneo a que termine el original
+SHOP_IDEMPOTENCY = {
+    "TTL_HOURS": 24,
+    "WAIT": 5.0,
+    "PURGE_PROBABILITY": 0.01,
+}
+ 
+# reservas de stock (shop/stock.py): segundos que un pedido sin pagar
+# retiene sus unidades antes de devolverlas
+SHOP_STOCK = {
+    "HOLD_TTL": int(os.getenv("SHOP_STOCK_HOLD_TTL", str(15 * 60))),
+}
  
 # --- MERCADO PAGO ---
  
@@ -179,6 +251,8 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": True,
+    # claim "cliente_id" en el token (shop/customer.py)
+    "TOKEN_OBTAIN_SERIALIZER": "shop.customer.ShopTokenObtainPairSerializer",
 }
  
 if not DEBUG:
@@ -195,6 +269,10 @@ CORS_ALLOWED_ORIGIN_REGEXES = [
     r"^https://.*\.vercel\.app$",
 ]
  
+# carrito de invitado (shop/guest_cart.py): el token viaja en un header;
+# Idempotency-Key en los POST del carrito / checkout (shop/idempotency.py)
+CORS_ALLOW_HEADERS = (*default_headers, "x-guest-cart", "idempotency-key")
+ 
 CSRF_TRUSTED_ORIGINS = [
     FRONTEND_ORIGIN,
     "https://*.vercel.app",
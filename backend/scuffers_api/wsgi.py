@@ -14,3 +14,14 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scuffers_api.settings')
 
 application = get_wsgi_application()
+
+# catálogo en memoria (opcional): se carga al arrancar cada worker para
+# que el primer request no pague la consulta completa
+from shop.catalog import catalog_engine, enabled as catalog_engine_enabled  # noqa: E402
+
+if catalog_engine_enabled():
+    try:
+        catalog_engine.ensure_built()
+    except Exception as e:
+        # la base puede no estar lista todavía: se carga en el primer request
+        print("*** CATALOG ENGINE NOT LOADED AT STARTUP:", repr(e))
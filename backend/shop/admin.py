@@ -9,7 +9,11 @@ from .models import (
     Pedido,
     OrderItem,
     Payment,
+    ReservaStock,
+    VentaDiaria,
 )
+from .sales import sync_order_sales
+from .stock import sync_order_stock
 
 
 # ==========================
@@ -109,6 +113,14 @@ class PedidoAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # estado cambiado a mano: confirmar / liberar las reservas de stock
+        # y sumar / restar el pedido en las ventas diarias
+        if change and "estado" in form.changed_data:
+            sync_order_stock(obj)
+            sync_order_sales(obj)
+
     # ========= ACCIONES =========
     actions = ["marcar_como_pagado"]
 
@@ -123,7 +135,18 @@ class PedidoAdmin(admin.ModelAdmin):
             # fallback: value de la choice en BD
             nuevo_estado = "paid"
 
+        # los pedidos se traen ANTES del update: si la lista está filtrada
+        # por estado (p. ej. pendiente), después del update el queryset
+        # vuelve vacío y las reservas / ventas quedarían sin mover
+        pedidos = list(queryset)
         actualizados = queryset.update(estado=nuevo_estado, mp_status="approved")
+        # el update() no pasa por las vistas de MP: confirmar las reservas
+        # y sumar las ventas acá
+        for pedido in pedidos:
+            pedido.estado = nuevo_estado
+            pedido.mp_status = "approved"
+            sync_order_stock(pedido)
+            sync_order_sales(pedido)
         self.message_user(
             request,
             f"{actualizados} pedido(s) marcados como PAGADOS manualmente."
@@ -146,4 +169,28 @@ class PaymentAdmin(admin.ModelAdmin):
         "creado",
     )
     list_filter = ("status", "proveedor")
-    search_fields = ("pedido__id", "mp_payment_id")
\ No newline at end of file
+    search_fields = ("pedido__id", "mp_payment_id")
+
+
+# ==========================
+# RESERVAS DE STOCK
+# ==========================
+@admin.register(ReservaStock)
+class ReservaStockAdmin(admin.ModelAdmin):
+    list_display = ("id", "pedido", "producto", "cantidad", "estado", "vence", "creado")
+    list_filter = ("estado",)
+    search_fields = ("pedido__id", "producto__nombre", "producto__slug")
+    # se mueven sólo desde shop/stock.py (el stock ya está descontado)
+    readonly_fields = ("pedido", "producto", "cantidad", "estado", "vence", "creado")
+
+
+# ==========================
+# VENTAS DIARIAS
+# ==========================
+@admin.register(VentaDiaria)
+class VentaDiariaAdmin(admin.ModelAdmin):
+    list_display = ("fecha", "categoria", "producto", "pedidos", "unidades", "ingresos")
+    list_filter = ("categoria",)
+    date_hierarchy = "fecha"
+    # se calculan desde shop/sales.py (rebuild_sales_rollups para rehacerlas)
+    readonly_fields = ("fecha", "categoria", "producto", "pedidos", "unidades", "ingresos")
@@ -7,12 +7,16 @@ class ShopConfig(AppConfig):
 
     def ready(self):
         """
+        Conecta las señales del shop (shop/signals.py).
+
         Si la variable CREATE_SUPERUSER_ON_STARTUP=1 está seteada,
         crea un superusuario por defecto si no existe.
         SOLO se usa para producción (Railway) la primera vez.
         """
         import os
 
+        from . import signals  # noqa: F401
+
         if os.getenv("CREATE_SUPERUSER_ON_STARTUP") != "1":
             return
 
@@ -0,0 +1,354 @@
+# shop/cache.py
+import hashlib
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .conditional import not_modified, set_validators
+
+
+# =========================================================
+#              GENERACIÓN DEL CATÁLOGO
+# =========================================================
+#
+# Número que cambia cada vez que se guarda o borra un Producto.
+# Todo lo que se cachea del catálogo lleva la generación en la
+# clave, así que "invalidar" es simplemente incrementarla.
+#
+# Tiene que ser la misma para todos los workers:
+#   - con un cache compartido (SHOP_CACHE_ALIAS en Redis / Memcached)
+#     vive ahí y leerla no toca la base;
+#   - con LocMemCache (sin REDIS_URL) cada proceso tendría la suya, así
+#     que va a la base (VersionCatalogo): una consulta por clave primaria.
+#
+# bump_* devuelve (anterior, nueva): un worker que ya aplicó el cambio en
+# sus índices en memoria sólo avanza si estaba justo en `anterior`.
+
+CATALOG_GENERATION_KEY = "shop:catalog:generation"
+VERSION_ROW = 1
+
+
+def shared_cache():
+    return caches[getattr(settings, "SHOP_CACHE_ALIAS", "default")]
+
+
+def versions_in_db():
+    """
+    True si el cache "compartido" en realidad es de cada proceso: la
+    generación y la versión del stock se guardan en la base.
+    """
+    return isinstance(shared_cache(), (LocMemCache, DummyCache))
+
+
+def _initial_generation():
+    # si la clave se pierde (eviction / reinicio) arrancamos de un valor
+    # nuevo, así nunca se reusan entradas de una generación vieja
+    return time.time_ns() // 1000
+
+
+def _db_versions():
+    from .models import VersionCatalogo
+
+    row = VersionCatalogo.objects.filter(pk=VERSION_ROW).values_list("generacion", "stock").first()
+    if row is None:
+        seed = _initial_generation()
+        obj, _created = VersionCatalogo.objects.get_or_create(
+            pk=VERSION_ROW, defaults={"generacion": seed, "stock": seed}
+        )
+        row = (obj.generacion, obj.stock)
+    return row
+
+
+def _db_bump(field, producto_ids=None):
+    """
+    Sube `field` de la fila de versiones con la fila bloqueada. Nunca
+    menos que el reloj: si se pierde un bump (rollback, base restaurada)
+    el siguiente no repite un número ya usado en alguna clave de cache.
+    """
+    from .models import CambioStock, VersionCatalogo
+
+    with transaction.atomic():
+        row = VersionCatalogo.objects.select_for_update().filter(pk=VERSION_ROW).first()
+        if row is None:
+            _db_versions()  # primera vez: se crea la fila
+            row = VersionCatalogo.objects.select_for_update().get(pk=VERSION_ROW)
+        previous = getattr(row, field)
+        version = max(previous + 1, _initial_generation())
+        VersionCatalogo.objects.filter(pk=VERSION_ROW).update(**{field: version})
+        if producto_ids is not None:
+            CambioStock.objects.create(
+                version=version, anterior=previous, productos=sorted(producto_ids)
+            )
+    return previous, version
+
+
+def _cache_bump(key):
+    cache = shared_cache()
+    cache.add(key, _initial_generation(), timeout=None)
+    try:
+        version = cache.incr(key)
+        return version - 1, version
+    except ValueError:
+        # la clave expiró entre el add y el incr
+        version = _initial_generation()
+        cache.set(key, version, timeout=None)
+        return None, version
+
+
+def _cache_get(key):
+    cache = shared_cache()
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _initial_generation(), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def catalog_generation():
+    if versions_in_db():
+        return _db_versions()[0]
+    return _cache_get(CATALOG_GENERATION_KEY)
+
+
+def catalog_versions():
+    """
+    (generación, versión del stock) juntas: con la base, una sola consulta.
+    """
+    if versions_in_db():
+        return _db_versions()
+    return _cache_get(CATALOG_GENERATION_KEY), _cache_get(CATALOG_STOCK_KEY)
+
+
+def bump_catalog_generation():
+    if versions_in_db():
+        return _db_bump("generacion")
+    return _cache_bump(CATALOG_GENERATION_KEY)
+
+
+# =========================================================
+#              VERSIÓN DEL STOCK DEL CATÁLOGO
+# =========================================================
+#
+# Las reservas de stock (shop/stock.py) mueven Producto.stock en cada
+# checkout / pago / vencimiento. Eso NO sube la generación (no se
+# rearman índices ni snapshots por un checkout): sube esta versión, que
+# va en la clave de las respuestas cacheadas (muestran el stock), y
+# deja anotado qué productos cambiaron en esa versión (en el cache
+# compartido o en CambioStock, igual que la generación). Los índices en
+# memoria de cada worker se ponen al día re-leyendo sólo esos productos.
+
+CATALOG_STOCK_KEY = "shop:catalog:stock"
+STOCK_CHANGES_KEY = "shop:catalog:stock:{}"
+STOCK_CHANGES_TIMEOUT = 60 * 60
+# más versiones atrasadas que esto: conviene rearmar el índice entero
+MAX_STOCK_CHANGES = 500
+# de cada cuántos bumps se borran los CambioStock viejos
+PURGE_PROBABILITY = 0.01
+
+
+def catalog_stock_version():
+    if versions_in_db():
+        return _db_versions()[1]
+    return _cache_get(CATALOG_STOCK_KEY)
+
+
+def bump_catalog_stock(producto_ids):
+    """
+    Nueva versión del stock; `producto_ids` son los productos que
+    cambiaron en ella. Devuelve (anterior, nueva).
+    """
+    if versions_in_db():
+        from .models import CambioStock
+
+        versions = _db_bump("stock", producto_ids)
+        if random.random() < PURGE_PROBABILITY:
+            cutoff = timezone.now() - timedelta(seconds=STOCK_CHANGES_TIMEOUT)
+            CambioStock.objects.filter(creado__lt=cutoff).delete()
+        return versions
+
+    previous, version = _cache_bump(CATALOG_STOCK_KEY)
+    shared_cache().set(
+        STOCK_CHANGES_KEY.format(version), sorted(producto_ids), timeout=STOCK_CHANGES_TIMEOUT
+    )
+    return previous, version
+
+
+def stock_changes(since, until):
+    """
+    Productos cuyo stock cambió en las versiones (since, until], o None
+    si no se puede saber (versión perdida, muy atrasada o reiniciada):
+    en ese caso hay que recargar todo.
+    """
+    if since is None or until is None or until <= since:
+        return None
+    if versions_in_db():
+        return _db_stock_changes(since, until)
+    if until - since > MAX_STOCK_CHANGES:
+        return None
+    keys = [STOCK_CHANGES_KEY.format(v) for v in range(since + 1, until + 1)]
+    found = shared_cache().get_many(keys)
+    if len(found) != len(keys):
+        return None
+    return {pk for ids in found.values() for pk in ids}
+
+
+def _db_stock_changes(since, until):
+    from .models import CambioStock
+
+    rows = (
+        CambioStock.objects
+        .filter(version__gt=since, version__lte=until)
+        .order_by("version")
+        .values_list("version", "anterior", "productos")[:MAX_STOCK_CHANGES]
+    )
+    ids, expected = set(), since
+    for version, anterior, productos in rows:
+        if anterior != expected:
+            return None  # falta una versión (ya se borró)
+        ids.update(productos)
+        expected = version
+    return ids if expected == until else None
+
+
+# =========================================================
+#              CACHE DE RESPUESTAS (2 NIVELES)
+# =========================================================
+
+class ResponseCache:
+    """
+    Cache de `response.data` para endpoints del catálogo.
+
+      1) LRU en memoria del proceso, acotado a `max_entries`.
+      2) Nivel compartido opcional: cualquier alias de CACHES de Django
+         (LocMem, Redis, Memcached...). None lo desactiva.
+
+    Las claves ya incluyen la generación del catálogo, por eso no hace
+    falta borrar nada cuando cambia un producto: las entradas viejas
+    dejan de pedirse y el LRU / el TTL las saca.
+    """
+
+    def __init__(self, max_entries=512, shared_alias="default", timeout=300):
+        self.max_entries = max_entries
+        self.shared_alias = shared_alias
+        self.timeout = timeout
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        conf = getattr(settings, "SHOP_RESPONSE_CACHE", {})
+        return cls(
+            max_entries=conf.get("LOCAL_MAX_ENTRIES", 512),
+            shared_alias=conf.get("SHARED_ALIAS", "default"),
+            timeout=conf.get("TIMEOUT", 300),
+        )
+
+    def make_key(self, endpoint, request, view_kwargs=None, generation=None):
+        """
+        Clave = (generación, endpoint, kwargs de la URL, query params
+        ordenados, base absoluta). La base va porque las URLs de imágenes
+        se arman con request.build_absolute_uri.
+        """
+        if generation is None:
+            generation = catalog_generation()
+        params = sorted(
+            (k, v)
+            for k in request.query_params
+            for v in request.query_params.getlist(k)
+        )
+        raw = repr((
+            endpoint,
+            sorted((view_kwargs or {}).items()),
+            params,
+            request.build_absolute_uri("/"),
+        ))
+        digest = hashlib.sha1(raw.encode()).hexdigest()
+        return f"shop:resp:{generation}:{endpoint}:{digest}"
+
+    def get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires, blob = entry
+                if expires > time.monotonic():
+                    self._local.move_to_end(key)
+                    return pickle.loads(blob)
+                del self._local[key]
+
+        if self.shared_alias is None:
+            return None
+        blob = caches[self.shared_alias].get(key)
+        if blob is None:
+            return None
+        self._store_local(key, blob)
+        return pickle.loads(blob)
+
+    def set(self, key, data):
+        # se guarda serializado: no retiene el serializer / request que
+        # cuelgan de ReturnList y cada hit recibe su propia copia
+        blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        self._store_local(key, blob)
+        if self.shared_alias is not None:
+            caches[self.shared_alias].set(key, blob, timeout=self.timeout)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def _store_local(self, key, blob):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.timeout, blob)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+
+response_cache = ResponseCache.from_settings()
+
+
+class CatalogCacheMixin:
+    """
+    Mixin para vistas GET del catálogo:
+
+      1) GET condicional: el ETag sale de la generación del catálogo, la
+         versión del stock y la clave del request. Si coincide con
+         If-None-Match -> 304 sin correr la vista ni el serializer (sin
+         cache compartido, la única consulta es la de las versiones).
+      2) Si no, devuelve la respuesta cacheada para esa generación / stock
+         o la arma y la guarda. Sólo se cachean respuestas 200.
+    """
+
+    cache_endpoint = None
+
+    def get(self, request, *args, **kwargs):
+        # las respuestas muestran el stock: cambian con cualquiera de las dos
+        generation = "{}.{}".format(*catalog_versions())
+        key = response_cache.make_key(
+            self.cache_endpoint, request, kwargs, generation=generation
+        )
+        etag = f'W/"{generation}-{key.rsplit(":", 1)[-1][:16]}"'
+
+        response = not_modified(request, etag=etag)
+        if response is not None:
+            return response
+
+        data = response_cache.get(key)
+        if data is not None:
+            return set_validators(Response(data), etag=etag)
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response_cache.set(key, response.data)
+            set_validators(response, etag=etag)
+        return response
@@ -0,0 +1,291 @@
+# shop/cart.py
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    F,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Carrito, ItemCarrito
+from .money import as_money, sum_lines
+
+
+# =========================================================
+#                 CARRITO: MODELO DE LECTURA
+# =========================================================
+#
+# CarritoSerializer necesita los items con su Producto completo y los
+# totales. Leído "a mano" eso era 1 query por item (producto) + 2
+# recorridas más de items.all() para total_items / total_precio.
+#
+# load_cart() lo resuelve siempre con 2 queries, tenga el carrito 1 o
+# 200 items:
+#   1) el carrito con los totales calculados en SQL (SUM)
+#   2) los items JOIN producto (select_related)
+
+
+def cart_totals():
+    """
+    Anotaciones con los totales del carrito (ver Carrito.total_items /
+    Carrito.total_precio, que las usan si están).
+    """
+    return {
+        "items_cantidad": Coalesce(
+            Sum("items__cantidad"), Value(0), output_field=IntegerField()
+        ),
+        "items_total": sum_lines("items__cantidad", "items__producto__precio"),
+    }
+
+
+def cart_items_queryset():
+    return ItemCarrito.objects.select_related("producto").order_by("id")
+
+
+def cart_queryset():
+    return (
+        Carrito.objects
+        .annotate(**cart_totals())
+        .prefetch_related(Prefetch("items", queryset=cart_items_queryset()))
+    )
+
+
+def load_cart(carrito_id):
+    """
+    Carrito listo para CarritoSerializer: totales en SQL + items con su
+    producto en una sola query. Cantidad de queries constante.
+    """
+    return cart_queryset().get(pk=carrito_id)
+
+
+def load_customer_cart(customer):
+    """
+    Como load_cart, pero a partir de request.customer (shop/customer.py):
+    busca el carrito por cliente_id, que suele venir en el token, así que
+    ni siquiera hace falta averiguar antes el id del carrito.
+    """
+    if customer.cliente_id is not None:
+        try:
+            return cart_queryset().get(cliente_id=customer.cliente_id)
+        except Carrito.DoesNotExist:
+            pass
+    return load_cart(customer.carrito_id)
+
+
+def load_cart_line(carrito_id, talle, producto=None, slug=None):
+    """
+    Respuesta parcial (?response=delta): el item tocado, los totales y la
+    versión del carrito, en una sola query (el item va como subquery, así
+    todo sale de la misma lectura). Si el item ya no está, cantidad 0.
+    """
+    line = _items(OuterRef("pk"), talle, producto=producto, slug=slug)
+    row = (
+        Carrito.objects
+        .filter(pk=carrito_id)
+        .annotate(
+            **cart_totals(),
+            line_id=Subquery(line.values("id")[:1]),
+            line_cantidad=Subquery(line.values("cantidad")[:1]),
+            line_precio=Subquery(line.values("producto__precio")[:1]),
+        )
+        .values("version", "items_cantidad", "items_total", "line_id", "line_cantidad", "line_precio")
+        .get()
+    )
+    cantidad = row["line_cantidad"] or 0
+    return {
+        "version": row["version"],
+        "line": {
+            "id": row["line_id"],
+            "product_slug": producto.slug if producto is not None else slug,
+            "talle": talle,
+            "cantidad": cantidad,
+            "subtotal": cantidad * row["line_precio"] if cantidad else 0,
+        },
+        "total_items": row["items_cantidad"],
+        "total_precio": as_money(row["items_total"]),
+    }
+
+
+# =========================================================
+#                 CARRITO: MUTACIONES ATÓMICAS
+# =========================================================
+#
+# Nada de leer el item, cambiarlo en Python y guardarlo (dos pestañas o
+# dos clicks seguidos pisaban la cantidad). Todo es un UPDATE con F()
+# o un DELETE condicional; la restricción única (carrito, producto,
+# talle) hace que un INSERT concurrente falle en vez de duplicar la
+# fila, y en ese caso se reintenta como UPDATE.
+#
+# Cada cambio sube Carrito.version (touch_cart) en la misma transacción,
+# después de tocar los items: el UPDATE del carrito serializa los cambios
+# concurrentes del mismo carrito, así cada versión corresponde a un
+# único estado de los items.
+
+MAX_ATTEMPTS = 5
+
+
+def touch_cart(carrito):
+    Carrito.objects.filter(pk=carrito.pk).update(
+        version=F("version") + 1, actualizado=timezone.now()
+    )
+
+
+def _items(carrito, talle, producto=None, slug=None):
+    if producto is not None:
+        return ItemCarrito.objects.filter(carrito=carrito, producto=producto, talle=talle)
+    return ItemCarrito.objects.filter(carrito=carrito, producto__slug=slug, talle=talle)
+
+
+def _upsert(carrito, producto, talle, cantidad, update):
+    """
+    UPDATE y, si no había fila, INSERT. Si otro request insertó la misma
+    fila en el medio, el INSERT choca con la restricción única y se
+    vuelve a intentar el UPDATE.
+    """
+    items = _items(carrito, talle, producto=producto)
+    for attempt in range(MAX_ATTEMPTS):
+        if items.update(cantidad=update, actualizado=timezone.now()):
+            return
+        try:
+            with transaction.atomic():
+                ItemCarrito.objects.create(
+                    carrito=carrito, producto=producto, talle=talle, cantidad=cantidad
+                )
+            return
+        except IntegrityError:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+
+
+def add_item(carrito, producto, talle, cantidad):
+    """
+    Suma `cantidad` unidades (crea el item si no estaba).
+    2 queries si el item ya existía, 3 si es nuevo (+ la versión).
+    """
+    with transaction.atomic():
+        _upsert(carrito, producto, talle, cantidad, F("cantidad") + cantidad)
+        touch_cart(carrito)
+
+
+def set_item(carrito, producto, talle, cantidad):
+    """
+    Deja el item con exactamente `cantidad` unidades; 0 lo saca.
+    """
+    with transaction.atomic():
+        if cantidad <= 0:
+            _items(carrito, talle, producto=producto).delete()
+        else:
+            _upsert(carrito, producto, talle, cantidad, Value(cantidad))
+        touch_cart(carrito)
+
+
+def remove_item(carrito, talle, cantidad, producto=None, slug=None):
+    """
+    Resta `cantidad` unidades; si no quedan, borra el item.
+    Devuelve False si el item no estaba en el carrito.
+    """
+    with transaction.atomic():
+        if not _remove(carrito, talle, cantidad, producto, slug):
+            return False
+        touch_cart(carrito)
+    return True
+
+
+def _remove(carrito, talle, cantidad, producto, slug):
+    items = _items(carrito, talle, producto=producto, slug=slug)
+    for _attempt in range(MAX_ATTEMPTS):
+        if items.filter(cantidad__gt=cantidad).update(
+            cantidad=F("cantidad") - cantidad, actualizado=timezone.now()
+        ):
+            return True
+        deleted, _rows = items.filter(cantidad__lte=cantidad).delete()
+        if deleted:
+            return True
+        # ninguna de las dos: no está, o cambió entre el UPDATE y el DELETE
+        if not items.exists():
+            return False
+    raise IntegrityError("No se pudo actualizar el item del carrito (cambios concurrentes).")
+
+
+def apply_operations(carrito, operations):
+    """
+    Aplica en orden una lista de (op, producto, talle, cantidad), con
+    op en "add" / "remove" / "set", en una sola transacción y con una
+    cantidad fija de queries:
+
+      1) lee (y bloquea) los items afectados
+      2) calcula las cantidades finales en memoria
+      3) bulk_create de los nuevos, bulk_update de los que cambiaron y
+         un DELETE de los que quedaron en 0
+
+    "remove" de algo que no está en el carrito no hace nada.
+    Si otro request crea uno de los items nuevos en el medio, el
+    bulk_create choca con la restricción única y se cae al camino
+    item por item (add_item / set_item / remove_item).
+    """
+    with transaction.atomic():
+        productos = {producto.pk: producto for _, producto, _, _ in operations}
+        existing = {
+            (item.producto_id, item.talle): item
+            for item in ItemCarrito.objects.select_for_update().filter(
+                carrito=carrito, producto_id__in=productos
+            )
+        }
+
+        quantities = {key: item.cantidad for key, item in existing.items()}
+        for op, producto, talle, cantidad in operations:
+            key = (producto.pk, talle)
+            current = quantities.get(key, 0)
+            if op == "add":
+                quantities[key] = current + cantidad
+            elif op == "remove":
+                quantities[key] = max(current - cantidad, 0)
+            else:
+                quantities[key] = cantidad
+
+        now = timezone.now()
+        to_create, to_update, to_delete = [], [], []
+        for key, cantidad in quantities.items():
+            item = existing.get(key)
+            if item is None:
+                if cantidad > 0:
+                    to_create.append(ItemCarrito(
+                        carrito=carrito, producto=productos[key[0]], talle=key[1], cantidad=cantidad
+                    ))
+            elif cantidad == 0:
+                to_delete.append(item.pk)
+            elif cantidad != item.cantidad:
+                item.cantidad = cantidad
+                item.actualizado = now
+                to_update.append(item)
+
+        if to_update:
+            ItemCarrito.objects.bulk_update(to_update, ["cantidad", "actualizado"])
+        if to_delete:
+            ItemCarrito.objects.filter(pk__in=to_delete).delete()
+        if to_create:
+            try:
+                with transaction.atomic():
+                    ItemCarrito.objects.bulk_create(to_create)
+            except IntegrityError:
+                _apply_one_by_one(carrito, operations, existing)
+        touch_cart(carrito)
+
+
+def _apply_one_by_one(carrito, operations, existing):
+    # sólo las operaciones sobre items que no existían al principio: las
+    # demás ya se aplicaron con el bulk_update / DELETE
+    for op, producto, talle, cantidad in operations:
+        if (producto.pk, talle) in existing:
+            continue
+        if op == "add":
+            add_item(carrito, producto, talle, cantidad)
+        elif op == "remove":
+            remove_item(carrito, talle, cantidad, producto=producto)
+        else:
+            set_item(carrito, producto, talle, cantidad)
@@ -0,0 +1,351 @@
+# shop/catalog.py
+import threading
+from bisect import bisect_right
+
+from django.conf import settings
+
+
+# =========================================================
+#            CATÁLOGO EN MEMORIA (OPCIONAL)
+# =========================================================
+#
+# Con decenas o miles de SKUs el catálogo activo entra entero en
+# memoria. Si SHOP_CATALOG_ENGINE está activado, ProductListView y
+# ProductDetailView se sirven desde acá en vez de consultar la base:
+#
+#   - un ProductRecord (con __slots__) por producto activo;
+#   - índices por id, slug, categoría, tag y "con stock";
+#   - listas ya ordenadas por cada orden del paginador, para resolver
+#     el cursor keyset con un bisect.
+#
+# Igual que los índices de búsqueda y facetas: se carga al arrancar el
+# worker (wsgi.py) o en el primer request, se actualiza de a un producto
+# desde las señales y se recarga si la generación del catálogo cambió
+# en otro worker. El stock que mueven las reservas se re-lee sólo para
+# los productos que cambiaron (sync_stock), sin cambiar la generación.
+
+# todas las columnas de Producto, en el orden del modelo
+# (Model.from_db asume ese orden cuando vienen todas)
+FIELDS = (
+    "id", "nombre", "slug", "precio", "descripcion", "stock", "categoria",
+    "tag", "imagen", "imagen_hover", "imagen_3", "imagen_4", "activo",
+)
+
+
+def enabled():
+    return bool(getattr(settings, "SHOP_CATALOG_ENGINE", False))
+
+
+class ProductRecord:
+    """
+    Fila compacta de Producto: sólo los valores, sin el estado de un
+    Model. Las imágenes se guardan como el nombre del archivo.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, values):
+        for name, value in zip(FIELDS, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_instance(cls, producto):
+        # to_python: lo recién guardado puede traer tipos "crudos"
+        # (ej. precio como str) que no ordenan igual que los de la base
+        values = []
+        for name in FIELDS:
+            value = getattr(producto, name)
+            if hasattr(value, "name"):  # FieldFile
+                value = value.name or None
+            else:
+                value = producto._meta.get_field(name).to_python(value)
+            values.append(value)
+        return cls(values)
+
+    def to_instance(self):
+        """
+        Producto "cargado" (como si viniera de la base) para pasarle al
+        serializer. Se arma uno nuevo por request: nadie comparte
+        instancias mutables entre threads.
+        """
+        from .models import Producto
+
+        return Producto.from_db(
+            "default", FIELDS, [getattr(self, name) for name in FIELDS]
+        )
+
+
+class CatalogQuery:
+    """
+    Selección del catálogo en memoria (filtros + búsqueda) que entiende
+    KeysetPagination: en vez de un queryset, el paginador llama a
+    keyset_page().
+    """
+
+    def __init__(self, engine, filters, ranking=None):
+        from .models import Producto
+
+        self.model = Producto
+        self.engine = engine
+        self.filters = filters
+        self.ranking = ranking
+
+    def keyset_page(self, ordering, position, limit):
+        return self.engine.page(self.filters, ordering, position, limit, self.ranking)
+
+
+class CatalogEngine:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._built = False
+        self.generation = None
+        self.stock_version = None
+        self._records = {}       # pk -> ProductRecord
+        self._slugs = {}         # slug -> ProductRecord
+        self._by_categoria = {}  # categoria -> set(pk)
+        self._by_tag = {}        # tag -> set(pk)
+        self._in_stock = set()
+        self._sorted = {}        # ordering -> (claves, records), se arma a demanda
+
+    # ---------- armado ----------
+    def build(self, rows):
+        """
+        rows: iterable de tuplas con los valores de FIELDS.
+        """
+        with self._lock:
+            self._reset()
+            for values in rows:
+                self._add(ProductRecord(values))
+            self._built = True
+
+    def build_from_db(self):
+        from .cache import catalog_generation, catalog_stock_version
+        from .models import Producto
+
+        generation = catalog_generation()
+        stock_version = catalog_stock_version()
+        rows = (
+            Producto.objects
+            .filter(activo=True)
+            .values_list(*FIELDS)
+            .iterator(chunk_size=2000)
+        )
+        self.build(rows)
+        self.generation = generation
+        self.stock_version = stock_version
+
+    def ensure_built(self):
+        from .cache import catalog_generation
+
+        if self._built and self.generation == catalog_generation():
+            self.sync_stock()
+            return
+        with self._lock:
+            if not self._built or self.generation != catalog_generation():
+                self.build_from_db()
+
+    def advance(self, previous, generation):
+        with self._lock:
+            if self._built and previous is not None and self.generation == previous:
+                self.generation = generation
+
+    # ---------- stock (sin cambiar la generación) ----------
+    def sync_stock(self):
+        """
+        Si otro worker movió stock (reservas), re-lee el stock sólo de los
+        productos que cambiaron. Si no se sabe cuáles, recarga todo.
+        """
+        from .cache import catalog_stock_version, stock_changes
+        from .models import Producto
+
+        current = catalog_stock_version()
+        if self.stock_version == current:
+            return
+        with self._lock:
+            if not self._built or self.stock_version == current:
+                return
+            ids = stock_changes(self.stock_version, current)
+            if ids is None:
+                self.build_from_db()
+                return
+            for pk, stock in Producto.objects.filter(pk__in=ids).values_list("id", "stock"):
+                self.set_stock(pk, stock)
+            self.stock_version = current
+
+    def advance_stock(self, previous, version):
+        with self._lock:
+            if self._built and previous is not None and self.stock_version == previous:
+                self.stock_version = version
+
+    def __len__(self):
+        return len(self._records)
+
+    # ---------- actualizaciones incrementales ----------
+    def update(self, producto):
+        if not self._built:
+            return
+        with self._lock:
+            self._remove(producto.pk)
+            if producto.activo:
+                self._add(ProductRecord.from_instance(producto))
+
+    def remove(self, pk):
+        if not self._built:
+            return
+        with self._lock:
+            self._remove(pk)
+
+    def set_stock(self, pk, stock):
+        # ningún orden del paginador usa el stock: las listas ordenadas
+        # (que comparten los records) siguen valiendo
+        with self._lock:
+            record = self._records.get(pk)
+            if record is None:
+                return
+            record.stock = stock
+            if stock > 0:
+                self._in_stock.add(pk)
+            else:
+                self._in_stock.discard(pk)
+
+    def _add(self, record):
+        pk = record.id
+        self._records[pk] = record
+        self._slugs[record.slug] = record
+        self._by_categoria.setdefault(record.categoria, set()).add(pk)
+        if record.tag:
+            self._by_tag.setdefault(record.tag, set()).add(pk)
+        if record.stock > 0:
+            self._in_stock.add(pk)
+        self._sorted = {}
+
+    def _remove(self, pk):
+        record = self._records.pop(pk, None)
+        if record is None:
+            return
+        if self._slugs.get(record.slug) is record:
+            del self._slugs[record.slug]
+        self._by_categoria.get(record.categoria, set()).discard(pk)
+        self._by_tag.get(record.tag, set()).discard(pk)
+        self._in_stock.discard(pk)
+        self._sorted = {}
+
+    # ---------- consulta ----------
+    def get_by_slug(self, slug):
+        """
+        Producto (instancia) con ese slug, o None.
+        """
+        self.ensure_built()
+        record = self._slugs.get(slug)
+        return record.to_instance() if record is not None else None
+
+    def get_by_ids(self, ids):
+        """
+        {pk: instancia} de los productos activos entre `ids`.
+        """
+        self.ensure_built()
+        records = self._records
+        return {pk: records[pk].to_instance() for pk in ids if pk in records}
+
+    def query(self, filters, ranking=None):
+        self.ensure_built()
+        return CatalogQuery(self, filters, ranking)
+
+    @staticmethod
+    def _key(record, ordering, rank=None):
+        # clave ascendente equivalente al ORDER BY del paginador:
+        # los campos "-x" se niegan
+        key = []
+        for field in ordering:
+            name = field.lstrip("-")
+            value = rank[record.id] if name == "relevancia" else getattr(record, name)
+            key.append(-value if field.startswith("-") else value)
+        return tuple(key)
+
+    def _ordered(self, ordering):
+        cached = self._sorted.get(ordering)
+        if cached is None:
+            records = sorted(self._records.values(), key=lambda r: self._key(r, ordering))
+            cached = ([self._key(r, ordering) for r in records], records)
+            self._sorted[ordering] = cached
+        return cached
+
+    def _matching(self, filters, ranking):
+        """
+        Set de pks que cumplen los filtros por índice (categoría, tag,
+        stock, búsqueda), o None si no hay ninguno. El rango de precio
+        se chequea fila por fila.
+        """
+        sets = []
+        if filters["cat"]:
+            sets.append(self._by_categoria.get(filters["cat"], set()))
+        if filters["tag"]:
+            sets.append(self._by_tag.get(filters["tag"], set()))
+        if filters["in_stock"]:
+            sets.append(self._in_stock)
+        if ranking is not None:
+            sets.append(set(ranking))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    @staticmethod
+    def _price_ok(record, filters):
+        low, high = filters["price_min"], filters["price_max"]
+        if low is not None and record.precio < low:
+            return False
+        if high is not None and record.precio >= high:
+            return False
+        return True
+
+    def page(self, filters, ordering, position, limit, ranking=None):
+        """
+        Hasta `limit` productos (instancias) después de `position` en el
+        orden `ordering` (mismo formato que KeysetPagination).
+        """
+        with self._lock:
+            matching = self._matching(filters, ranking)
+
+            if "relevancia" in (f.lstrip("-") for f in ordering):
+                rank = {pk: pos for pos, pk in enumerate(ranking or ())}
+                records = [
+                    self._records[pk] for pk in (ranking or ())
+                    if pk in self._records
+                ]
+                keys = [self._key(r, ordering, rank) for r in records]
+            else:
+                rank = None
+                keys, records = self._ordered(tuple(ordering))
+
+            start = 0
+            if position is not None:
+                after = tuple(
+                    -value if field.startswith("-") else value
+                    for field, value in zip(ordering, position)
+                )
+                start = bisect_right(keys, after)
+
+            out = []
+            for record in records[start:]:
+                if matching is not None and record.id not in matching:
+                    continue
+                if not self._price_ok(record, filters):
+                    continue
+                out.append(record)
+                if len(out) == limit:
+                    break
+
+        instances = []
+        for record in out:
+            instance = record.to_instance()
+            if rank is not None:
+                instance.relevancia = rank[record.id]
+            instances.append(instance)
+        return instances
+
+
+catalog_engine = CatalogEngine()
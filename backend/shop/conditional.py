@@ -0,0 +1,52 @@
+# shop/conditional.py
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+# =========================================================
+#           GET CONDICIONAL (ETag / Last-Modified)
+# =========================================================
+#
+# Las vistas calculan un validador barato (generación del catálogo,
+# `actualizado` del pedido) ANTES de tocar el serializer. Si el cliente
+# ya tiene esa versión (If-None-Match / If-Modified-Since) se corta con
+# un 304 sin cuerpo.
+
+
+def set_validators(response, etag=None, last_modified=None, private=False):
+    """
+    Agrega ETag / Last-Modified y un Cache-Control que obliga al
+    navegador a revalidar (no-cache) en vez de servir algo viejo.
+    """
+    if etag:
+        response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    if private:
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def not_modified(request, etag=None, last_modified=None, private=False):
+    """
+    Devuelve un 304 (con los mismos validadores) si el cliente ya tiene
+    esta versión; None si hay que armar la respuesta completa.
+
+    `request` puede ser el Request de DRF o el HttpRequest de Django.
+    `last_modified` es un timestamp (segundos).
+    """
+    django_request = getattr(request, "_request", request)
+    probe = set_validators(HttpResponse(), etag, last_modified, private)
+    response = get_conditional_response(
+        django_request,
+        etag=etag,
+        last_modified=last_modified,
+        response=probe,
+    )
+    if response is probe:
+        return None
+    return response
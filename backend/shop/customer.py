@@ -0,0 +1,101 @@
+# shop/customer.py
+from functools import cached_property
+
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Carrito, Cliente
+
+
+# =========================================================
+#          CLIENTE / CARRITO DEL REQUEST (UNA VEZ)
+# =========================================================
+#
+# Casi todas las vistas necesitan el Cliente (y muchas el Carrito) del
+# usuario logueado, y cada una lo buscaba por su cuenta: user.cliente +
+# Carrito.get_or_create en el carrito, Cliente.objects.get(user=...) en
+# el checkout, get_or_create en la dirección...
+#
+# Ahora:
+#   - el id del Cliente viaja en el JWT (claim "cliente_id", se agrega al
+#     emitir el token y el refresh lo copia al access);
+#   - CustomerMiddleware deja en cada request un `request.customer` que
+#     resuelve cliente_id / carrito_id / cliente / carrito recién cuando
+#     se piden, una sola vez por request.
+#
+# Con el claim, saber el cliente no cuesta ninguna query; tokens viejos
+# (sin claim) o autenticación por sesión caen a buscarlo en la base.
+# El id del Carrito no va en el token: el carrito se puede borrar y
+# volver a crear (ver compact_carts), el Cliente no.
+
+CLIENTE_CLAIM = "cliente_id"
+
+
+class ShopRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        cliente, _ = Cliente.objects.get_or_create(user=user)
+        token[CLIENTE_CLAIM] = cliente.pk
+        return token
+
+
+class ShopTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    /api/token/ (SIMPLE_JWT["TOKEN_OBTAIN_SERIALIZER"]): mismo token que
+    el login de la tienda, con el claim del cliente.
+    """
+    token_class = ShopRefreshToken
+
+
+class Customer:
+    """
+    `request.customer`. Todo es perezoso y queda cacheado en el request:
+
+      cliente_id  claim del token, o 1 query (None si no hay Cliente)
+      cliente     1 query (con el carrito en el mismo JOIN)
+      carrito_id  1 query; crea Cliente / Carrito si faltan
+      carrito     Carrito sólo con pk y cliente_id, sin query extra
+    """
+
+    def __init__(self, request):
+        self._request = request
+
+    @property
+    def user(self):
+        return self._request.user
+
+    @cached_property
+    def cliente_id(self):
+        if not self.user.is_authenticated:
+            return None
+        token = getattr(self._request, "auth", None)
+        claim = token.get(CLIENTE_CLAIM) if hasattr(token, "get") else None
+        if claim is not None:
+            return claim
+        return Cliente.objects.filter(user=self.user).values_list("id", flat=True).first()
+
+    @cached_property
+    def cliente(self):
+        if self.cliente_id is None:
+            raise Cliente.DoesNotExist("El usuario no tiene Cliente asociado.")
+        return Cliente.objects.select_related("carrito").get(pk=self.cliente_id)
+
+    @cached_property
+    def carrito_id(self):
+        if "cliente" in self.__dict__:
+            try:
+                return self.cliente.carrito.pk
+            except Carrito.DoesNotExist:
+                pass
+        if self.cliente_id is None:
+            # como get_or_create_cliente_y_carrito: sin perfil, se crea
+            self.cliente_id = Cliente.objects.get_or_create(user=self.user)[0].pk
+        pk = Carrito.objects.filter(cliente_id=self.cliente_id).values_list("id", flat=True).first()
+        if pk is None:
+            pk = Carrito.objects.get_or_create(cliente_id=self.cliente_id)[0].pk
+        return pk
+
+    @cached_property
+    def carrito(self):
+        return Carrito(pk=self.carrito_id, cliente_id=self.cliente_id)
@@ -0,0 +1,346 @@
+# shop/facets.py
+import threading
+from bisect import bisect_left, insort
+from decimal import Decimal, InvalidOperation
+
+
+# =========================================================
+#                 FACETAS DEL LISTADO DE PRODUCTOS
+# =========================================================
+#
+# Índice en memoria con un bitset (int de Python) por valor de faceta:
+#   ("categoria", "tees") -> 0b1011...   (bit i = producto en posición i)
+#
+# Contar "cuántos productos hay con cat=X dado el resto de los filtros"
+# es un AND de enteros + bit_count(), sin GROUP BY en la base.
+# Se actualiza de a un producto desde las señales de Producto y, como el
+# índice de búsqueda, se rearma si la generación del catálogo cambió en
+# otro worker. Los movimientos de stock de las reservas no cambian la
+# generación: sólo se re-lee el stock de esos productos (sync_stock).
+
+PRICE_BUCKETS = [
+    (Decimal("0"), Decimal("15000")),
+    (Decimal("15000"), Decimal("30000")),
+    (Decimal("30000"), Decimal("50000")),
+    (Decimal("50000"), None),
+]
+
+FACET_TAGS = ("new", "sale")
+
+
+def bucket_label(low, high):
+    if high is None:
+        return f"{low}+"
+    return f"{low}-{high}"
+
+
+def _decimal(value):
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def parse_filters(params):
+    """
+    Lee los filtros del listado desde los query params:
+      cat, tag, price_min (>=), price_max (<), in_stock=1
+    Lo usan tanto el queryset como el conteo de facetas, así filtran igual.
+    """
+    return {
+        "cat": params.get("cat") or None,
+        "tag": params.get("tag") or None,
+        "price_min": _decimal(params.get("price_min")),
+        "price_max": _decimal(params.get("price_max")),
+        "in_stock": params.get("in_stock") in ("1", "true", "True"),
+    }
+
+
+def apply_filters(queryset, filters):
+    if filters["cat"]:
+        queryset = queryset.filter(categoria=filters["cat"])
+    if filters["tag"]:
+        queryset = queryset.filter(tag=filters["tag"])
+    if filters["price_min"] is not None:
+        queryset = queryset.filter(precio__gte=filters["price_min"])
+    if filters["price_max"] is not None:
+        queryset = queryset.filter(precio__lt=filters["price_max"])
+    if filters["in_stock"]:
+        queryset = queryset.filter(stock__gt=0)
+    return queryset
+
+
+class FacetIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._built = False
+        self.generation = None
+        self.stock_version = None
+        self._bits = {}        # pk -> posición del bit
+        self._free = []        # posiciones liberadas para reusar
+        self._next_bit = 0
+        self._docs = {}        # pk -> (categoria, tag, precio, hay_stock)
+        self._masks = {}       # (dimensión, valor) -> bitset
+        self._prices = []      # precios distintos, ordenados
+        self._all = 0
+
+    # ---------- armado ----------
+    def build(self, rows):
+        """
+        rows: iterable de (id, categoria, tag, precio, stock).
+        """
+        with self._lock:
+            self._reset()
+            for pk, categoria, tag, precio, stock in rows:
+                self._add(pk, categoria, tag, precio, stock)
+            self._built = True
+
+    def build_from_db(self):
+        from .cache import catalog_generation, catalog_stock_version
+        from .models import Producto
+
+        generation = catalog_generation()
+        stock_version = catalog_stock_version()
+        rows = (
+            Producto.objects
+            .filter(activo=True)
+            .values_list("id", "categoria", "tag", "precio", "stock")
+            .iterator(chunk_size=2000)
+        )
+        self.build(rows)
+        self.generation = generation
+        self.stock_version = stock_version
+
+    def ensure_built(self):
+        from .cache import catalog_generation
+
+        if self._built and self.generation == catalog_generation():
+            self.sync_stock()
+            return
+        with self._lock:
+            if not self._built or self.generation != catalog_generation():
+                self.build_from_db()
+
+    def advance(self, previous, generation):
+        with self._lock:
+            if self._built and previous is not None and self.generation == previous:
+                self.generation = generation
+
+    # ---------- stock (sin cambiar la generación) ----------
+    def sync_stock(self):
+        """
+        Si otro worker movió stock (reservas), re-lee el stock sólo de los
+        productos que cambiaron. Si no se sabe cuáles, recarga todo.
+        """
+        from .cache import catalog_stock_version, stock_changes
+        from .models import Producto
+
+        current = catalog_stock_version()
+        if self.stock_version == current:
+            return
+        with self._lock:
+            if not self._built or self.stock_version == current:
+                return
+            ids = stock_changes(self.stock_version, current)
+            if ids is None:
+                self.build_from_db()
+                return
+            for pk, stock in Producto.objects.filter(pk__in=ids).values_list("id", "stock"):
+                self.set_stock(pk, stock)
+            self.stock_version = current
+
+    def advance_stock(self, previous, version):
+        with self._lock:
+            if self._built and previous is not None and self.stock_version == previous:
+                self.stock_version = version
+
+    # ---------- actualizaciones incrementales ----------
+    def update(self, producto):
+        if not self._built:
+            return
+        with self._lock:
+            self._remove(producto.pk)
+            if producto.activo:
+                self._add(
+                    producto.pk,
+                    producto.categoria,
+                    producto.tag,
+                    producto.precio,
+                    producto.stock,
+                )
+
+    def remove(self, pk):
+        if not self._built:
+            return
+        with self._lock:
+            self._remove(pk)
+
+    def set_stock(self, pk, stock):
+        # sólo cambia la faceta "con stock", el resto del doc queda igual
+        with self._lock:
+            doc = self._docs.get(pk)
+            if doc is None or doc[3] == (stock > 0):
+                return
+            self._docs[pk] = doc[:3] + (stock > 0,)
+            flag = 1 << self._bits[pk]
+            key = ("stock", "in_stock")
+            if stock > 0:
+                self._masks[key] = self._masks.get(key, 0) | flag
+            else:
+                mask = self._masks.get(key, 0) & ~flag
+                if mask:
+                    self._masks[key] = mask
+                else:
+                    self._masks.pop(key, None)
+
+    def _keys_for(self, categoria, tag, precio, en_stock):
+        keys = [("categoria", categoria), ("precio", precio)]
+        if tag:
+            keys.append(("tag", tag))
+        for low, high in PRICE_BUCKETS:
+            if precio >= low and (high is None or precio < high):
+                keys.append(("bucket", bucket_label(low, high)))
+                break
+        if en_stock:
+            keys.append(("stock", "in_stock"))
+        return keys
+
+    def _add(self, pk, categoria, tag, precio, stock):
+        precio = Decimal(precio)
+        if self._free:
+            bit = self._free.pop()
+        else:
+            bit = self._next_bit
+            self._next_bit += 1
+        self._bits[pk] = bit
+        doc = (categoria, tag, precio, stock > 0)
+        self._docs[pk] = doc
+
+        flag = 1 << bit
+        self._all |= flag
+        for key in self._keys_for(*doc):
+            self._masks[key] = self._masks.get(key, 0) | flag
+        i = bisect_left(self._prices, precio)
+        if i == len(self._prices) or self._prices[i] != precio:
+            insort(self._prices, precio)
+
+    def _remove(self, pk):
+        doc = self._docs.pop(pk, None)
+        if doc is None:
+            return
+        bit = self._bits.pop(pk)
+        self._free.append(bit)
+
+        flag = 1 << bit
+        self._all &= ~flag
+        for key in self._keys_for(*doc):
+            mask = self._masks.get(key, 0) & ~flag
+            if mask:
+                self._masks[key] = mask
+            else:
+                self._masks.pop(key, None)
+                if key[0] == "precio":
+                    del self._prices[bisect_left(self._prices, key[1])]
+
+    # ---------- consulta ----------
+    def _price_mask(self, low, high):
+        lo = 0 if low is None else bisect_left(self._prices, low)
+        hi = len(self._prices) if high is None else bisect_left(self._prices, high)
+        mask = 0
+        for precio in self._prices[lo:hi]:
+            mask |= self._masks[("precio", precio)]
+        return mask
+
+    def _ids_mask(self, ids):
+        # se arma en un bytearray y se convierte una sola vez a int
+        # (hacer OR bit por bit copiaría el entero entero cada vez)
+        buf = bytearray((self._next_bit + 7) // 8)
+        for pk in ids:
+            bit = self._bits.get(pk)
+            if bit is not None:
+                buf[bit >> 3] |= 1 << (bit & 7)
+        return int.from_bytes(buf, "little")
+
+    def counts(self, filters, ids=None):
+        """
+        Conteos por valor de cada faceta. Para cada dimensión se aplican
+        todos los filtros MENOS el de esa misma dimensión (así el front
+        puede mostrar las alternativas, ej. las otras categorías).
+
+        `ids`: si hay búsqueda, ids de los resultados (limita la base).
+        """
+        from .models import Producto
+
+        self.ensure_built()
+        with self._lock:
+            active = {}
+            if filters["cat"]:
+                active["categoria"] = self._masks.get(("categoria", filters["cat"]), 0)
+            if filters["tag"]:
+                active["tag"] = self._masks.get(("tag", filters["tag"]), 0)
+            if filters["price_min"] is not None or filters["price_max"] is not None:
+                active["bucket"] = self._price_mask(filters["price_min"], filters["price_max"])
+            if filters["in_stock"]:
+                active["stock"] = self._masks.get(("stock", "in_stock"), 0)
+
+            base = self._all
+            if ids is not None:
+                base &= self._ids_mask(ids)
+
+            def base_without(dimension):
+                mask = base
+                for dim, m in active.items():
+                    if dim != dimension:
+                        mask &= m
+                return mask
+
+            m = base_without("categoria")
+            categorias = [
+                {
+                    "value": value,
+                    "label": label,
+                    "count": (m & self._masks.get(("categoria", value), 0)).bit_count(),
+                }
+                for value, label in Producto.CATEGORIES
+            ]
+
+            m = base_without("tag")
+            tags = [
+                {
+                    "value": value,
+                    "count": (m & self._masks.get(("tag", value), 0)).bit_count(),
+                }
+                for value in FACET_TAGS
+            ]
+
+            m = base_without("bucket")
+            precios = []
+            for low, high in PRICE_BUCKETS:
+                label = bucket_label(low, high)
+                precios.append({
+                    "value": label,
+                    "min": str(low),
+                    "max": None if high is None else str(high),
+                    "count": (m & self._masks.get(("bucket", label), 0)).bit_count(),
+                })
+
+            m = base_without("stock")
+            stock = [{
+                "value": "in_stock",
+                "count": (m & self._masks.get(("stock", "in_stock"), 0)).bit_count(),
+            }]
+
+        return {
+            "categoria": categorias,
+            "tag": tags,
+            "precio": precios,
+            "stock": stock,
+        }
+
+
+facet_index = FacetIndex()
@@ -0,0 +1,215 @@
+# shop/guest_cart.py
+import hashlib
+from datetime import timedelta
+
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .catalog import catalog_engine, enabled as catalog_engine_enabled
+from .models import IdempotencyKey, ItemCarrito, Producto
+from .money import from_cents, line_cents
+
+
+# =========================================================
+#              CARRITO DE INVITADO (SIN BASE)
+# =========================================================
+#
+# Un usuario sin loguear también tiene carrito, pero no en Carrito /
+# ItemCarrito: vive en un token firmado (django.core.signing, comprimido)
+# que el front guarda y manda en el header X-Guest-Cart. Cada respuesta
+# del carrito devuelve el token actualizado en `guest_token`.
+#
+#   token = [[producto_id, talle, cantidad], ...]
+#
+# No se escribe nada en la base: al leer sólo se validan los productos
+# contra el catálogo (en memoria si SHOP_CATALOG_ENGINE está activo).
+# Al loguearse / registrarse se funde en el Carrito con un solo bulk
+# upsert (shop.cart.apply_operations), una sola vez por token y usuario:
+# si el login se reintenta con el mismo header no se vuelve a sumar.
+#
+# Va en un header y no en una cookie porque el front (Vercel) y la API
+# (Railway) están en dominios distintos.
+
+HEADER = "X-Guest-Cart"
+SALT = "shop.guest-cart"
+MAX_AGE = 60 * 60 * 24 * 30  # 30 días
+MAX_LINES = 50
+# marca de "token ya fundido" (una IdempotencyKey del usuario)
+MERGED_KEY_PREFIX = "guest-cart:"
+
+
+def find_products(slugs=None, ids=None):
+    """
+    Productos activos por slug ({slug: producto}) o por id ({id: producto}),
+    sin escribir nada y, con el catálogo en memoria, sin consultar la base.
+    """
+    if catalog_engine_enabled():
+        if ids is not None:
+            return catalog_engine.get_by_ids(ids)
+        found = (catalog_engine.get_by_slug(slug) for slug in slugs)
+        return {p.slug: p for p in found if p is not None}
+    activos = Producto.objects.filter(activo=True)
+    if ids is not None:
+        return activos.in_bulk(ids)
+    return activos.in_bulk(slugs, field_name="slug")
+
+
+def token_from_request(request):
+    token = request.headers.get(HEADER)
+    if not token and hasattr(request, "data"):
+        token = request.data.get("guest_cart")
+    return token or ""
+
+
+def claim_merge(user, token):
+    """
+    Marca el token como fundido en el carrito del usuario; False si ya lo
+    estaba. Llamar dentro de la transacción que funde: si falla, la marca
+    se va con ella.
+    """
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                user=user,
+                key=f"{MERGED_KEY_PREFIX}{digest}",
+                fingerprint=digest,
+                status_code=200,
+                expira=timezone.now() + timedelta(seconds=MAX_AGE),
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+class GuestCart:
+    def __init__(self, lines=None):
+        # (producto_id, talle) -> cantidad, en orden de agregado
+        self.lines = dict(lines or {})
+
+    # ---------- token ----------
+    @classmethod
+    def from_token(cls, token):
+        """
+        Token inválido, vencido o adulterado -> carrito vacío.
+        """
+        if not token:
+            return cls()
+        try:
+            raw = signing.loads(token, salt=SALT, max_age=MAX_AGE)
+            lines = {}
+            for pk, talle, cantidad in raw[:MAX_LINES]:
+                if int(cantidad) > 0:
+                    lines[(int(pk), talle or None)] = int(cantidad)
+        except (signing.BadSignature, TypeError, ValueError):
+            return cls()
+        return cls(lines)
+
+    @classmethod
+    def from_request(cls, request):
+        return cls.from_token(token_from_request(request))
+
+    def token(self):
+        if not self.lines:
+            return ""
+        raw = [[pk, talle or "", cantidad] for (pk, talle), cantidad in self.lines.items()]
+        return signing.dumps(raw, salt=SALT, compress=True)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    # ---------- mutaciones (en memoria) ----------
+    def apply(self, operations):
+        """
+        Misma semántica que shop.cart.apply_operations: lista de
+        (op, producto, talle, cantidad) con op "add" / "remove" / "set".
+        """
+        for op, producto, talle, cantidad in operations:
+            key = (producto.pk, talle)
+            current = self.lines.get(key, 0)
+            if op == "add":
+                new = current + cantidad
+            elif op == "remove":
+                new = max(current - cantidad, 0)
+            else:
+                new = cantidad
+            if new > 0:
+                if key not in self.lines and len(self.lines) >= MAX_LINES:
+                    raise serializers.ValidationError(
+                        {"detail": f"El carrito admite hasta {MAX_LINES} productos distintos."}
+                    )
+                self.lines[key] = new
+            else:
+                self.lines.pop(key, None)
+
+    def contains(self, producto, talle):
+        return (producto.pk, talle) in self.lines
+
+    # ---------- lectura ----------
+    def resolve(self):
+        """
+        Lista de (producto, talle, cantidad) con los productos que siguen
+        activos; los demás se descartan (y salen del próximo token).
+        """
+        productos = find_products(ids={pk for pk, _ in self.lines})
+        resolved = []
+        for (pk, talle), cantidad in list(self.lines.items()):
+            producto = productos.get(pk)
+            if producto is None:
+                del self.lines[(pk, talle)]
+                continue
+            resolved.append((producto, talle, cantidad))
+        return resolved
+
+    def operations(self):
+        """
+        El carrito como operaciones "add", para fundirlo en un Carrito.
+        """
+        return [("add", producto, talle, cantidad) for producto, talle, cantidad in self.resolve()]
+
+    def data(self):
+        """
+        Mismo formato que CarritoSerializer (id e ids de items en null)
+        más `guest_token`.
+        """
+        from .serializers import ItemCarritoSerializer
+
+        items = [
+            ItemCarrito(producto=producto, talle=talle, cantidad=cantidad)
+            for producto, talle, cantidad in self.resolve()
+        ]
+        total_precio = from_cents(sum(line_cents(i.producto.precio, i.cantidad) for i in items))
+        money = serializers.DecimalField(max_digits=10, decimal_places=2)
+        return {
+            "id": None,
+            "version": None,
+            "items": ItemCarritoSerializer(items, many=True).data,
+            "total_items": sum(i.cantidad for i in items),
+            "total_precio": money.to_representation(total_precio),
+            "guest_token": self.token(),
+        }
+
+    def delta(self, producto, talle):
+        """
+        Como shop.cart.load_cart_line (respuesta ?response=delta), más
+        `guest_token`. Sin versión: el token ya es el estado completo.
+        """
+        from .serializers import CartDeltaSerializer
+
+        resolved = self.resolve()
+        cantidad = self.lines.get((producto.pk, talle), 0)
+        data = CartDeltaSerializer({
+            "version": None,
+            "line": {
+                "id": None,
+                "product_slug": producto.slug,
+                "talle": talle,
+                "cantidad": cantidad,
+                "subtotal": cantidad * producto.precio if cantidad else 0,
+            },
+            "total_items": sum(c for _, _, c in resolved),
+            "total_precio": from_cents(sum(line_cents(p.precio, c) for p, _, c in resolved)),
+        }).data
+        return {**data, "guest_token": self.token()}
@@ -0,0 +1,182 @@
+# shop/idempotency.py
+import hashlib
+import json
+import random
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+# =========================================================
+#                 IDEMPOTENCY-KEY EN LOS POST
+# =========================================================
+#
+# Reintentos del celular y doble click en "Pagar": el front manda el
+# mismo header Idempotency-Key y el segundo request recibe la respuesta
+# del primero tal cual (mismo status y mismo body), sin volver a crear
+# el pedido ni sumar otra vez al carrito.
+#
+#   1) INSERT (user, key) con status_code NULL = "en curso". La
+#      restricción única hace que, de dos requests simultáneos, sólo
+#      uno gane; el otro espera a que termine (hasta WAIT segundos) y
+#      devuelve lo mismo, o 409 si sigue en curso.
+#   2) Se corre la vista y se guarda la respuesta ya renderizada.
+#      Errores 5xx, 409 (o una excepción) borran la fila: se puede
+#      reintentar.
+#   3) Vencen a las TTL horas; las vencidas se ignoran y se van
+#      borrando de a tandas desde los mismos requests.
+#
+# Sólo con usuario logueado: el carrito de invitado ya es idempotente
+# (el token que manda el front es el estado de partida).
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+PURGE_CHUNK = 500
+
+
+def _config():
+    return getattr(settings, "SHOP_IDEMPOTENCY", {})
+
+
+def _fingerprint(request):
+    try:
+        body = json.dumps(request.data, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        body = request.body.decode("utf-8", "replace")
+    # ruta con query string: ?response=delta cambia la forma de la respuesta
+    raw = f"{request.method} {request.get_full_path()}\n{body}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _replay(record):
+    response = HttpResponse(
+        record.body, status=record.status_code, content_type=record.content_type or None
+    )
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _error(detail, status_code):
+    return Response({"detail": detail}, status=status_code)
+
+
+def _purge_expired():
+    ids = list(
+        IdempotencyKey.objects
+        .filter(expira__lt=timezone.now())
+        .values_list("id", flat=True)[:PURGE_CHUNK]
+    )
+    if ids:
+        IdempotencyKey.objects.filter(pk__in=ids).delete()
+
+
+def _claim(user, key, fingerprint):
+    """
+    (fila nueva, None) si este request es el primero con la key, o
+    (None, fila existente) si ya hay otro. Una fila vencida se borra y
+    se vuelve a intentar.
+    """
+    expira = timezone.now() + timedelta(hours=_config().get("TTL_HOURS", 24))
+    for _attempt in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user, key=key, fingerprint=fingerprint, expira=expira
+                )
+            return record, None
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if existing is None:
+                continue  # se borró en el medio
+            if existing.expira > timezone.now():
+                return None, existing
+            IdempotencyKey.objects.filter(pk=existing.pk, expira__lte=timezone.now()).delete()
+    raise IntegrityError(f"No se pudo registrar la Idempotency-Key {key!r}.")
+
+
+def _wait_for(record):
+    deadline = time.monotonic() + _config().get("WAIT", 5.0)
+    while record.status_code is None and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+        if record is None:
+            return None  # el original falló: borró la fila
+    return record
+
+
+def idempotent(view_method):
+    """
+    Decorador para los post() de las vistas (APIView). Sin header, o sin
+    usuario logueado, la vista corre como siempre.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error(
+                f"El header {HEADER} admite hasta {MAX_KEY_LENGTH} caracteres.",
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = _fingerprint(request)
+        record, existing = _claim(request.user, key, fingerprint)
+
+        if existing is not None:
+            if existing.fingerprint != fingerprint:
+                return _error(
+                    f"Esta {HEADER} ya se usó con otro request.",
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            existing = _wait_for(existing)
+            if existing is None:
+                return _error(
+                    "El request original con esta key falló. Reintentá.",
+                    status.HTTP_409_CONFLICT,
+                )
+            if existing.status_code is None:
+                return _error(
+                    f"Todavía se está procesando un request con esta {HEADER}.",
+                    status.HTTP_409_CONFLICT,
+                )
+            return _replay(existing)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        # 409 (sin stock, cambios concurrentes) depende del momento: no se
+        # guarda, así un reintento posterior puede salir bien
+        if response.status_code >= 500 or response.status_code == status.HTTP_409_CONFLICT:
+            record.delete()
+            return response
+
+        # se renderiza acá (como lo haría DRF después) para guardar
+        # exactamente los bytes que recibe el cliente
+        response = self.finalize_response(request, response, *args, **kwargs)
+        response.render()
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            status_code=response.status_code,
+            body=response.content.decode("utf-8"),
+            content_type=response.get("Content-Type", ""),
+        )
+
+        if random.random() < _config().get("PURGE_PROBABILITY", 0.01):
+            _purge_expired()
+        return response
+
+    return wrapper
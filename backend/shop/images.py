@@ -0,0 +1,79 @@
+# shop/images.py
+import threading
+from collections import OrderedDict
+
+
+# =========================================================
+#           URLs DE IMÁGENES DE PRODUCTO (MEMOIZADAS)
+# =========================================================
+#
+# Armar la URL de un ImageField pasa por el storage (Cloudinary), que
+# no es gratis. Las URLs sólo dependen del nombre del archivo, así que
+# las guardamos por (pk, nombres de los 4 archivos): si cambia una
+# imagen cambia la clave y la entrada vieja queda huérfana (la saca el
+# LRU, o forget() desde la señal de Producto).
+
+IMAGE_FIELDS = ("imagen", "imagen_hover", "imagen_3", "imagen_4")
+
+_MAX_ENTRIES = 4096
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def image_key(producto):
+    return (producto.pk,) + tuple(
+        getattr(producto, field).name or "" for field in IMAGE_FIELDS
+    )
+
+
+def storage_urls(producto):
+    """
+    Tupla con la URL de storage de cada imagen (None si no hay archivo),
+    en el orden de IMAGE_FIELDS. Memoizada entre requests.
+    """
+    key = image_key(producto)
+    with _lock:
+        urls = _cache.get(key)
+        if urls is not None:
+            _cache.move_to_end(key)
+            return urls
+
+    urls = tuple(
+        getattr(producto, field).url if getattr(producto, field) else None
+        for field in IMAGE_FIELDS
+    )
+
+    with _lock:
+        _cache[key] = urls
+        while len(_cache) > _MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return urls
+
+
+def forget(pk):
+    with _lock:
+        for key in [k for k in _cache if k[0] == pk]:
+            del _cache[key]
+
+
+def image_bundle(producto, request=None):
+    """
+    Todas las URLs que expone ProductoSerializer, ya absolutas:
+      {"image_url", "image_hover_url", "image_3_url", "image_4_url", "images"}
+
+    Las relativas se completan con el request (como hacía _build_url).
+    """
+    absolute = []
+    for url in storage_urls(producto):
+        if url and request is not None and not url.startswith(("http://", "https://")):
+            url = request.build_absolute_uri(url)
+        absolute.append(url)
+
+    return {
+        "image_url": absolute[0],
+        "image_hover_url": absolute[1],
+        "image_3_url": absolute[2],
+        "image_4_url": absolute[3],
+        "images": [u for u in absolute if u],
+    }
@@ -0,0 +1,113 @@
+# shop/management/commands/bench_catalog.py
+import random
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shop.catalog import CatalogEngine
+from shop.facets import apply_filters, parse_filters
+from shop.models import Producto
+from shop.pagination import ProductCursorPagination
+
+from .bench_search import ADJETIVOS, DESCRIPCIONES, NOMBRES
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark del catálogo en memoria (shop.catalog): memoria por "
+        "worker y latencia de lookups contra el ORM. Crea productos "
+        "sintéticos dentro de una transacción que se descarta al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=5_000)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        n = options["products"]
+        repeat = options["repeat"]
+        rnd = random.Random(42)
+
+        with transaction.atomic():
+            self.stdout.write(f"Creando {n} productos sintéticos...")
+            Producto.objects.bulk_create([
+                Producto(
+                    nombre=f"{rnd.choice(NOMBRES)} {rnd.choice(ADJETIVOS)} {i}",
+                    slug=f"bench-catalog-{i}",
+                    precio=Decimal(rnd.randrange(9000, 70000)),
+                    descripcion=rnd.choice(DESCRIPCIONES),
+                    categoria=rnd.choice(Producto.CATEGORIES)[0],
+                    tag=rnd.choice(["", "", "new", "sale"]),
+                    stock=rnd.randrange(0, 30),
+                    imagen=f"products/bench-{i}.webp",
+                )
+                for i in range(n)
+            ], batch_size=2000)
+
+            engine = CatalogEngine()
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            engine.build_from_db()
+            build_s = time.perf_counter() - t0
+            current, _peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            total = len(engine)
+            record = next(iter(engine._records.values()))
+            instance = record.to_instance()
+            self.stdout.write(
+                f"Catálogo cargado: {total} productos en {build_s:.2f}s, "
+                f"{current / 1024 / 1024:.1f} MB ({current / max(total, 1):.0f} B/producto)"
+            )
+            self.stdout.write(
+                f"  record con __slots__: {sys.getsizeof(record)} B | "
+                f"instancia de Producto: {sys.getsizeof(instance) + sys.getsizeof(instance.__dict__)} B"
+                " (sin contar los valores)"
+            )
+
+            slugs = [f"bench-catalog-{rnd.randrange(n)}" for _ in range(repeat)]
+            pagination = ProductCursorPagination
+            cases = [
+                ("detalle por slug", lambda i: engine.get_by_slug(slugs[i]),
+                 lambda i: Producto.objects.filter(activo=True, slug=slugs[i]).first()),
+            ]
+            for label, params, ordering, position in [
+                ("página 1, new", {}, "new", None),
+                ("página 1, cat=tees", {"cat": "tees"}, "new", None),
+                ("cat + precio + stock", {"cat": "pants", "price_min": "20000", "in_stock": "1"}, "price", None),
+                ("cursor profundo, price", {}, "price", [Decimal(60000), 0]),
+            ]:
+                filters = parse_filters(params)
+                fields = pagination.orderings[ordering]
+                cases.append((
+                    label,
+                    lambda i, f=filters, o=fields, p=position: engine.page(f, o, p, 25),
+                    lambda i, f=filters, o=fields, p=position: self._orm_page(f, o, p, 25),
+                ))
+
+            self.stdout.write(f"{'lookup':<26}{'memoria ms':>12}{'ORM ms':>10}")
+            for label, in_memory, orm in cases:
+                t0 = time.perf_counter()
+                for i in range(repeat):
+                    in_memory(i)
+                mem_ms = (time.perf_counter() - t0) * 1000 / repeat
+
+                t0 = time.perf_counter()
+                for i in range(repeat):
+                    orm(i)
+                db_ms = (time.perf_counter() - t0) * 1000 / repeat
+                self.stdout.write(f"{label:<26}{mem_ms:>12.3f}{db_ms:>10.3f}")
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _orm_page(filters, ordering, position, limit):
+        queryset = apply_filters(Producto.objects.filter(activo=True), filters)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(ProductCursorPagination._after(ordering, position))
+        return list(queryset[:limit])
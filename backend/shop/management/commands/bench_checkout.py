@@ -0,0 +1,130 @@
+# shop/management/commands/bench_checkout.py
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from shop.customer import ShopRefreshToken
+from shop.models import Carrito, ItemCarrito, OrderItem, Pedido, Producto
+
+
+class Command(BaseCommand):
+    help = (
+        "Checkouts en paralelo contra un mismo producto (SKU caliente): "
+        "cada thread es un cliente que compra 1 unidad por pedido por "
+        "POST /api/checkout/create-order/ hasta quedarse sin stock. Informa "
+        "pedidos por segundo y verifica que no se venda de más. Usa datos "
+        "propios y los borra al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--ops", type=int, default=25, help="Checkouts por thread.")
+        parser.add_argument(
+            "--stock",
+            type=int,
+            default=None,
+            help="Stock inicial del SKU (por defecto la mitad de los checkouts: se agota).",
+        )
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        ops = options["ops"]
+        stock = options["stock"] if options["stock"] is not None else threads * ops // 2
+
+        stamp = time.time_ns()
+        hot = Producto.objects.create(
+            nombre="Bench checkout (hot)",
+            slug=f"bench-checkout-hot-{stamp}",
+            precio=Decimal("1000"),
+            categoria="tees",
+            stock=stock,
+        )
+        # un segundo producto con stock de sobra en cada pedido: el lock
+        # toma varias filas, siempre en el mismo orden
+        cold = Producto.objects.create(
+            nombre="Bench checkout (cold)",
+            slug=f"bench-checkout-cold-{stamp}",
+            precio=Decimal("500"),
+            categoria="tees",
+            stock=threads * ops,
+        )
+        users = [
+            User.objects.create_user(username=f"bench-checkout-{stamp}-{i}")
+            for i in range(threads)
+        ]
+
+        setup_test_environment()
+        try:
+            created, rejected, errors, elapsed = self._run(users, hot, cold, ops)
+
+            hot.refresh_from_db()
+            sold = (
+                OrderItem.objects.filter(producto=hot).aggregate(n=Sum("cantidad"))["n"] or 0
+            )
+            ok = not errors and sold == created and sold + hot.stock == stock and hot.stock >= 0
+            line = (
+                f"stock {stock} | checkouts {threads * ops} | pedidos {created} "
+                f"| sin stock (409) {rejected} | errores {errors} | vendidas {sold} "
+                f"| stock final {hot.stock} | {created / elapsed:,.1f} pedidos/s "
+                f"| {(created + rejected) / elapsed:,.1f} checkouts/s"
+            )
+            self.stdout.write(self.style.SUCCESS("OK    " + line) if ok else self.style.ERROR("FALLA " + line))
+        finally:
+            teardown_test_environment()
+            Pedido.objects.filter(cliente__user__in=users).delete()
+            User.objects.filter(pk__in=[u.pk for u in users]).delete()
+            Producto.objects.filter(pk__in=[hot.pk, cold.pk]).delete()
+
+        if not ok:
+            raise CommandError("Se vendió más stock del que había (o hubo errores).")
+
+    def _run(self, users, hot, cold, ops):
+        created = [0] * len(users)
+        rejected = [0] * len(users)
+        errors = [0] * len(users)
+        barrier = threading.Barrier(len(users))
+
+        def worker(i):
+            try:
+                client = APIClient()
+                client.credentials(
+                    HTTP_AUTHORIZATION=f"Bearer {ShopRefreshToken.for_user(users[i]).access_token}"
+                )
+                carrito = Carrito.objects.get(cliente__user=users[i])
+                barrier.wait()
+                for _ in range(ops):
+                    ItemCarrito.objects.bulk_create([
+                        ItemCarrito(carrito=carrito, producto=hot, talle="M", cantidad=1),
+                        ItemCarrito(carrito=carrito, producto=cold, talle="M", cantidad=1),
+                    ])
+                    try:
+                        response = client.post("/api/checkout/create-order/", format="json")
+                    except Exception as e:
+                        self.stderr.write(f"  thread {i}: {e!r}")
+                        response = None
+                    if response is not None and response.status_code == 201:
+                        created[i] += 1
+                    elif response is not None and response.status_code == 409:
+                        rejected[i] += 1
+                        ItemCarrito.objects.filter(carrito=carrito).delete()
+                    else:
+                        errors[i] += 1
+                        ItemCarrito.objects.filter(carrito=carrito).delete()
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(len(users))]
+        for t in pool:
+            t.start()
+        t0 = time.perf_counter()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        return sum(created), sum(rejected), sum(errors), elapsed
@@ -0,0 +1,127 @@
+# shop/management/commands/bench_create_order.py
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient
+
+from shop.customer import ShopRefreshToken
+from shop.models import Carrito, ItemCarrito, OrderItem, Pedido, Producto
+
+SHIPPING = {
+    "direccion": "Calle Falsa 123",
+    "ciudad": "CABA",
+    "provincia": "Buenos Aires",
+    "codigo_postal": "1000",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de POST /api/orders/create/ (CreateOrderView) con carritos "
+        "de 1, 20 y 200 líneas: ms y queries por pedido. Con --legacy corre "
+        "también el armado anterior (un INSERT por línea, producto cargado "
+        "de a uno, sin transacción) para comparar. Los datos se descartan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1,20,200")
+        parser.add_argument("--repeat", type=int, default=20, help="Pedidos por tamaño.")
+        parser.add_argument("--legacy", action="store_true")
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options["sizes"].split(",") if s.strip()]
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                productos = self._productos(max(sizes))
+                for size in sizes:
+                    self._report("actual", size, *self._bench(
+                        size, productos, options["repeat"], self._endpoint
+                    ))
+                    if options["legacy"]:
+                        self._report("antes ", size, *self._bench(
+                            size, productos, options["repeat"], self._legacy
+                        ))
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+    def _report(self, label, size, ms, queries):
+        self.stdout.write(f"{label} {size:>4} líneas: {ms:>8.2f} ms/pedido | {queries:>4} queries")
+
+    def _bench(self, size, productos, repeat, create):
+        user = User.objects.create_user(username=f"bench-order-{size}-{time.time_ns()}")
+        carrito = Carrito.objects.get(cliente__user=user)
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {ShopRefreshToken.for_user(user).access_token}"
+        )
+
+        elapsed, queries = 0.0, 0
+        for _ in range(repeat):
+            ItemCarrito.objects.bulk_create([
+                ItemCarrito(carrito=carrito, producto=p, talle="M", cantidad=1 + i % 3)
+                for i, p in enumerate(productos[:size])
+            ])
+            reset_queries()
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                create(client, user, carrito)
+                elapsed += time.perf_counter() - t0
+            queries = len(ctx.captured_queries)
+        return elapsed / repeat * 1000, queries
+
+    @staticmethod
+    def _endpoint(client, user, carrito):
+        response = client.post("/api/orders/create/", SHIPPING, format="json")
+        assert response.status_code == 201, response.content
+
+    @staticmethod
+    def _legacy(client, user, carrito):
+        # el CreateOrderView original, tal cual (sin la reserva de stock)
+        cliente = user.cliente
+        items = carrito.items.all()
+        if not items.exists():
+            return
+        pedido = Pedido.objects.create(
+            cliente=cliente, estado=Pedido.ESTADO_PENDIENTE, **SHIPPING
+        )
+        total = Decimal("0.00")
+        for item in items:
+            subtotal = item.producto.precio * item.cantidad
+            OrderItem.objects.create(
+                pedido=pedido,
+                producto=item.producto,
+                nombre_producto=item.producto.nombre,
+                talle=item.talle,
+                cantidad=item.cantidad,
+                precio_unitario=item.producto.precio,
+                subtotal=subtotal,
+            )
+            total += subtotal
+        pedido.total_productos = total
+        pedido.total_final = pedido.total_productos + pedido.costo_envio
+        pedido.save()
+        carrito.items.all().delete()
+
+    @staticmethod
+    def _productos(n):
+        Producto.objects.bulk_create([
+            Producto(
+                nombre=f"Bench order {i}",
+                slug=f"bench-order-{i}",
+                precio=Decimal("1000") + i,
+                categoria="tees",
+                stock=1_000_000,
+            )
+            for i in range(n)
+        ])
+        return list(Producto.objects.filter(slug__startswith="bench-order-").order_by("id"))
@@ -0,0 +1,112 @@
+# shop/management/commands/bench_money.py
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+
+from shop.models import Carrito, Cliente, ItemCarrito, OrderItem, Pedido, Producto
+from shop.money import as_money, from_cents, line_cents, sum_field, sum_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark de los totales (shop/money.py) sobre un carrito y un "
+        "pedido de N líneas: loop en Python con Decimal (como antes) contra "
+        "SUM en SQL y contra centavos enteros en memoria. Verifica que los "
+        "resultados sean idénticos. Los datos se descartan al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        lines = options["lines"]
+        repeat = options["repeat"]
+        with transaction.atomic():
+            carrito, pedido = self._data(lines)
+            ok = self._run(carrito, pedido, repeat)
+            transaction.set_rollback(True)
+        if not ok:
+            raise CommandError("Los totales no coinciden.")
+
+    def _data(self, n):
+        user = User.objects.create_user(username=f"bench-money-{time.time_ns()}")
+        carrito = Carrito.objects.get(cliente__user=user)
+        productos = Producto.objects.bulk_create([
+            Producto(
+                nombre=f"Bench money {i}",
+                slug=f"bench-money-{user.pk}-{i}",
+                # precios con centavos para que la suma no sea trivial
+                precio=Decimal("999.99") + Decimal(i * 37) / 100,
+                categoria="tees",
+            )
+            for i in range(n)
+        ])
+        items = ItemCarrito.objects.bulk_create([
+            ItemCarrito(carrito=carrito, producto=p, talle="M", cantidad=1 + i % 4)
+            for i, p in enumerate(productos)
+        ])
+        pedido = Pedido.objects.create(cliente=Cliente.objects.get(user=user))
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                pedido=pedido,
+                producto=item.producto,
+                nombre_producto=item.producto.nombre,
+                cantidad=item.cantidad,
+                precio_unitario=item.producto.precio,
+                subtotal=item.producto.precio * item.cantidad,
+            )
+            for item in items
+        ])
+        return carrito, pedido
+
+    def _run(self, carrito, pedido, repeat):
+        cases = {
+            "carrito: loop Decimal (antes)": lambda: sum(
+                (i.producto.precio * i.cantidad for i in carrito.items.all()), Decimal("0.00")
+            ),
+            "carrito: SUM en SQL": lambda: as_money(carrito.items.aggregate(t=sum_lines())["t"]),
+            "pedido: loop Decimal (antes)": lambda: sum(
+                (i.subtotal for i in pedido.items.all()), Decimal("0.00")
+            ),
+            "pedido: SUM en SQL": lambda: as_money(pedido.items.aggregate(t=sum_field("subtotal"))["t"]),
+        }
+        lines = list(carrito.items.select_related("producto"))
+        in_memory = {
+            "memoria: Decimal": lambda: sum(
+                (i.producto.precio * i.cantidad for i in lines), Decimal("0.00")
+            ),
+            "memoria: centavos": lambda: from_cents(
+                sum(line_cents(i.producto.precio, i.cantidad) for i in lines)
+            ),
+        }
+
+        ok = True
+        results = {}
+        for name, fn in {**cases, **in_memory}.items():
+            reset_queries()
+            with CaptureQueriesContext(connection) as ctx:
+                value = fn()
+            queries = len(ctx.captured_queries)
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                fn()
+            per_op = (time.perf_counter() - t0) / repeat * 1_000_000
+            results[name] = value
+            self.stdout.write(f"{name:<32} {per_op:>10,.1f} µs/op | {queries:>3} queries | {value}")
+
+        for a, b in (
+            ("carrito: loop Decimal (antes)", "carrito: SUM en SQL"),
+            ("pedido: loop Decimal (antes)", "pedido: SUM en SQL"),
+            ("memoria: Decimal", "memoria: centavos"),
+            ("carrito: loop Decimal (antes)", "memoria: centavos"),
+        ):
+            same = results[a] == results[b] and str(results[a]) == str(results[b])
+            ok &= same
+            mark = self.style.SUCCESS("OK   ") if same else self.style.ERROR("FALLA")
+            self.stdout.write(f"{mark} {a} == {b}")
+        return ok
@@ -0,0 +1,91 @@
+# shop/management/commands/bench_search.py
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shop.models import Producto
+from shop.search import SearchIndex
+
+
+NOMBRES = [
+    "Remera", "Pantalón", "Buzo", "Campera", "Gorra", "Gorro", "Chaqueta",
+    "Polo", "Jogger", "Cargo", "Hoodie", "Bomber", "Puffer", "Beanie",
+]
+ADJETIVOS = [
+    "Negra", "Blanca", "Gris", "Beige", "Oversize", "Básica", "Estampada",
+    "Rayada", "Denim", "Classic", "Wide", "Cortaviento", "Térmica", "Azul",
+]
+DESCRIPCIONES = [
+    "Algodón peinado 24/1, calce relajado.",
+    "Frisa invisible con capucha y bolsillo canguro.",
+    "Gabardina elastizada, bolsillos laterales.",
+    "Tela técnica rompeviento, ideal media estación.",
+    "",
+]
+QUERIES = [
+    "pantalon", "Pantalón cargo", "remera negra", "buzo", "campera puffer",
+    "gorra", "algodon", "sale", "new", "oversize", "pant", "chaqueta denim",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de búsqueda: índice invertido (shop.search) vs "
+        "nombre__icontains. Crea productos sintéticos dentro de una "
+        "transacción que se descarta al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        n = options["products"]
+        repeat = options["repeat"]
+        rnd = random.Random(42)
+
+        with transaction.atomic():
+            self.stdout.write(f"Creando {n} productos sintéticos...")
+            batch = []
+            for i in range(n):
+                nombre = f"{rnd.choice(NOMBRES)} {rnd.choice(ADJETIVOS)} {i}"
+                batch.append(Producto(
+                    nombre=nombre,
+                    slug=f"bench-search-{i}",
+                    precio=Decimal(rnd.randrange(9000, 70000)),
+                    descripcion=rnd.choice(DESCRIPCIONES),
+                    categoria=rnd.choice(Producto.CATEGORIES)[0],
+                    tag=rnd.choice(["", "", "new", "sale"]),
+                    stock=rnd.randrange(0, 30),
+                ))
+            Producto.objects.bulk_create(batch, batch_size=2000)
+
+            index = SearchIndex()
+            t0 = time.perf_counter()
+            index.build_from_db()
+            build_s = time.perf_counter() - t0
+            self.stdout.write(f"Índice armado en {build_s:.2f}s")
+
+            self.stdout.write(
+                f"{'consulta':<20}{'hits':>8}{'índice ms':>12}{'icontains ms':>15}"
+            )
+            for q in QUERIES:
+                t0 = time.perf_counter()
+                for _ in range(repeat):
+                    ids = index.search(q)
+                index_ms = (time.perf_counter() - t0) * 1000 / repeat
+
+                qs = Producto.objects.filter(activo=True, nombre__icontains=q)
+                t0 = time.perf_counter()
+                for _ in range(repeat):
+                    list(qs.order_by("-id").values_list("id", flat=True)[:1000])
+                db_ms = (time.perf_counter() - t0) * 1000 / repeat
+
+                self.stdout.write(
+                    f"{q:<20}{len(ids):>8}{index_ms:>12.3f}{db_ms:>15.3f}"
+                )
+
+            transaction.set_rollback(True)
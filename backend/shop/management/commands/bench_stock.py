@@ -0,0 +1,127 @@
+# shop/management/commands/bench_stock.py
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from shop.models import Cliente, Pedido, Producto, ReservaStock
+from shop.stock import OutOfStock, hold_stock, release_order
+
+
+class Command(BaseCommand):
+    help = (
+        "Contención de reservas de stock: varios threads reservan 1 unidad "
+        "del mismo producto a la vez hasta agotarlo. Informa reservas por "
+        "segundo y verifica que no se venda más de lo que hay. Usa datos "
+        "propios y los borra al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--ops", type=int, default=50, help="Intentos por thread.")
+        parser.add_argument(
+            "--stock",
+            type=int,
+            default=None,
+            help="Stock inicial (por defecto la mitad de los intentos: se agota).",
+        )
+        parser.add_argument(
+            "--naive",
+            action="store_true",
+            help="Leer el stock, comparar y guardar (sin UPDATE condicional) para comparar.",
+        )
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        ops = options["ops"]
+        stock = options["stock"] if options["stock"] is not None else threads * ops // 2
+
+        user = User.objects.create_user(username=f"bench-stock-{time.time_ns()}")
+        cliente = Cliente.objects.get(user=user)
+        producto = Producto.objects.create(
+            nombre="Bench stock",
+            slug=f"bench-stock-{user.pk}",
+            precio=Decimal("1000"),
+            categoria="tees",
+            stock=stock,
+        )
+        pedidos = [Pedido.objects.create(cliente=cliente) for _ in range(threads)]
+        try:
+            held, rejected, elapsed = self._run(pedidos, producto, ops, options["naive"])
+
+            producto.refresh_from_db()
+            reserved = sum(
+                r.cantidad for r in ReservaStock.objects.filter(producto=producto)
+            )
+            attempts = threads * ops
+            ok = held <= stock and held + producto.stock == stock and reserved == held
+            line = (
+                f"stock {stock} | intentos {attempts} | reservas {held} | rechazos {rejected} "
+                f"| stock final {producto.stock} | {attempts / elapsed:,.0f} intentos/s "
+                f"| {held / elapsed:,.0f} reservas/s"
+            )
+            self.stdout.write(self.style.SUCCESS("OK    " + line) if ok else self.style.ERROR("FALLA " + line))
+
+            # liberar todo: el stock tiene que volver exactamente al inicial
+            for pedido in pedidos:
+                release_order(pedido)
+            producto.refresh_from_db()
+            self.stdout.write(f"      después de liberar todo: stock {producto.stock} (inicial {stock})")
+            ok &= producto.stock == stock
+        finally:
+            Pedido.objects.filter(pk__in=[p.pk for p in pedidos]).delete()
+            producto.delete()
+            user.delete()
+
+        if not ok:
+            raise CommandError("Se reservó más stock del que había.")
+
+    def _run(self, pedidos, producto, ops, naive):
+        held = [0] * len(pedidos)
+        rejected = [0] * len(pedidos)
+        errors = []
+
+        def worker(i):
+            try:
+                for _ in range(ops):
+                    if self._hold(pedidos[i], producto, naive):
+                        held[i] += 1
+                    else:
+                        rejected[i] += 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(len(pedidos))]
+        t0 = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        if errors:
+            self.stdout.write(self.style.WARNING(f"  {len(errors)} threads fallaron: {errors[0]!r}"))
+        return sum(held), sum(rejected), elapsed
+
+    @staticmethod
+    def _hold(pedido, producto, naive):
+        if not naive:
+            try:
+                hold_stock(pedido, [(producto, 1)])
+            except OutOfStock:
+                return False
+            return True
+
+        actual = Producto.objects.get(pk=producto.pk)
+        if actual.stock < 1:
+            return False
+        actual.stock -= 1
+        actual.save(update_fields=["stock"])
+        ReservaStock.objects.create(
+            pedido=pedido, producto=producto, cantidad=1, vence=pedido.creado
+        )
+        return True
@@ -0,0 +1,60 @@
+# shop/management/commands/build_catalog_snapshot.py
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.snapshots import is_stale, read_manifest, rebuild_if_stale, snapshot_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera los snapshots estáticos del catálogo (listados paginados y "
+        "detalle en JSON, con .gz/.br) en STATIC_ROOT para que los sirva "
+        "WhiteNoise. Toma el mismo lock que el rearmado automático (flock "
+        "en el directorio): nunca hay dos procesos escribiéndolo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir",
+            default=None,
+            help="Directorio de salida (por defecto STATIC_ROOT/catalog).",
+        )
+        parser.add_argument(
+            "--if-stale",
+            action="store_true",
+            help="Sólo rearmar si el manifest quedó atrás del catálogo (para cron).",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["dir"] or snapshot_dir()
+
+        if options["if_stale"] and not is_stale(read_manifest(directory)):
+            self.stdout.write("Los snapshots ya están al día.")
+            return
+
+        t0 = time.perf_counter()
+        if not rebuild_if_stale(directory, force=not options["if_stale"]):
+            self.stdout.write(self.style.WARNING(
+                "Otro proceso está rearmando los snapshots; se lleva los cambios él."
+            ))
+            return
+        elapsed = time.perf_counter() - t0
+        manifest = read_manifest(directory)
+
+        sizes = {"json": 0, "gz": 0, "br": 0}
+        for name in os.listdir(directory):
+            ext = name.rsplit(".", 1)[-1]
+            if ext in sizes:
+                sizes[ext] += os.path.getsize(os.path.join(directory, name))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshots en {directory}: {len(manifest['detail'])} productos, "
+            f"{len(manifest['products'])} páginas, {len(manifest['categories'])} "
+            f"categorías, generación {manifest['generation']} ({elapsed * 1000:.0f} ms)"
+        ))
+        self.stdout.write(
+            f"  json {sizes['json'] // 1024} KB | gzip {sizes['gz'] // 1024} KB"
+            f" | brotli {sizes['br'] // 1024} KB"
+        )
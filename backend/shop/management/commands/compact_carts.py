@@ -0,0 +1,181 @@
+# shop/management/commands/compact_carts.py
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from shop.models import Carrito, ItemCarrito
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los items de carrito que nadie tocó en N días "
+        "(ItemCarrito.actualizado) y los carritos que quedan vacíos. "
+        "Trabaja en tandas chicas, cada una en su propia transacción, así "
+        "no hay locks largos; si se corta, se vuelve a correr y sigue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Días sin cambios.")
+        parser.add_argument("--chunk", type=int, default=1000, help="Items por tanda.")
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Pausa entre tandas, en segundos (para bajarle la carga a la base).",
+        )
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=0,
+            help="Empezar después de este id de item (el último que informó una corrida cortada).",
+        )
+        parser.add_argument(
+            "--keep-carts",
+            action="store_true",
+            help="Sólo borrar items, sin borrar los carritos que quedan vacíos.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Contar lo que se borraría, sin borrar nada.",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 1 or options["chunk"] < 1:
+            raise CommandError("--days y --chunk tienen que ser mayores a 0.")
+
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        chunk = options["chunk"]
+        last_id = options["after_id"]
+        stale = ItemCarrito.objects.filter(actualizado__lt=cutoff).order_by("id")
+
+        if options["dry_run"]:
+            items = stale.filter(id__gt=last_id).count()
+            # carritos viejos sin ningún item reciente: quedan vacíos
+            carts = _empty_carts(cutoff, fresh_only=True).count()
+            self.stdout.write(
+                f"Se borrarían {items} items"
+                + ("" if options["keep_carts"] else f" y {carts} carritos")
+                + f" sin cambios desde {cutoff:%Y-%m-%d %H:%M}."
+            )
+            return
+
+        total_carts = total_items = chunks = 0
+        t0 = time.perf_counter()
+        while True:
+            # keyset sobre el id: cada tanda arranca donde terminó la
+            # anterior, sin OFFSET y sin volver a mirar lo ya recorrido
+            ids = list(stale.filter(id__gt=last_id).values_list("id", flat=True)[:chunk])
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            items, carts = self._compact(ids, cutoff, options["keep_carts"])
+            total_items += items
+            total_carts += carts
+            chunks += 1
+
+            elapsed = time.perf_counter() - t0
+            self.stdout.write(
+                f"tanda {chunks}: hasta item {last_id} | {items} items, {carts} carritos "
+                f"| {(total_carts + total_items) / elapsed:,.0f} filas/s"
+            )
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        if not options["keep_carts"]:
+            # carritos viejos que ya estaban vacíos antes de esta corrida
+            total_carts += self._drop_empty_carts(cutoff, chunk)
+
+        elapsed = time.perf_counter() - t0
+        rate = (total_carts + total_items) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Listo: {total_items} items y {total_carts} carritos borrados "
+            f"en {chunks} tandas ({elapsed:.1f} s, {rate:,.0f} filas/s)."
+        ))
+
+    @staticmethod
+    def _compact(ids, cutoff, keep_carts):
+        """
+        Una tanda, en una transacción corta. Se vuelve a pedir que el
+        item siga viejo (y se bloquea) por si alguien lo tocó entre la
+        lectura de ids y el borrado; los que están bloqueados por otro
+        request se saltean y quedan para la próxima corrida.
+
+        Los carritos que perdieron items cambian de versión (el front
+        descarta lo que tenía); los que quedan vacíos y también son
+        viejos se borran.
+        """
+        with transaction.atomic():
+            items = ItemCarrito.objects.filter(pk__in=ids, actualizado__lt=cutoff)
+            if connection.features.has_select_for_update_skip_locked:
+                items = items.select_for_update(skip_locked=True)
+            locked = list(items.values_list("id", "carrito_id"))
+            if not locked:
+                return 0, 0
+
+            carrito_ids = sorted({carrito_id for _pk, carrito_id in locked})
+            ItemCarrito.objects.filter(pk__in=[pk for pk, _ in locked]).delete()
+            Carrito.objects.filter(pk__in=carrito_ids).update(version=F("version") + 1)
+            if keep_carts:
+                return len(locked), 0
+            # se vuelven a crear solos la próxima vez que se usan
+            # (request.customer, get_or_create_carrito)
+            return len(locked), _delete_empty_carts(cutoff, carrito_ids)
+
+    @staticmethod
+    def _drop_empty_carts(cutoff, chunk):
+        total, last_id = 0, 0
+        while True:
+            ids = list(
+                _empty_carts(cutoff)
+                .filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk]
+            )
+            if not ids:
+                return total
+            last_id = ids[-1]
+            with transaction.atomic():
+                total += _delete_empty_carts(cutoff, ids)
+
+
+def _empty_carts(cutoff, fresh_only=False):
+    """
+    Carritos sin cambios desde `cutoff` y sin items. Con fresh_only,
+    los que quedarían vacíos: sin items tocados desde `cutoff`.
+    """
+    items = ItemCarrito.objects.filter(carrito=OuterRef("pk"))
+    if fresh_only:
+        items = items.filter(actualizado__gte=cutoff)
+    return Carrito.objects.filter(actualizado__lt=cutoff).exclude(Exists(items))
+
+
+def _lock_carts(cutoff, ids):
+    carts = Carrito.objects.filter(pk__in=ids, actualizado__lt=cutoff).order_by("id")
+    if connection.features.has_select_for_update_skip_locked:
+        carts = carts.select_for_update(skip_locked=True)
+    else:
+        carts = carts.select_for_update()
+    return list(carts.values_list("id", flat=True))
+
+
+def _delete_empty_carts(cutoff, ids):
+    """
+    Borra, de `ids`, los carritos que siguen viejos y vacíos (dentro de
+    una transacción). Primero los bloquea: uno con un add_item en curso
+    (el INSERT del item ya tiene su lock sobre el carrito) se saltea, o
+    sin SKIP LOCKED se espera a que termine; el DELETE es otra sentencia
+    y vuelve a mirar `actualizado` y los items con lo ya confirmado. Antes
+    el DELETE podía borrar el carrito debajo de ese INSERT, que fallaba
+    con la FK.
+    """
+    locked = _lock_carts(cutoff, ids)
+    if not locked:
+        return 0
+    _total, rows = _empty_carts(cutoff).filter(pk__in=locked).delete()
+    return rows.get("shop.Carrito", 0)
@@ -0,0 +1,35 @@
+# shop/management/commands/rebuild_sales_rollups.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.sales import rebuild_sales
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula las ventas diarias del dashboard (VentaDiaria) desde los "
+        "pedidos pagados / enviados: todas, o las de un rango de días. Se "
+        "corre una vez al instalar y cada vez que se sospeche que quedaron "
+        "desfasadas (los pagos las van actualizando solos)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Desde este día (YYYY-MM-DD), inclusive.")
+        parser.add_argument("--until", help="Hasta este día (YYYY-MM-DD), inclusive.")
+
+    def handle(self, *args, **options):
+        desde = self._date(options["since"])
+        hasta = self._date(options["until"])
+        filas = rebuild_sales(desde=desde, hasta=hasta)
+        rango = f"{desde or 'inicio'} a {hasta or 'hoy'}"
+        self.stdout.write(self.style.SUCCESS(f"{filas} filas de ventas diarias recalculadas ({rango})."))
+
+    @staticmethod
+    def _date(value):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Fecha inválida: {value!r} (formato YYYY-MM-DD).")
@@ -0,0 +1,24 @@
+# shop/management/commands/release_expired_holds.py
+from django.core.management.base import BaseCommand
+
+from shop.stock import release_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Devuelve al stock las reservas vencidas (pedidos que no se pagaron "
+        "a tiempo). Pensado para correr seguido desde un cron; de todos modos "
+        "una compra que se queda sin stock libera las vencidas de ese producto."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=500, help="Reservas por transacción.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            released = release_expired(limit=options["chunk"])
+            total += released
+            if released < options["chunk"]:
+                break
+        self.stdout.write(self.style.SUCCESS(f"{total} reservas vencidas liberadas."))
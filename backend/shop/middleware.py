@@ -0,0 +1,67 @@
+# shop/middleware.py
+import os
+
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import snapshots
+from .customer import Customer
+
+
+class CatalogWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise + snapshots del catálogo (shop/snapshots.py).
+
+    WhiteNoise indexa STATIC_ROOT una sola vez al arrancar, pero los
+    snapshots se rearman con el server andando (y quizás desde otro
+    worker). Acá:
+      - un snapshot que no estaba en el índice se busca en disco y se
+        agrega (sólo nombres con hash, que nunca cambian de contenido);
+      - los snapshots con hash se sirven como "immutable";
+      - el manifest no se sirve como estático: va por /api/catalog/manifest/
+        (tampoco el `.lock` del rearmado);
+      - un snapshot ya borrado (quedó viejo) da 404 en vez de un 500.
+    """
+
+    def __call__(self, request):
+        path = request.path_info
+        prefix = snapshots.snapshot_url_prefix()
+        if path.startswith(prefix):
+            name = path[len(prefix):]
+            if name in (snapshots.MANIFEST_NAME, snapshots.LOCK_NAME):
+                return self.get_response(request)
+            if not self.autorefresh and path not in self.files:
+                self._add_snapshot(path, name)
+            try:
+                return super().__call__(request)
+            except FileNotFoundError:
+                # snapshot viejo que ya se borró al rearmar
+                self.files.pop(path, None)
+                return self.get_response(request)
+        return super().__call__(request)
+
+    def _add_snapshot(self, url, name):
+        if not snapshots.HASHED_NAME_RE.search(name) or not self.url_is_canonical(url):
+            return
+        path = os.path.join(snapshots.snapshot_dir(), name)
+        if os.path.isfile(path):
+            self.files[url] = self.get_static_file(path, url)
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(snapshots.snapshot_url_prefix()):
+            return bool(snapshots.HASHED_NAME_RE.search(url))
+        return super().immutable_file_test(path, url)
+
+
+class CustomerMiddleware:
+    """
+    Deja `request.customer` (shop.customer.Customer) en cada request.
+    No hace ninguna query acá: todo se resuelve al usarlo, cuando DRF ya
+    autenticó (request.user / request.auth con el JWT).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.customer = Customer(request)
+        return self.get_response(request)
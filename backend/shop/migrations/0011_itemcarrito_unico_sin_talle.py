@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:15
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def unir_items_duplicados(apps, schema_editor):
+    """
+    Antes de crear la restricción: si un carrito tiene el mismo producto
+    sin talle en varias filas, se suman en la primera y se borran las demás.
+    """
+    ItemCarrito = apps.get_model("shop", "ItemCarrito")
+    duplicados = (
+        ItemCarrito.objects
+        .filter(talle__isnull=True)
+        .values("carrito_id", "producto_id")
+        .annotate(filas=Count("id"), primero=Min("id"), total=Sum("cantidad"))
+        .filter(filas__gt=1)
+    )
+    for dup in duplicados:
+        ItemCarrito.objects.filter(pk=dup["primero"]).update(cantidad=dup["total"])
+        ItemCarrito.objects.filter(
+            carrito_id=dup["carrito_id"],
+            producto_id=dup["producto_id"],
+            talle__isnull=True,
+        ).exclude(pk=dup["primero"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0010_cliente_ciudad_cliente_codigo_postal_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(unir_items_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='itemcarrito',
+            constraint=models.UniqueConstraint(condition=models.Q(('talle__isnull', True)), fields=('carrito', 'producto'), name='itemcarrito_unico_sin_talle'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0011_itemcarrito_unico_sin_talle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carrito',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
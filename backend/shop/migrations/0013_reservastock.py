@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0012_carrito_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservaStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveIntegerField()),
+                ('estado', models.CharField(choices=[('held', 'Reservada'), ('committed', 'Confirmada'), ('released', 'Liberada')], default='held', max_length=10)),
+                ('vence', models.DateTimeField()),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas', to='shop.pedido')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reservas', to='shop.producto')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('estado', 'held')), fields=['vence'], name='reserva_held_vence'), models.Index(fields=['pedido', 'estado'], name='reserva_pedido_estado')],
+            },
+        ),
+    ]
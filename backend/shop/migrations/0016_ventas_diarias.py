@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:43
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0015_indices_pedido_producto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaPedido',
+            fields=[
+                ('pedido', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='venta', serialize=False, to='shop.pedido')),
+                ('fecha', models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('categoria', models.CharField(blank=True, max_length=50)),
+                ('pedidos', models.PositiveIntegerField(default=0)),
+                ('unidades', models.PositiveIntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('producto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ventas_diarias', to='shop.producto')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('producto__isnull', True)), fields=('fecha', 'categoria'), name='venta_diaria_unica_categoria'), models.UniqueConstraint(condition=models.Q(('producto__isnull', False)), fields=('fecha', 'producto'), name='venta_diaria_unica_producto')],
+            },
+        ),
+    ]
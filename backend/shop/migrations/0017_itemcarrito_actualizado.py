@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0016_ventas_diarias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemcarrito',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
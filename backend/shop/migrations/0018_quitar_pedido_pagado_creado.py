@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0017_itemcarrito_actualizado'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pedido',
+            name='pedido_pagado_creado',
+        ),
+    ]
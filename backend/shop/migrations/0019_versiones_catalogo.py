@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0018_quitar_pedido_pagado_creado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioStock',
+            fields=[
+                ('version', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('anterior', models.BigIntegerField()),
+                ('productos', models.JSONField()),
+                ('creado', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VersionCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generacion', models.BigIntegerField()),
+                ('stock', models.BigIntegerField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:30
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+# MySQL no tiene índices parciales: Django saltea los `condition=` (W036 /
+# W037) y ahí ni las restricciones de 0011 / 0016 ni los índices de
+# catálogo / reservas existían. Las restricciones pasan a índices de
+# expresión (sirven en los tres motores) y para MySQL se crean índices
+# comunes equivalentes a los parciales.
+MYSQL_INDICES = [
+    ("shop_producto", "producto_activos_cat_id_my", ["activo", "categoria", "id"]),
+    ("shop_producto", "producto_activos_id_my", ["activo", "id"]),
+    ("shop_reservastock", "reserva_held_vence_my", ["estado", "vence"]),
+]
+
+
+def unir_items_duplicados(apps, schema_editor):
+    """
+    Donde la restricción parcial no se creó (MySQL) puede haber el mismo
+    producto sin talle en varias filas: se suman en la primera.
+    """
+    ItemCarrito = apps.get_model("shop", "ItemCarrito")
+    duplicados = (
+        ItemCarrito.objects
+        .filter(talle__isnull=True)
+        .values("carrito_id", "producto_id")
+        .annotate(filas=Count("id"), primero=Min("id"), total=Sum("cantidad"))
+        .filter(filas__gt=1)
+    )
+    for dup in duplicados:
+        ItemCarrito.objects.filter(pk=dup["primero"]).update(cantidad=dup["total"])
+        ItemCarrito.objects.filter(
+            carrito_id=dup["carrito_id"],
+            producto_id=dup["producto_id"],
+            talle__isnull=True,
+        ).exclude(pk=dup["primero"]).delete()
+
+
+def unir_ventas_duplicadas(apps, schema_editor):
+    """
+    Lo mismo con VentaDiaria: las filas son sumas, así que las repetidas
+    del mismo día / categoría / producto se suman en la primera.
+    """
+    VentaDiaria = apps.get_model("shop", "VentaDiaria")
+    duplicados = (
+        VentaDiaria.objects
+        .values("fecha", "categoria", "producto_id")
+        .annotate(
+            filas=Count("id"),
+            primero=Min("id"),
+            total_pedidos=Sum("pedidos"),
+            total_unidades=Sum("unidades"),
+            total_ingresos=Sum("ingresos"),
+        )
+        .filter(filas__gt=1)
+    )
+    for dup in duplicados:
+        VentaDiaria.objects.filter(pk=dup["primero"]).update(
+            pedidos=dup["total_pedidos"],
+            unidades=dup["total_unidades"],
+            ingresos=dup["total_ingresos"],
+        )
+        VentaDiaria.objects.filter(
+            fecha=dup["fecha"],
+            categoria=dup["categoria"],
+            producto_id=dup["producto_id"],
+        ).exclude(pk=dup["primero"]).delete()
+
+
+def crear_indices_mysql(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    quote = schema_editor.quote_name
+    for tabla, nombre, columnas in MYSQL_INDICES:
+        schema_editor.execute(
+            f"CREATE INDEX {quote(nombre)} ON {quote(tabla)} ({', '.join(quote(c) for c in columnas)})"
+        )
+
+
+def borrar_indices_mysql(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    quote = schema_editor.quote_name
+    for tabla, nombre, _columnas in MYSQL_INDICES:
+        schema_editor.execute(f"DROP INDEX {quote(nombre)} ON {quote(tabla)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0019_versiones_catalogo'),
+    ]
+
+    operations = [
+        migrations.RunPython(unir_items_duplicados, migrations.RunPython.noop),
+        migrations.RunPython(unir_ventas_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='itemcarrito',
+            constraint=models.UniqueConstraint(models.F('carrito'), models.F('producto'), django.db.models.functions.comparison.Coalesce('talle', models.Value('')), name='itemcarrito_unico_talle'),
+        ),
+        migrations.AddConstraint(
+            model_name='ventadiaria',
+            constraint=models.UniqueConstraint(models.F('fecha'), models.F('categoria'), django.db.models.functions.comparison.Coalesce('producto', models.Value(0)), name='venta_diaria_unica'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='itemcarrito',
+            name='itemcarrito_unico_sin_talle',
+        ),
+        migrations.RemoveConstraint(
+            model_name='ventadiaria',
+            name='venta_diaria_unica_categoria',
+        ),
+        migrations.RemoveConstraint(
+            model_name='ventadiaria',
+            name='venta_diaria_unica_producto',
+        ),
+        migrations.RunPython(crear_indices_mysql, borrar_indices_mysql),
+    ]
@@ -1,8 +1,12 @@
 from decimal import Decimal
 
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 
+from .money import as_money, sum_field, sum_lines
+
 
 # ---------------------------
 # CLIENTE (perfil + dirección por defecto)
@@ -71,6 +75,26 @@ class Producto(models.Model):
 
     activo = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # catálogo (sólo activos), más nuevos primero (sort=new), con
+            # y sin categoría. Parciales y no (activo, ...): Django filtra
+            # activo=True como `WHERE activo` y SQLite no usa eso contra
+            # una columna de un índice, pero sí para elegir uno parcial.
+            # MySQL no tiene parciales: ahí la migración 0020 crea los
+            # (activo, ...) equivalentes.
+            models.Index(
+                fields=["categoria", "-id"],
+                condition=models.Q(activo=True),
+                name="producto_activos_cat_id",
+            ),
+            models.Index(
+                fields=["-id"],
+                condition=models.Q(activo=True),
+                name="producto_activos_id",
+            ),
+        ]
+
     def __str__(self):
         return self.nombre
 
@@ -89,6 +113,9 @@ class Carrito(models.Model):
     )
     creado = models.DateTimeField(auto_now_add=True)
     actualizado = models.DateTimeField(auto_now=True)
+    # sube en cada cambio de items (shop.cart.touch_cart); el front lo usa
+    # para saber si puede aplicar una respuesta parcial (?response=delta)
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         try:
@@ -96,16 +123,21 @@ class Carrito(models.Model):
         except Exception:
             return "Carrito sin cliente"
 
+    # Si el carrito viene de shop.cart.load_cart() los totales ya están
+    # anotados (SUM en la misma query); si no, se agregan en la base.
     @property
     def total_items(self):
-        return sum(item.cantidad for item in self.items.all())
+        if hasattr(self, "items_cantidad"):
+            return self.items_cantidad
+        return self.items.aggregate(
+            total=models.Sum("cantidad", default=0)
+        )["total"]
 
     @property
     def total_precio(self):
-        return sum(
-            item.cantidad * item.producto.precio
-            for item in self.items.all()
-        )
+        if hasattr(self, "items_total"):
+            return as_money(self.items_total)
+        return as_money(self.items.aggregate(total=sum_lines())["total"])
 
 
 # ---------------------------
@@ -133,9 +165,24 @@ class ItemCarrito(models.Model):
         help_text="Solo para Remeras / Buzos / Pantalones. Vacío en accesorios.",
     )
     cantidad = models.PositiveIntegerField(default=1)
+    # último cambio de la línea (shop/cart.py lo mueve también en los
+    # update()); compact_carts borra las líneas que nadie tocó en N días
+    actualizado = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("carrito", "producto", "talle")
+        constraints = [
+            # en SQL dos NULL no son "iguales": sin esto el unique_together
+            # no impide duplicar un accesorio (talle NULL) en el carrito.
+            # Índice de expresión (talle NULL -> "") y no uno parcial:
+            # MySQL no tiene índices parciales y Django los saltea ahí.
+            models.UniqueConstraint(
+                "carrito",
+                "producto",
+                Coalesce("talle", Value("")),
+                name="itemcarrito_unico_talle",
+            ),
+        ]
 
     def __str__(self):
         if self.talle:
@@ -236,6 +283,15 @@ class Pedido(models.Model):
 
     class Meta:
         ordering = ["-creado"]
+        indexes = [
+            # historial del cliente (shop/pagination.py: -creado, -id)
+            models.Index(
+                fields=["cliente", "estado", "-creado", "-id"],
+                name="pedido_cliente_estado_creado",
+            ),
+            # pedidos por estado (pendientes, pagados para el admin)
+            models.Index(fields=["estado", "-creado", "-id"], name="pedido_estado_creado"),
+        ]
 
     def __str__(self):
         return f"Pedido #{self.id} - {self.cliente}"
@@ -245,10 +301,10 @@ class Pedido(models.Model):
         return self.estado == self.ESTADO_PAGADO
 
     def recalcular_totales_desde_items(self):
-        total_prod = Decimal("0.00")
-        for item in self.items.all():
-            total_prod += item.subtotal
-        self.total_productos = total_prod
+        # SUM(subtotal) en la base, sin traer los items (shop/money.py)
+        self.total_productos = as_money(
+            self.items.aggregate(total=sum_field("subtotal"))["total"]
+        )
         self.total_final = self.total_productos + self.costo_envio
         self.save(update_fields=["total_productos", "total_final"])
 
@@ -277,6 +333,61 @@ class OrderItem(models.Model):
         return f"{self.nombre_producto} x{self.cantidad}"
 
 
+# ---------------------------
+# RESERVAS DE STOCK
+# ---------------------------
+class ReservaStock(models.Model):
+    """
+    Unidades de un producto apartadas para un pedido (shop/stock.py).
+    Producto.stock ya las tiene descontadas: "held" vence a los
+    SHOP_STOCK["HOLD_TTL"] segundos si el pedido no se paga, "committed"
+    queda para siempre (pedido pagado) y "released" ya devolvió el stock.
+    """
+    ESTADO_RESERVADA = "held"
+    ESTADO_CONFIRMADA = "committed"
+    ESTADO_LIBERADA = "released"
+
+    ESTADO_CHOICES = [
+        (ESTADO_RESERVADA, "Reservada"),
+        (ESTADO_CONFIRMADA, "Confirmada"),
+        (ESTADO_LIBERADA, "Liberada"),
+    ]
+
+    pedido = models.ForeignKey(
+        Pedido,
+        on_delete=models.CASCADE,
+        related_name="reservas",
+    )
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.PROTECT,
+        related_name="reservas",
+    )
+    cantidad = models.PositiveIntegerField()
+    estado = models.CharField(
+        max_length=10,
+        choices=ESTADO_CHOICES,
+        default=ESTADO_RESERVADA,
+    )
+    vence = models.DateTimeField()
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # barrido de vencidas: sólo las que siguen reservadas (en
+            # MySQL, (estado, vence) de la migración 0020)
+            models.Index(
+                fields=["vence"],
+                condition=models.Q(estado="held"),
+                name="reserva_held_vence",
+            ),
+            models.Index(fields=["pedido", "estado"], name="reserva_pedido_estado"),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id} x{self.cantidad} ({self.estado}) - Pedido #{self.pedido_id}"
+
+
 # ---------------------------
 # PAGO
 # ---------------------------
@@ -326,4 +437,132 @@ class Payment(models.Model):
         ordering = ["-creado"]
 
     def __str__(self):
-        return f"Pago {self.proveedor} - Pedido #{self.pedido_id}"
\ No newline at end of file
+        return f"Pago {self.proveedor} - Pedido #{self.pedido_id}"
+
+
+# ---------------------------
+# VENTAS DIARIAS (DASHBOARD)
+# ---------------------------
+class VentaDiaria(models.Model):
+    """
+    Ventas de un día ya sumadas para el dashboard (shop/sales.py). El día
+    es el de creación del pedido (hora local) y sólo cuentan los pedidos
+    pagados o enviados; ingresos = suma de subtotales (sin envío).
+
+    Tres niveles en la misma tabla:
+      - categoria "" y producto NULL: total del día
+      - categoria y producto NULL:    una categoría
+      - producto (con su categoría):  un producto
+    """
+    fecha = models.DateField()
+    categoria = models.CharField(max_length=50, blank=True)
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.PROTECT,
+        related_name="ventas_diarias",
+        null=True,
+        blank=True,
+    )
+    pedidos = models.PositiveIntegerField(default=0)
+    unidades = models.PositiveIntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            # como en ItemCarrito: dos NULL no chocan en un unique común,
+            # y sin índices parciales (MySQL) el producto NULL va como 0
+            models.UniqueConstraint(
+                "fecha",
+                "categoria",
+                Coalesce("producto", Value(0)),
+                name="venta_diaria_unica",
+            ),
+        ]
+
+    def __str__(self):
+        nivel = self.producto_id or self.categoria or "total"
+        return f"{self.fecha} {nivel}: {self.pedidos} pedidos, ${self.ingresos}"
+
+
+class VentaPedido(models.Model):
+    """
+    Pedido ya sumado en VentaDiaria, y en qué día. Es la marca que hace
+    idempotente el alta (webhook y feedback de MP pueden llegar los dos)
+    y permite restarlo si después se cancela.
+    """
+    pedido = models.OneToOneField(
+        Pedido,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="venta",
+    )
+    fecha = models.DateField()
+
+    def __str__(self):
+        return f"Pedido #{self.pedido_id} ({self.fecha})"
+
+
+# ---------------------------
+# IDEMPOTENCY KEYS
+# ---------------------------
+class IdempotencyKey(models.Model):
+    """
+    Respuesta guardada de un POST con header Idempotency-Key
+    (shop/idempotency.py). Mientras el request original se procesa,
+    status_code es NULL. Con key "guest-cart:<hash>" marca un carrito de
+    invitado ya fundido en el del usuario (shop/guest_cart.py).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    # método + ruta con query string + body: la misma key con otro
+    # request es un error
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    body = models.TextField(blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    expira = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="idempotency_unica_por_usuario"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.status_code or 'en curso'})"
+
+
+
+# ---------------------------
+# VERSIONES DEL CATÁLOGO
+# ---------------------------
+class VersionCatalogo(models.Model):
+    """
+    Generación del catálogo y versión del stock (shop/cache.py) cuando el
+    cache no se comparte entre procesos (LocMemCache, sin REDIS_URL):
+    una sola fila (pk=1) que leen todos los workers.
+    """
+    generacion = models.BigIntegerField()
+    stock = models.BigIntegerField()
+
+    def __str__(self):
+        return f"generación {self.generacion}, stock {self.stock}"
+
+
+class CambioStock(models.Model):
+    """
+    Productos cuyo stock cambió en una versión (ver VersionCatalogo).
+    `anterior` encadena las versiones: si falta un eslabón no se sabe
+    qué cambió y los índices recargan todo.
+    """
+    version = models.BigIntegerField(primary_key=True)
+    anterior = models.BigIntegerField()
+    productos = models.JSONField()
+    creado = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"stock {self.anterior} -> {self.version}: {len(self.productos)} productos"
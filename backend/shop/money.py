@@ -0,0 +1,79 @@
+# shop/money.py
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+# =========================================================
+#                 PLATA: SUMAS EN SQL Y EN CENTAVOS
+# =========================================================
+#
+# Precios y totales son DecimalField(decimal_places=2). Dos reglas:
+#
+#   - Si los datos están en la base, el total se pide ya sumado:
+#     SUM(cantidad * precio) en una sola query (sum_lines), en vez de
+#     traer las filas (y sus productos) para sumarlas en Python.
+#   - Si ya están en memoria (armando un pedido), se suma en centavos
+#     enteros (to_cents / from_cents): cada precio se redondea una vez a
+#     2 decimales y la suma es entera, así el total no arrastra
+#     decimales de más y da exactamente lo mismo que la base.
+#
+# Hacia afuera siempre sale un Decimal con 2 decimales, igual que antes.
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def to_cents(amount):
+    """
+    Decimal (o int / str) -> centavos (int). Redondea a 2 decimales
+    como la base (half up) si vinieran más.
+    """
+    return int(Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def as_money(amount):
+    """
+    Resultado de un SUM -> Decimal con 2 decimales (SQLite devuelve las
+    expresiones con más decimales; Postgres ya viene bien).
+    """
+    return Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def from_cents(cents):
+    """
+    Centavos (int) -> Decimal con exactamente 2 decimales.
+    """
+    return Decimal(cents).scaleb(-2).quantize(CENT)
+
+
+def line_cents(precio, cantidad):
+    return to_cents(precio) * cantidad
+
+
+def line_subtotal(cantidad="cantidad", precio="producto__precio"):
+    """
+    Expresión SQL cantidad * precio (con output_field de plata).
+    """
+    return ExpressionWrapper(F(cantidad) * F(precio), output_field=MONEY)
+
+
+def sum_lines(cantidad="cantidad", precio="producto__precio"):
+    """
+    SUM(cantidad * precio), 0.00 si no hay filas. Para aggregate() o
+    annotate(): sum_lines("items__cantidad", "items__producto__precio").
+    """
+    return Coalesce(
+        Sum(line_subtotal(cantidad, precio)),
+        Value(ZERO),
+        output_field=MONEY,
+    )
+
+
+def sum_field(field):
+    """
+    SUM(field) de una columna que ya es plata (ej. OrderItem.subtotal).
+    """
+    return Coalesce(Sum(field, output_field=MONEY), Value(ZERO), output_field=MONEY)
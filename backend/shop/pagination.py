@@ -0,0 +1,202 @@
+# shop/pagination.py
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# =========================================================
+#               PAGINACIÓN POR CURSOR (KEYSET)
+# =========================================================
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación keyset: en vez de OFFSET + COUNT(*), cada página se pide
+    con un cursor opaco que guarda los valores de la última fila vista.
+
+    La página siguiente se resuelve con un WHERE sobre las columnas de
+    orden (ej: id < 123), así el costo es el mismo en la página 1 que
+    en la 500. Nunca se cuenta el total.
+
+    `orderings` mapea el valor del query param `sort` a la tupla de
+    campos de orden. La última columna tiene que ser única (id) para
+    que el orden sea total.
+
+    Además de querysets acepta cualquier objeto con `model` y
+    `keyset_page(ordering, position, limit)` (ver shop/catalog.py).
+    """
+
+    page_size = 24
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    sort_query_param = "sort"
+
+    orderings = {"new": ("-id",)}
+    default_sort = "new"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.sort = self.get_sort(request)
+        ordering = self.orderings[self.sort]
+
+        position = self.decode_cursor(request, queryset.model, ordering)
+
+        # pedimos una fila de más para saber si hay página siguiente
+        if hasattr(queryset, "keyset_page"):
+            # catálogo en memoria (shop/catalog.py): mismo cursor, sin SQL
+            rows = queryset.keyset_page(ordering, position, self.page_size + 1)
+        else:
+            queryset = queryset.order_by(*ordering)
+            if position is not None:
+                queryset = queryset.filter(self._after(ordering, position))
+            rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        self.next_cursor = None
+        if self.has_next:
+            self.next_cursor = self.encode_cursor(rows[-1], ordering)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("next_cursor", self.next_cursor),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "next_cursor": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    # ---------- parámetros ----------
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            value = int(raw)
+        except (TypeError, ValueError):
+            return self.page_size
+        if value < 1:
+            return self.page_size
+        return min(value, self.max_page_size)
+
+    def get_sort(self, request):
+        sort = request.query_params.get(self.sort_query_param)
+        if sort in self.orderings:
+            return sort
+        return self.default_sort
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    # ---------- cursor ----------
+    def encode_cursor(self, obj, ordering):
+        values = []
+        for field in ordering:
+            value = getattr(obj, field.lstrip("-"))
+            values.append(value if isinstance(value, int) else str(value))
+        payload = json.dumps([self.sort, values], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request, model, ordering):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            padded = raw + "=" * (-len(raw) % 4)
+            sort, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if sort != self.sort or len(values) != len(ordering):
+                raise ValueError("cursor de otro orden")
+            return [
+                self._to_python(model, field.lstrip("-"), value)
+                for field, value in zip(ordering, values)
+            ]
+        except Exception:
+            raise NotFound("Cursor inválido.")
+
+    @staticmethod
+    def _to_python(model, name, value):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # columna anotada (ej: relevancia de búsqueda)
+            return value
+        return field.to_python(value)
+
+    @staticmethod
+    def _after(ordering, position):
+        """
+        Arma el filtro "fila estrictamente después de `position`" para un
+        orden compuesto: (a > x) OR (a = x AND b > y) OR ...
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+
+class ProductCursorPagination(KeysetPagination):
+    """
+    Listado público de productos.
+      - sort=new        -> más nuevos primero (default)
+      - sort=price      -> precio ascendente
+      - sort=-price     -> precio descendente
+      - sort=relevance  -> ranking de búsqueda (default si hay ?search=)
+
+    "relevance" ordena por la anotación `relevancia` que agrega
+    ProductListView cuando hay búsqueda; sin búsqueda no existe.
+    """
+
+    orderings = {
+        "new": ("-id",),
+        "price": ("precio", "id"),
+        "-price": ("-precio", "-id"),
+        "relevance": ("relevancia", "-id"),
+    }
+    default_sort = "new"
+
+    def get_sort(self, request):
+        searching = bool(request.query_params.get("search"))
+        sort = request.query_params.get(self.sort_query_param)
+        if sort == "relevance" and not searching:
+            return self.default_sort
+        if sort in self.orderings:
+            return sort
+        return "relevance" if searching else self.default_sort
+
+
+class OrderCursorPagination(KeysetPagination):
+    """
+    Historial de pedidos (del cliente y del admin): más nuevos primero.
+    `creado` no es único (dos pedidos en el mismo instante), por eso el
+    desempate por id.
+    """
+
+    page_size = 20
+    orderings = {"new": ("-creado", "-id")}
+    default_sort = "new"
@@ -0,0 +1,226 @@
+# shop/sales.py
+import logging
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import OrderItem, Pedido, VentaDiaria, VentaPedido
+from .money import ZERO, as_money, sum_field
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================
+#                 VENTAS DIARIAS (ROLLUPS DEL DASHBOARD)
+# =========================================================
+#
+# El dashboard lee VentaDiaria (una fila por día / categoría / producto)
+# en vez de sumar Pedido + OrderItem en cada request: el costo depende
+# de los días pedidos, no de la cantidad de pedidos.
+#
+#   sync_order_sales   pedido pasa a pagado -> suma sus ventas
+#                      pedido deja de estar pagado (cancelado) -> las resta
+#   rebuild_sales      recalcula todo (o un rango) desde los pedidos
+#                      (manage.py rebuild_sales_rollups)
+#
+# Cada pedido se suma una sola vez: VentaPedido es la marca. Se crea con
+# un INSERT (clave primaria = pedido) antes de sumar, así si el webhook y
+# el feedback de MP llegan a la vez sólo uno de los dos suma.
+
+# estados que cuentan como venta ("shipped" ya estaba pagado)
+VENTA_ESTADOS = (Pedido.ESTADO_PAGADO, Pedido.ESTADO_ENVIADO)
+
+MAX_ATTEMPTS = 3
+
+
+def sale_date(pedido):
+    return timezone.localdate(pedido.creado)
+
+
+def _order_deltas(pedido, sign):
+    """
+    {(categoria, producto_id): [pedidos, unidades, ingresos]} del pedido,
+    con signo (+1 al sumar, -1 al restar).
+    """
+    rows = (
+        pedido.items
+        .values("producto_id", "producto__categoria")
+        .annotate(unidades=Sum("cantidad"), ingresos=sum_field("subtotal"))
+        .order_by()
+    )
+    deltas = defaultdict(lambda: [0, 0, ZERO])
+    total = deltas[("", None)]
+    total[0] = sign
+    for row in rows:
+        categoria = row["producto__categoria"]
+        unidades = sign * row["unidades"]
+        ingresos = sign * as_money(row["ingresos"])
+        for key in ((categoria, None), (categoria, row["producto_id"])):
+            deltas[key][0] = sign  # un pedido cuenta una vez por nivel
+            deltas[key][1] += unidades
+            deltas[key][2] += ingresos
+        total[1] += unidades
+        total[2] += ingresos
+    return deltas
+
+
+def _apply(fecha, deltas):
+    """
+    Suma los deltas a las filas del día: UPDATE y, si la fila no existía,
+    INSERT (si otro pedido la insertó en el medio, se reintenta el UPDATE).
+    """
+    for (categoria, producto_id), (pedidos, unidades, ingresos) in sorted(
+        deltas.items(), key=lambda kv: (kv[0][0], kv[0][1] or 0)
+    ):
+        filas = VentaDiaria.objects.filter(fecha=fecha, categoria=categoria, producto_id=producto_id)
+        for attempt in range(MAX_ATTEMPTS):
+            if filas.update(
+                pedidos=F("pedidos") + pedidos,
+                unidades=F("unidades") + unidades,
+                ingresos=F("ingresos") + ingresos,
+            ):
+                break
+            if pedidos < 0:
+                # restar de una fila que no está: el rollup ya estaba mal
+                logger.warning(
+                    "Venta diaria %s %s/%s inexistente al restar un pedido; "
+                    "correr rebuild_sales_rollups.", fecha, categoria, producto_id,
+                )
+                break
+            try:
+                with transaction.atomic():
+                    VentaDiaria.objects.create(
+                        fecha=fecha,
+                        categoria=categoria,
+                        producto_id=producto_id,
+                        pedidos=pedidos,
+                        unidades=unidades,
+                        ingresos=ingresos,
+                    )
+                break
+            except IntegrityError:
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+
+
+def record_sale(pedido):
+    """
+    Suma el pedido a las ventas de su día. False si ya estaba sumado.
+    """
+    fecha = sale_date(pedido)
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                VentaPedido.objects.create(pedido=pedido, fecha=fecha)
+        except IntegrityError:
+            return False
+        _apply(fecha, _order_deltas(pedido, +1))
+    return True
+
+
+def unrecord_sale(pedido):
+    """
+    Resta el pedido de las ventas del día en que se sumó. False si no
+    estaba sumado.
+    """
+    with transaction.atomic():
+        venta = VentaPedido.objects.select_for_update().filter(pedido=pedido).first()
+        if venta is None:
+            return False
+        venta.delete()
+        _apply(venta.fecha, _order_deltas(pedido, -1))
+    return True
+
+
+def sync_order_sales(pedido):
+    """
+    Después de cambiar pedido.estado (donde se llama sync_order_stock):
+    pagado / enviado suma el pedido a las ventas, cualquier otro estado
+    lo resta si estaba sumado.
+    """
+    if pedido.estado in VENTA_ESTADOS:
+        return record_sale(pedido)
+    return unrecord_sale(pedido)
+
+
+def rebuild_sales(desde=None, hasta=None):
+    """
+    Recalcula VentaDiaria y VentaPedido desde los pedidos, para todas las
+    fechas o para [desde, hasta] (días locales). Devuelve la cantidad de
+    filas de VentaDiaria generadas.
+    """
+    pedidos = Pedido.objects.filter(estado__in=VENTA_ESTADOS)
+    items = OrderItem.objects.filter(pedido__estado__in=VENTA_ESTADOS)
+    ventas = VentaDiaria.objects.all()
+    marcas = VentaPedido.objects.all()
+    if desde is not None:
+        pedidos = pedidos.filter(creado__date__gte=desde)
+        items = items.filter(pedido__creado__date__gte=desde)
+        ventas = ventas.filter(fecha__gte=desde)
+        marcas = marcas.filter(fecha__gte=desde)
+    if hasta is not None:
+        pedidos = pedidos.filter(creado__date__lte=hasta)
+        items = items.filter(pedido__creado__date__lte=hasta)
+        ventas = ventas.filter(fecha__lte=hasta)
+        marcas = marcas.filter(fecha__lte=hasta)
+
+    # todo en una transacción; con tráfico, un pedido pagado justo
+    # mientras corre puede quedar afuera: conviene correrlo de noche
+    with transaction.atomic():
+        dia = TruncDate("pedido__creado")
+        totales = dict(
+            unidades=Sum("cantidad"),
+            ingresos=sum_field("subtotal"),
+            pedidos=Count("pedido", distinct=True),
+        )
+        filas = []
+        # total del día: los pedidos se cuentan desde Pedido (uno sin items
+        # también es un pedido)
+        por_dia = {
+            row["fecha"]: row["n"]
+            for row in pedidos.annotate(fecha=TruncDate("creado")).values("fecha").annotate(n=Count("id")).order_by()
+        }
+        sumas_dia = {
+            row["fecha"]: row
+            for row in items.annotate(fecha=dia).values("fecha").annotate(**totales).order_by()
+        }
+        for fecha, n in por_dia.items():
+            row = sumas_dia.get(fecha, {})
+            filas.append(VentaDiaria(
+                fecha=fecha,
+                pedidos=n,
+                unidades=row.get("unidades") or 0,
+                ingresos=as_money(row.get("ingresos") or ZERO),
+            ))
+        for row in items.annotate(fecha=dia).values("fecha", "producto__categoria").annotate(**totales).order_by():
+            filas.append(VentaDiaria(
+                fecha=row["fecha"],
+                categoria=row["producto__categoria"],
+                pedidos=row["pedidos"],
+                unidades=row["unidades"],
+                ingresos=as_money(row["ingresos"]),
+            ))
+        for row in items.annotate(fecha=dia).values("fecha", "producto__categoria", "producto_id").annotate(**totales).order_by():
+            filas.append(VentaDiaria(
+                fecha=row["fecha"],
+                categoria=row["producto__categoria"],
+                producto_id=row["producto_id"],
+                pedidos=row["pedidos"],
+                unidades=row["unidades"],
+                ingresos=as_money(row["ingresos"]),
+            ))
+
+        ventas.delete()
+        marcas.delete()
+        VentaDiaria.objects.bulk_create(filas, batch_size=1000)
+        VentaPedido.objects.bulk_create(
+            [
+                VentaPedido(pedido_id=pk, fecha=timezone.localdate(creado))
+                for pk, creado in pedidos.values_list("id", "creado").iterator()
+            ],
+            batch_size=1000,
+        )
+    return len(filas)
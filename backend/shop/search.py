@@ -0,0 +1,395 @@
+# shop/search.py
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+
+# =========================================================
+#              BÚSQUEDA DE PRODUCTOS (ÍNDICE INVERTIDO)
+# =========================================================
+#
+# Índice invertido en memoria sobre los productos activos:
+#   token -> {producto_id: peso}
+#
+# - Normaliza acentos y mayúsculas ("Pantalón" == "pantalon").
+# - Pondera por campo: nombre > tag > descripción.
+# - El último término de la búsqueda matchea por prefijo ("pant").
+# - Se arma perezosamente en la primera búsqueda y después se
+#   actualiza de a un producto desde las señales de Producto.
+#
+# El índice vive en el proceso: cada worker arma el suyo. Guarda la
+# generación del catálogo (shop/cache.py) con la que se armó; si otro
+# worker cambió el catálogo, la generación no coincide y se rearma.
+
+FIELD_WEIGHTS = {
+    "nombre": 3.0,
+    "tag": 2.0,
+    "descripcion": 1.0,
+}
+
+STOPWORDS = frozenset({
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los",
+    "para", "por", "sin", "su", "un", "una", "y", "o",
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_VOWELS = "aeiou"
+
+
+def fold(text):
+    """
+    Minúsculas + sin tildes: "Pantalón Ñandú" -> "pantalon nandu".
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return text.casefold()
+
+
+def stem(token):
+    """
+    Singular muy simple para español: "pantalones" -> "pantalon",
+    "remeras" -> "remera". Se aplica igual al indexar y al buscar.
+    """
+    if len(token) > 4 and token.endswith("es") and token[-3] not in _VOWELS:
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [
+        stem(tok)
+        for tok in _TOKEN_RE.findall(fold(text))
+        if tok not in STOPWORDS
+    ]
+
+
+class SearchIndex:
+    """
+    Índice invertido de productos.
+
+    search() devuelve los ids de TODOS los productos que matchean,
+    ordenados por relevancia (score descendente, id descendente para
+    desempatar). Sin tope: la paginación y las facetas trabajan sobre el
+    resultado completo.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}    # token -> {pk: peso}
+        self._doc_tokens = {}  # pk -> set(tokens), para poder sacar un doc
+        self._vocab = []       # tokens ordenados, para búsqueda por prefijo
+        self._ranked_cache = {}  # token -> [(-peso, -pk), ...]
+        self._built = False
+        self.generation = None
+
+    # ---------- armado ----------
+    def build(self, rows):
+        """
+        rows: iterable de (id, nombre, descripcion, tag).
+        """
+        with self._lock:
+            self._postings = {}
+            self._doc_tokens = {}
+            self._ranked_cache = {}
+            for pk, nombre, descripcion, tag in rows:
+                self._add(pk, nombre, descripcion, tag)
+            self._vocab = sorted(self._postings)
+            self._built = True
+
+    def build_from_db(self):
+        from .cache import catalog_generation
+        from .models import Producto
+
+        generation = catalog_generation()
+        rows = (
+            Producto.objects
+            .filter(activo=True)
+            .values_list("id", "nombre", "descripcion", "tag")
+            .iterator(chunk_size=2000)
+        )
+        self.build(rows)
+        self.generation = generation
+
+    def ensure_built(self):
+        from .cache import catalog_generation
+
+        if self._built and self.generation == catalog_generation():
+            return
+        with self._lock:
+            if not self._built or self.generation != catalog_generation():
+                self.build_from_db()
+
+    def advance(self, previous, generation):
+        """
+        Llamado después de aplicar localmente un cambio que subió la
+        generación de `previous` a `generation`: el índice sigue al día
+        sin rearmarse. Si estaba en otra generación (cambio hecho en otro
+        worker) no toca nada y el próximo ensure_built() lo rearma.
+        """
+        with self._lock:
+            if self._built and previous is not None and self.generation == previous:
+                self.generation = generation
+
+    def reset(self):
+        with self._lock:
+            self._built = False
+            self._postings = {}
+            self._doc_tokens = {}
+            self._vocab = []
+            self._ranked_cache = {}
+
+    # ---------- actualizaciones incrementales ----------
+    def update(self, producto):
+        """
+        Re-indexa un producto (o lo saca si quedó inactivo).
+        Si el índice todavía no se armó no hace nada: se armará
+        completo en la próxima búsqueda.
+        """
+        if not self._built:
+            return
+        with self._lock:
+            self._remove(producto.pk, prune_vocab=True)
+            if producto.activo:
+                new_tokens = self._add(
+                    producto.pk,
+                    producto.nombre,
+                    producto.descripcion,
+                    producto.tag,
+                )
+                for token in new_tokens:
+                    i = bisect_left(self._vocab, token)
+                    if i == len(self._vocab) or self._vocab[i] != token:
+                        insort(self._vocab, token)
+
+    def remove(self, pk):
+        if not self._built:
+            return
+        with self._lock:
+            self._remove(pk, prune_vocab=True)
+
+    def _add(self, pk, nombre, descripcion, tag):
+        weights = {}
+        for field, text in (
+            ("nombre", nombre),
+            ("descripcion", descripcion),
+            ("tag", tag),
+        ):
+            w = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                weights[token] = weights.get(token, 0.0) + w
+
+        for token, weight in weights.items():
+            self._postings.setdefault(token, {})[pk] = weight
+            self._ranked_cache.pop(token, None)
+        self._doc_tokens[pk] = set(weights)
+        return weights
+
+    def _remove(self, pk, prune_vocab=False):
+        tokens = self._doc_tokens.pop(pk, ())
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(pk, None)
+            self._ranked_cache.pop(token, None)
+            if not posting:
+                del self._postings[token]
+                if prune_vocab:
+                    i = bisect_left(self._vocab, token)
+                    if i < len(self._vocab) and self._vocab[i] == token:
+                        del self._vocab[i]
+
+    # ---------- consulta ----------
+    def _expand_prefix(self, prefix):
+        i = bisect_left(self._vocab, prefix)
+        out = []
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+            out.append(self._vocab[i])
+            i += 1
+        return out
+
+    def _ranked(self, token):
+        """
+        Postings de un token ordenados por (peso desc, id desc).
+        Se cachean hasta que el token cambie.
+        """
+        ranked = self._ranked_cache.get(token)
+        if ranked is None:
+            ranked = sorted((-w, -pk) for pk, w in self._postings[token].items())
+            self._ranked_cache[token] = ranked
+        return ranked
+
+    def search(self, query, limit=None):
+        """
+        Devuelve lista de ids ordenados por relevancia (los primeros
+        `limit`, o todos). Todos los términos tienen que aparecer (AND);
+        el último puede estar incompleto (prefijo).
+        """
+        self.ensure_built()
+
+        raw = [t for t in _TOKEN_RE.findall(fold(query)) if t not in STOPWORDS]
+        if not raw:
+            return []
+
+        with self._lock:
+            # cada término de la consulta puede mapear a varios tokens
+            # (expansión por prefijo del último)
+            terms = []
+            for i, tok in enumerate(raw):
+                tokens = {stem(tok)}
+                if i == len(raw) - 1:
+                    tokens.update(self._expand_prefix(tok))
+                tokens = [t for t in tokens if t in self._postings]
+                if not tokens:
+                    return []
+                terms.append(tokens)
+
+            if len(terms) == 1:
+                return self._search_single(terms[0], limit)
+            return self._search_many(terms, limit)
+
+    def _search_single(self, tokens, limit):
+        # un solo término: el idf es el mismo para todos los docs, así que
+        # el orden sale directo de las listas ya rankeadas
+        if len(tokens) == 1:
+            return [-pk for _, pk in self._ranked(tokens[0])[:limit]]
+
+        out = []
+        seen = set()
+        for _, neg_pk in heapq.merge(*(self._ranked(t) for t in tokens)):
+            if neg_pk in seen:
+                continue
+            seen.add(neg_pk)
+            out.append(-neg_pk)
+            if len(out) == limit:
+                break
+        return out
+
+    def _search_many(self, terms, limit):
+        n_docs = len(self._doc_tokens) or 1
+
+        postings_by_term = [[self._postings[t] for t in tokens] for tokens in terms]
+
+        # candidatos: intersección de ids (operaciones de set en C),
+        # arrancando por el término más selectivo
+        key_sets = []
+        for postings in postings_by_term:
+            if len(postings) == 1:
+                key_sets.append(postings[0].keys())
+            else:
+                key_sets.append(set().union(*postings))
+        key_sets.sort(key=len)
+        candidates = key_sets[0] & key_sets[1]
+        for keys in key_sets[2:]:
+            if not candidates:
+                break
+            candidates &= keys
+        if not candidates:
+            return []
+
+        scores = dict.fromkeys(candidates, 0.0)
+        for postings in postings_by_term:
+            df = sum(len(p) for p in postings)
+            idf = math.log(1.0 + n_docs / df)
+            if len(postings) == 1:
+                posting = postings[0]
+                for pk in candidates:
+                    scores[pk] += posting[pk] * idf
+                continue
+            for pk in candidates:
+                scores[pk] += max(p.get(pk, 0.0) for p in postings) * idf
+
+        ranked = [(-score, -pk) for pk, score in scores.items()]
+        if limit is not None and len(ranked) > limit:
+            ranked = heapq.nsmallest(limit, ranked)
+        else:
+            ranked.sort()
+        return [-neg_pk for _, neg_pk in ranked]
+
+
+class RankedQuery:
+    """
+    Resultados de una búsqueda en el orden del ranking, para
+    KeysetPagination con sort=relevance (ver keyset_page): en vez de
+    anotar la posición de cada id con un CASE de miles de ramas, recorre
+    el ranking completo de a tandas y le pide a la base sólo los ids de
+    cada tanda (con los filtros del queryset) hasta llenar la página.
+    El cursor es la posición en el ranking (`relevancia`).
+    """
+
+    chunk_size = 500
+
+    def __init__(self, queryset, ranking):
+        self.model = queryset.model
+        self.queryset = queryset
+        self.ranking = ranking
+
+    def keyset_page(self, ordering, position, limit):
+        start = 0 if position is None else int(position[0]) + 1
+        out = []
+        for i in range(start, len(self.ranking), self.chunk_size):
+            chunk = self.ranking[i:i + self.chunk_size]
+            rows = self.queryset.in_bulk(chunk)
+            for pos, pk in enumerate(chunk, start=i):
+                producto = rows.get(pk)
+                if producto is None:  # no pasa los filtros
+                    continue
+                producto.relevancia = pos
+                out.append(producto)
+                if len(out) == limit:
+                    return out
+        return out
+
+
+class SortedSearchQuery:
+    """
+    Resultados de una búsqueda con otro orden (sort=new / price): como
+    RankedQuery, la base recibe los ids de a tandas y nunca un IN con el
+    resultado entero. Cada tanda devuelve, ya ordenadas y después del
+    cursor, sus primeras `limit` filas; la página son las primeras `limit`
+    de todas juntas. Si el orden es por id, las tandas van en ese orden y
+    se corta apenas se llena la página.
+
+    Las columnas de orden son numéricas (id, precio): el orden
+    descendente se arma negando el valor.
+    """
+
+    chunk_size = 500
+
+    def __init__(self, queryset, ids):
+        self.model = queryset.model
+        self.queryset = queryset
+        self.ids = ids
+
+    def keyset_page(self, ordering, position, limit):
+        from .pagination import KeysetPagination
+
+        queryset = self.queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(KeysetPagination._after(ordering, position))
+
+        by_id = ordering[0].lstrip("-") == "id"
+        ids = sorted(self.ids, reverse=ordering[0].startswith("-")) if by_id else list(self.ids)
+        rows = []
+        for i in range(0, len(ids), self.chunk_size):
+            rows += queryset.filter(id__in=ids[i:i + self.chunk_size])[:limit]
+            if by_id and len(rows) >= limit:
+                return rows[:limit]
+        if by_id:
+            return rows
+
+        def key(obj):
+            return tuple(
+                -getattr(obj, field[1:]) if field.startswith("-") else getattr(obj, field)
+                for field in ordering
+            )
+
+        return heapq.nsmallest(limit, rows, key=key)
+
+
+search_index = SearchIndex()
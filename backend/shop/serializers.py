@@ -1,8 +1,10 @@
 # shop/serializers.py
 from django.contrib.auth.models import User
+from django.db import models
 from django.utils.text import slugify
 from rest_framework import serializers
  
+from .images import IMAGE_FIELDS, image_bundle, image_key
 from .models import (
     Pedido,
     OrderItem,
@@ -17,7 +19,66 @@ from .models import (
 #                     PRODUCTOS
 # =========================================================
  
-class ProductoSerializer(serializers.ModelSerializer):
+class ProductImageField(serializers.ImageField):
+    """
+    ImageField que al leer devuelve la URL ya calculada en el bundle del
+    producto (la misma que image_url, image_hover_url, ...), en vez de
+    volver a pasar por el storage. Para escribir es un ImageField normal.
+    """
+ 
+    URL_KEYS = {
+        "imagen": "image_url",
+        "imagen_hover": "image_hover_url",
+        "imagen_3": "image_3_url",
+        "imagen_4": "image_4_url",
+    }
+ 
+    def to_representation(self, value):
+        if not value:
+            return None
+        return self.parent._bundle(value.instance)[self.URL_KEYS[self.source]]
+ 
+ 
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets: en un GET con ?fields=a,b,c el serializer sólo
+    expone esos campos. `fieldsets` define proyecciones con nombre que
+    se pueden pedir igual (ej. ?fields=card).
+ 
+    Sólo aplica al serializer raíz (o al hijo de un many=True): los
+    serializers anidados se instancian sin context y no se recortan.
+    """
+ 
+    fieldsets = {}
+    fields_query_param = "fields"
+ 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.requested_fields(self.context.get("request"))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+ 
+    @classmethod
+    def requested_fields(cls, request):
+        """
+        Set de campos pedidos (ya expandidos los fieldsets con nombre),
+        o None si no se pidió nada / nada válido.
+        """
+        if request is None or request.method != "GET":
+            return None
+        raw = request.query_params.get(cls.fields_query_param)
+        if not raw:
+            return None
+        requested = set()
+        for name in raw.split(","):
+            name = name.strip()
+            requested.update(cls.fieldsets.get(name, [name]))
+        requested &= set(cls.Meta.fields)
+        return requested or None
+ 
+ 
+class ProductoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer principal de productos (público y admin).
  
@@ -30,8 +91,15 @@ class ProductoSerializer(serializers.ModelSerializer):
     Además exponemos:
       - image_url, image_hover_url, image_3_url, image_4_url
       - images: lista con todas las URLs (para la galería del ProductDetail)
+ 
+    Soporta ?fields= (ver SparseFieldsMixin) y la proyección "card" con
+    lo mínimo que necesita la grilla del shop.
     """
  
+    fieldsets = {
+        "card": ["id", "nombre", "slug", "precio", "categoria", "tag", "image_url", "image_hover_url"],
+    }
+ 
     # URLs individuales cómodas para el front
     image_url = serializers.SerializerMethodField()
     image_hover_url = serializers.SerializerMethodField()
@@ -41,6 +109,12 @@ class ProductoSerializer(serializers.ModelSerializer):
     # galería combinada
     images = serializers.SerializerMethodField()
  
+    # los ImageField del modelo leen del mismo bundle de URLs
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: ProductImageField,
+    }
+ 
     class Meta:
         model = Producto
         fields = [
@@ -74,33 +148,50 @@ class ProductoSerializer(serializers.ModelSerializer):
             "slug": {"required": False, "allow_blank": True},
         }
  
-    def _build_url(self, file_field):
-        if not file_field:
-            return None
- 
-        url = file_field.url
- 
-        if url.startswith("http://") or url.startswith("https://"):
-            return url
- 
-        # Si es relativa, la completamos con el request
-        request = self.context.get("request")
-        if request is not None:
-            return request.build_absolute_uri(url)
-        return url
+    @classmethod
+    def columns_for(cls, fields):
+        """
+        Columnas del modelo necesarias para serializar `fields`, para
+        usar con .only(). Cualquier campo de imagen necesita las 4
+        columnas (el bundle de URLs se arma con los 4 nombres).
+        """
+        image_fields = {
+            "imagen", "imagen_hover", "imagen_3", "imagen_4",
+            "image_url", "image_hover_url", "image_3_url", "image_4_url", "images",
+        }
+        columns = {"id"}
+        for name in fields:
+            if name in image_fields:
+                columns.update(IMAGE_FIELDS)
+            else:
+                columns.add(name)
+        return columns
+ 
+    def _bundle(self, obj):
+        """
+        URLs de las 4 imágenes, calculadas una sola vez por producto y
+        por request (ver shop/images.py). Los getters sólo leen de acá.
+        """
+        bundles = self.context.setdefault("_image_bundles", {})
+        key = image_key(obj)
+        bundle = bundles.get(key)
+        if bundle is None:
+            bundle = image_bundle(obj, self.context.get("request"))
+            bundles[key] = bundle
+        return bundle
  
     # ---------- URLs individuales ----------
     def get_image_url(self, obj):
-        return self._build_url(obj.imagen)
+        return self._bundle(obj)["image_url"]
  
     def get_image_hover_url(self, obj):
-        return self._build_url(obj.imagen_hover)
+        return self._bundle(obj)["image_hover_url"]
  
     def get_image_3_url(self, obj):
-        return self._build_url(obj.imagen_3)
+        return self._bundle(obj)["image_3_url"]
  
     def get_image_4_url(self, obj):
-        return self._build_url(obj.imagen_4)
+        return self._bundle(obj)["image_4_url"]
  
     # ---------- galería ----------
     def get_images(self, obj):
@@ -109,15 +200,7 @@ class ProductoSerializer(serializers.ModelSerializer):
         [imagen, imagen_hover, imagen_3, imagen_4]
         Sólo incluye las que existan.
         """
-        files = [obj.imagen, obj.imagen_hover, obj.imagen_3, obj.imagen_4]
-        urls = []
- 
-        for f in files:
-            u = self._build_url(f)
-            if u:
-                urls.append(u)
- 
-        return urls
+        return self._bundle(obj)["images"]
  
     # ---------- create/update con slug automático ----------
     def create(self, validated_data):
@@ -161,12 +244,59 @@ class CarritoSerializer(serializers.ModelSerializer):
         model = Carrito
         fields = [
             "id",
+            "version",
             "items",
             "total_items",
             "total_precio",
         ]
  
  
+class CartLineSerializer(serializers.Serializer):
+    id = serializers.IntegerField(allow_null=True)
+    product_slug = serializers.CharField()
+    talle = serializers.CharField(allow_null=True)
+    cantidad = serializers.IntegerField()
+    subtotal = serializers.ReadOnlyField()  # igual que ItemCarritoSerializer
+ 
+ 
+class CartDeltaSerializer(serializers.Serializer):
+    """
+    Respuesta parcial de cart/add|remove|set/?response=delta: sólo el
+    item que cambió (cantidad 0 si salió del carrito), los totales y la
+    versión del carrito. Si `version` no es la que el front tenía + 1,
+    hubo otro cambio en el medio y conviene pedir el carrito entero.
+    """
+    version = serializers.IntegerField(allow_null=True)
+    line = CartLineSerializer()
+    total_items = serializers.IntegerField()
+    total_precio = serializers.DecimalField(max_digits=10, decimal_places=2)
+ 
+ 
+class CartOperationSerializer(serializers.Serializer):
+    """
+    Una operación de POST /api/cart/batch/:
+      {"op": "add" | "remove" | "set", "product_slug": "...",
+       "quantity": 1, "size": "M"}
+    Acepta "talle" como sinónimo de "size" (igual que cart/add/).
+    """
+    OPS = ("add", "remove", "set")
+ 
+    op = serializers.ChoiceField(choices=OPS)
+    product_slug = serializers.CharField()
+    quantity = serializers.IntegerField(min_value=0, default=1)
+    size = serializers.CharField(max_length=3, required=False, allow_blank=True, allow_null=True)
+    talle = serializers.CharField(max_length=3, required=False, allow_blank=True, allow_null=True)
+ 
+    def validate(self, attrs):
+        if attrs["op"] != "set" and attrs["quantity"] < 1:
+            raise serializers.ValidationError(
+                {"quantity": "Tiene que ser al menos 1 (para sacar el item usá 'set' con 0)."}
+            )
+        attrs["size"] = attrs.pop("size", None) or attrs.pop("talle", None) or None
+        attrs.pop("talle", None)
+        return attrs
+ 
+ 
 # =========================================================
 #                     USUARIOS / AUTH
 # =========================================================
@@ -1,8 +1,14 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 
-from .models import Cliente, Carrito
+from .models import Cliente, Carrito, Pedido, Producto
+from . import images, snapshots
+from .cache import bump_catalog_generation, bump_catalog_stock
+from .catalog import catalog_engine
+from .facets import facet_index
+from .search import search_index
 
 
 @receiver(post_save, sender=User)
@@ -19,4 +25,91 @@ def crear_cliente_y_carrito(sender, instance, created, **kwargs):
     cliente, _ = Cliente.objects.get_or_create(user=instance)
 
     # crea carrito solo si no existe
-    Carrito.objects.get_or_create(cliente=cliente)
\ No newline at end of file
+    Carrito.objects.get_or_create(cliente=cliente)
+
+
+def _catalogo_cambiado():
+    """
+    Nueva generación del catálogo: invalida los caches de respuestas.
+    Los índices en memoria de este proceso ya se actualizaron,
+    así que sólo avanzan su generación. Los snapshots estáticos se
+    rearman en segundo plano (si están activados y ningún otro proceso
+    los está rearmando, ver snapshots.rebuild_if_stale).
+    """
+    previous, generation = bump_catalog_generation()
+    search_index.advance(previous, generation)
+    facet_index.advance(previous, generation)
+    catalog_engine.advance(previous, generation)
+    snapshots.request_rebuild()
+
+
+@receiver(post_save, sender=Producto)
+def indexar_producto(sender, instance, **kwargs):
+    """
+    Cuando se crea/edita un producto (una vez confirmada la transacción):
+    se descartan sus URLs de imagen memoizadas, se re-indexa para la
+    búsqueda, las facetas y el catálogo en memoria y se sube la
+    generación del catálogo.
+    """
+    def _on_commit():
+        images.forget(instance.pk)
+        search_index.update(instance)
+        facet_index.update(instance)
+        catalog_engine.update(instance)
+        _catalogo_cambiado()
+
+    transaction.on_commit(_on_commit)
+
+
+@receiver(post_delete, sender=Producto)
+def desindexar_producto(sender, instance, **kwargs):
+    pk = instance.pk
+
+    def _on_commit():
+        images.forget(pk)
+        search_index.remove(pk)
+        facet_index.remove(pk)
+        catalog_engine.remove(pk)
+        _catalogo_cambiado()
+
+    transaction.on_commit(_on_commit)
+
+
+
+def stock_cambiado(producto_ids):
+    """
+    El stock de las reservas (shop/stock.py) se mueve con queryset.update(),
+    que no dispara post_save. Un checkout no es un cambio del catálogo: no
+    sube la generación (nada de rearmar índices ni snapshots), sube la
+    versión del stock. Al confirmar la transacción se actualiza el stock
+    de esos productos en los índices de este proceso (facetas y catálogo
+    en memoria; la búsqueda no lo mira); los otros workers lo re-leen
+    para esos productos solos (ver sync_stock).
+    """
+    ids = sorted(set(producto_ids))
+    if not ids:
+        return
+
+    def _on_commit():
+        previous, version = bump_catalog_stock(ids)
+        for pk, stock in Producto.objects.filter(pk__in=ids).values_list("id", "stock"):
+            facet_index.set_stock(pk, stock)
+            catalog_engine.set_stock(pk, stock)
+        facet_index.advance_stock(previous, version)
+        catalog_engine.advance_stock(previous, version)
+
+    transaction.on_commit(_on_commit)
+
+
+@receiver(pre_delete, sender=Pedido)
+def liberar_reservas_del_pedido(sender, instance, **kwargs):
+    """
+    Si se borra un pedido sin pagar, sus reservas se irían en cascada sin
+    devolver el stock: se liberan antes. Lo mismo con sus ventas.
+    """
+    from .sales import unrecord_sale
+    from .stock import release_order  # shop.stock importa este módulo
+
+    release_order(instance)
+    # si ya estaba sumado en las ventas diarias, se resta
+    unrecord_sale(instance)
@@ -0,0 +1,329 @@
+# shop/snapshots.py
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from whitenoise.compress import Compressor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================
+#          SNAPSHOTS ESTÁTICOS DEL CATÁLOGO PÚBLICO
+# =========================================================
+#
+# El catálogo es igual para todos los visitantes anónimos, así que se
+# puede pre-renderizar a JSON en STATIC_ROOT/catalog/:
+#
+#   products-p<n>.<hash>.json              página n del listado (proyección "card")
+#   products-<categoria>-p<n>.<hash>.json  página n del listado por categoría
+#   product-<slug>.<hash>.json             detalle de cada producto
+#
+# Las páginas son del mismo tamaño que las de la API (KeysetPagination)
+# y en el mismo orden (sort=new), así el front pide sólo la primera y
+# el resto con "Ver más". No llevan stock: los checkouts no rearman los
+# snapshots (ver signals.stock_cambiado), el stock sale siempre de la API.
+#
+# Cada archivo va con su .gz (y .br si está el paquete `brotli`) y un
+# hash del contenido en el nombre: WhiteNoise los sirve con cache
+# "immutable" sin pasar por las vistas ni por la base.
+#
+# `_manifest.json` mapea nombres lógicos -> URL con hash. Lo expone
+# GET /api/catalog/manifest/ (no lo sirve WhiteNoise, ver middleware.py).
+#
+# El manifest guarda la generación del catálogo con la que se armó (la
+# misma para todos los workers, ver shop/cache.py): si cambió un
+# Producto, el manifest queda atrás y la vista responde 404 (el front
+# usa la API) hasta que se rearme. Cada directorio lo escribe un solo
+# proceso a la vez, con un flock sobre `.lock` en el mismo directorio
+# (ver rebuild_if_stale): `manage.py build_catalog_snapshot` (deploy /
+# cron) o, si SHOP_CATALOG_SNAPSHOTS está activado, el worker que se
+# queda con el lock. El lock es del directorio y no del cache porque
+# cada máquina tiene su STATIC_ROOT y arma sus propios archivos.
+
+MANIFEST_NAME = "_manifest.json"
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.json$")
+
+
+def _conf():
+    return getattr(settings, "SHOP_CATALOG_SNAPSHOTS", {})
+
+
+def enabled():
+    return bool(_conf().get("ENABLED", False))
+
+
+def snapshot_dir():
+    return os.path.join(str(settings.STATIC_ROOT), _conf().get("DIR", "catalog"))
+
+
+def snapshot_url_prefix():
+    return settings.STATIC_URL.rstrip("/") + "/" + _conf().get("DIR", "catalog") + "/"
+
+
+def _dumps(data):
+    # separadores compactos + orden estable: mismo contenido -> mismo hash
+    return json.dumps(
+        data,
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        sort_keys=True,
+    ).encode("utf-8")
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class SnapshotWriter:
+    """
+    Escribe archivos con hash en el nombre. Si el archivo ya existe (el
+    contenido no cambió) no se vuelve a escribir ni a comprimir.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.compressor = Compressor(quiet=True)
+        self.written = 0
+        self.reused = 0
+
+    def write(self, logical_name, data):
+        raw = _dumps(data)
+        digest = hashlib.sha256(raw).hexdigest()[:12]
+        filename = f"{logical_name}.{digest}.json"
+        path = os.path.join(self.directory, filename)
+        if os.path.exists(path):
+            self.reused += 1
+        else:
+            _write_atomic(path, raw)
+            for _ in self.compressor.compress(path):
+                pass
+            self.written += 1
+        return filename
+
+
+def build_snapshots(directory=None):
+    """
+    Arma todos los snapshots y, al final, el manifest (así nadie ve un
+    manifest que apunte a archivos que todavía no existen).
+    Devuelve el manifest.
+    """
+    from .cache import catalog_generation
+    from .models import Producto
+    from .pagination import KeysetPagination
+    from .serializers import ProductoSerializer
+
+    directory = directory or snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    prefix = snapshot_url_prefix()
+
+    generation = catalog_generation()
+    productos = list(Producto.objects.filter(activo=True).order_by("-id"))
+
+    # sin request: las URLs de imágenes quedan como las da el storage
+    # (Cloudinary ya las devuelve absolutas)
+    full = ProductoSerializer(productos, many=True).data
+    for item in full:
+        item.pop("stock", None)
+    card_fields = ProductoSerializer.fieldsets["card"]
+    cards = [{k: item[k] for k in card_fields} for item in full]
+
+    writer = SnapshotWriter(directory)
+    page_size = KeysetPagination.page_size
+
+    def pages(logical_name, items):
+        # al menos una página (vacía), así el front siempre tiene algo que pedir
+        chunks = [items[i:i + page_size] for i in range(0, len(items), page_size)] or [[]]
+        return [
+            prefix + writer.write(f"{logical_name}-p{n}", chunk)
+            for n, chunk in enumerate(chunks, start=1)
+        ]
+
+    categorias = {}
+    for value, _label in Producto.CATEGORIES:
+        items = [
+            card for card, p in zip(cards, productos) if p.categoria == value
+        ]
+        categorias[value] = pages(f"products-{value}", items)
+
+    detalle = {}
+    for item in full:
+        detalle[item["slug"]] = prefix + writer.write(f"product-{item['slug']}", item)
+
+    manifest = {
+        "generation": generation,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "page_size": page_size,
+        "products": pages("products", cards),
+        "categories": categorias,
+        "detail": detalle,
+    }
+
+    previous = read_manifest(directory)
+    _write_atomic(os.path.join(directory, MANIFEST_NAME), _dumps(manifest))
+    _manifest_cache.clear()
+    removed = _prune(directory, manifest, previous)
+
+    logger.info(
+        "Snapshots del catálogo: %s escritos, %s sin cambios, %s borrados (gen %s)",
+        writer.written, writer.reused, removed, generation,
+    )
+    return manifest
+
+
+def _referenced(manifest):
+    if not manifest:
+        return set()
+    urls = [*manifest["detail"].values()]
+    # los manifests de antes de paginar tienen una sola URL por listado
+    for listing in [manifest["products"], *manifest["categories"].values()]:
+        urls.extend([listing] if isinstance(listing, str) else listing)
+    return {url.rsplit("/", 1)[-1] for url in urls}
+
+
+def _prune(directory, manifest, previous):
+    """
+    Borra snapshots viejos. Se conservan los del manifest anterior para
+    que un cliente que todavía tiene ese manifest no reciba 404.
+    """
+    keep = _referenced(manifest) | _referenced(previous)
+    removed = 0
+    for name in os.listdir(directory):
+        base = name[:-3] if name.endswith((".gz", ".br")) else name
+        if HASHED_NAME_RE.search(base) and base not in keep:
+            os.unlink(os.path.join(directory, name))
+            removed += 1
+    return removed
+
+
+# ---------- lectura del manifest ----------
+_manifest_cache = {}
+
+
+def read_manifest(directory=None):
+    """
+    Manifest actual (dict) o None si todavía no se armó.
+    Se cachea en memoria mientras no cambie el mtime del archivo.
+    """
+    path = os.path.join(directory or snapshot_dir(), MANIFEST_NAME)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _manifest_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, "rb") as f:
+        manifest = json.loads(f.read())
+    _manifest_cache[path] = (mtime, manifest)
+    return manifest
+
+
+def is_stale(manifest):
+    """
+    True si no hay manifest o si se armó con una generación del catálogo
+    que ya no es la actual (cambió algún Producto).
+    """
+    from .cache import catalog_generation
+
+    return manifest is None or manifest["generation"] != catalog_generation()
+
+
+# ---------- rearmado (uno a la vez) ----------
+LOCK_NAME = ".lock"
+
+# un solo thread de rearmado por proceso (request_rebuild)
+_rebuilding = threading.Lock()
+# sin fcntl (Windows, desarrollo) sólo se excluyen los threads del proceso
+_build_lock = threading.Lock()
+
+
+def _try_lock(directory):
+    """
+    Archivo de lock abierto y tomado, o None si otro proceso está
+    escribiendo ese directorio. El lock se suelta al cerrarlo (o si el
+    proceso muere).
+    """
+    os.makedirs(directory, exist_ok=True)
+    lock = open(os.path.join(directory, LOCK_NAME), "a")
+    if fcntl is None:
+        return lock
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+
+def rebuild_if_stale(directory=None, force=False):
+    """
+    Rearma los snapshots mientras el manifest esté atrás de la
+    generación del catálogo. Si otro proceso tiene el lock devuelve
+    False sin hacer nada: ese proceso vuelve a mirar la generación al
+    soltar el lock, así que también se lleva los cambios de ahora.
+    Varios cambios seguidos (ej. carga masiva desde el admin) se juntan
+    en un solo rearmado extra.
+
+    `force`: rearma al menos una vez aunque esté al día (deploy).
+    """
+    directory = directory or snapshot_dir()
+    while force or is_stale(read_manifest(directory)):
+        lock = _try_lock(directory)
+        if lock is None:
+            return False
+        force = False
+        try:
+            with _build_lock:
+                build_snapshots(directory)
+        finally:
+            lock.close()
+    return True
+
+
+def request_rebuild():
+    """
+    Pide un rearmado desde un request (cambió un Producto o el manifest
+    quedó viejo), en un thread aparte para no demorar la respuesta. Si
+    este proceso ya tiene uno andando no lanza otro; si el lock lo tiene
+    otro proceso, el thread termina enseguida. Un cambio que se cuele
+    justo cuando termina el thread lo levanta el próximo GET del
+    manifest (la vista vuelve a pedir el rearmado).
+    """
+    if not enabled() or not _rebuilding.acquire(blocking=False):
+        return False
+    threading.Thread(target=_rebuild_in_thread, daemon=True).start()
+    return True
+
+
+def _rebuild_in_thread():
+    try:
+        rebuild_if_stale()
+    except Exception:
+        logger.exception("No se pudieron rearmar los snapshots del catálogo")
+    finally:
+        _rebuilding.release()
+        # el thread abrió su propia conexión
+        connection.close()
@@ -0,0 +1,286 @@
+# shop/stock.py
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import Pedido, Producto, ReservaStock
+from .signals import stock_cambiado
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================
+#                 RESERVAS DE STOCK (CON VENCIMIENTO)
+# =========================================================
+#
+# Producto.stock es el stock DISPONIBLE: al crear un pedido se descuentan
+# sus unidades (hold) y quedan anotadas en ReservaStock con vencimiento.
+#
+#   hold_stock     pedido creado   -> stock - n, reserva "held"
+#   commit_order   pago aprobado / enviado -> "committed" (el stock ya estaba)
+#   release_order  pago cancelado  -> stock + n, "released"
+#   release_expired (cron / al faltar stock) -> igual, para las vencidas
+#
+# Nunca se lee el stock para decidir: el descuento es un único
+#   UPDATE producto SET stock = stock - n WHERE id = ? AND stock >= n
+# que la base aplica de a uno por fila, así dos compras simultáneas del
+# último talle no pueden quedar las dos con stock. Un pedido de varios
+# productos hace un solo UPDATE para todos (n por producto con CASE) y
+# sólo vale si los actualizó a todos. Liberar primero pasa la reserva
+# de "held" a "released" (con la fila bloqueada) y recién entonces
+# devuelve el stock: una reserva no se devuelve dos veces.
+# Los productos se bloquean y se tocan siempre en orden de id (sin
+# deadlocks): hold_stock los bloquea primero con SELECT ... FOR UPDATE.
+
+
+class OutOfStock(Exception):
+    """
+    No alcanzó el stock. `shortages`: lista de
+    {"product_id", "product_slug", "nombre", "requested", "available"}.
+    """
+
+    def __init__(self, shortages):
+        super().__init__("No hay stock suficiente.")
+        self.shortages = shortages
+
+    def by_line(self, items):
+        """
+        El mismo faltante, por línea del carrito (ítems con producto_id,
+        talle y cantidad): qué líneas hay que achicar o sacar.
+        """
+        faltantes = {s["product_id"]: s for s in self.shortages}
+        return [
+            {
+                "item_id": item.pk,
+                "product_id": item.producto_id,
+                "product_slug": faltantes[item.producto_id]["product_slug"],
+                "talle": item.talle,
+                "cantidad": item.cantidad,
+                # lo pedido en total (todos los talles) y lo que hay
+                "requested": faltantes[item.producto_id]["requested"],
+                "available": faltantes[item.producto_id]["available"],
+            }
+            for item in items
+            if item.producto_id in faltantes
+        ]
+
+
+def hold_ttl():
+    return getattr(settings, "SHOP_STOCK", {}).get("HOLD_TTL", 15 * 60)
+
+
+def lock_products(producto_ids):
+    """
+    SELECT ... FOR UPDATE de esos productos, en orden de id: dos
+    checkouts con productos en común se encolan en vez de trabarse
+    (deadlock), y precio / stock no cambian hasta el commit. Devuelve
+    {id: Producto}. Llamar dentro de una transacción.
+    """
+    return {
+        producto.pk: producto
+        for producto in Producto.objects
+        .select_for_update()
+        .filter(pk__in=sorted(set(producto_ids)))
+        .order_by("pk")
+    }
+
+
+def _take(producto_id, cantidad):
+    return bool(
+        Producto.objects
+        .filter(pk=producto_id, stock__gte=cantidad)
+        .update(stock=F("stock") - cantidad)
+    )
+
+
+def _take_all(wanted):
+    """
+    wanted: {producto_id: unidades}. Descuenta todo con un solo UPDATE
+    condicional; si a alguno no le alcanza, deshace el resto (savepoint)
+    y devuelve False.
+    """
+    if len(wanted) == 1:
+        [(producto_id, cantidad)] = wanted.items()
+        return _take(producto_id, cantidad)
+
+    cantidad = Case(
+        *[When(pk=producto_id, then=Value(n)) for producto_id, n in wanted.items()],
+        output_field=IntegerField(),
+    )
+    sid = transaction.savepoint()
+    updated = (
+        Producto.objects
+        .filter(pk__in=list(wanted), stock__gte=cantidad)
+        .update(stock=F("stock") - cantidad)
+    )
+    if updated == len(wanted):
+        transaction.savepoint_commit(sid)
+        return True
+    transaction.savepoint_rollback(sid)
+    return False
+
+
+def _lock_ids(producto_ids):
+    # como lock_products, sin traer las filas
+    list(
+        Producto.objects
+        .select_for_update()
+        .filter(pk__in=sorted(producto_ids))
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def _give_back(cantidades):
+    # cantidades: {producto_id: unidades}
+    for producto_id in sorted(cantidades):
+        Producto.objects.filter(pk=producto_id).update(stock=F("stock") + cantidades[producto_id])
+    stock_cambiado(cantidades)
+
+
+def hold_stock(pedido, lines, ttl=None):
+    """
+    Reserva el stock de `lines` (iterable de (producto, cantidad)) para
+    el pedido: todo o nada. Si algún producto no alcanza, no se reserva
+    ninguno y se levanta OutOfStock con el detalle por producto.
+
+    Las líneas del mismo producto (distintos talles) se suman: el stock
+    es por producto.
+    """
+    wanted = defaultdict(int)
+    productos = {}
+    for producto, cantidad in lines:
+        wanted[producto.pk] += cantidad
+        productos[producto.pk] = producto
+
+    with transaction.atomic():
+        _lock_ids(wanted)
+        taken = _take_all(wanted)
+        # quizás lo tienen reservas vencidas que nadie liberó todavía
+        if not taken and release_expired(producto_ids=sorted(wanted)):
+            taken = _take_all(wanted)
+
+        if not taken:
+            available = dict(
+                Producto.objects.filter(pk__in=list(wanted)).values_list("id", "stock")
+            )
+            missing = [
+                producto_id for producto_id in sorted(wanted)
+                if available.get(producto_id, 0) < wanted[producto_id]
+            ]
+            # la excepción deshace (rollback) lo que sí se había descontado
+            raise OutOfStock([
+                {
+                    "product_id": producto_id,
+                    "product_slug": productos[producto_id].slug,
+                    "nombre": productos[producto_id].nombre,
+                    "requested": wanted[producto_id],
+                    "available": available.get(producto_id, 0),
+                }
+                # si justo se repuso en el medio, se informan todos
+                for producto_id in (missing or sorted(wanted))
+            ])
+
+        vence = timezone.now() + timedelta(seconds=hold_ttl() if ttl is None else ttl)
+        ReservaStock.objects.bulk_create([
+            ReservaStock(pedido=pedido, producto_id=producto_id, cantidad=cantidad, vence=vence)
+            for producto_id, cantidad in sorted(wanted.items())
+        ])
+        stock_cambiado(wanted)
+
+
+def _lock(queryset, skip_locked=False):
+    queryset = queryset.order_by("producto_id", "id")
+    if skip_locked and connection.features.has_select_for_update_skip_locked:
+        # las que otra transacción ya está liberando / confirmando
+        return queryset.select_for_update(skip_locked=True)
+    return queryset.select_for_update()
+
+
+def _release(reservas):
+    """
+    reservas: filas (id, producto_id, cantidad) YA bloqueadas y "held".
+    """
+    if not reservas:
+        return 0
+    ReservaStock.objects.filter(pk__in=[pk for pk, _, _ in reservas]).update(
+        estado=ReservaStock.ESTADO_LIBERADA
+    )
+    cantidades = defaultdict(int)
+    for _pk, producto_id, cantidad in reservas:
+        cantidades[producto_id] += cantidad
+    _give_back(cantidades)
+    return len(reservas)
+
+
+def release_expired(producto_ids=None, limit=None):
+    """
+    Devuelve al stock las reservas vencidas (todas, o las de esos
+    productos). Devuelve cuántas liberó.
+    """
+    with transaction.atomic():
+        reservas = ReservaStock.objects.filter(
+            estado=ReservaStock.ESTADO_RESERVADA, vence__lte=timezone.now()
+        )
+        if producto_ids is not None:
+            reservas = reservas.filter(producto_id__in=producto_ids)
+        rows = _lock(reservas, skip_locked=True).values_list("id", "producto_id", "cantidad")
+        return _release(list(rows[:limit] if limit else rows))
+
+
+def release_order(pedido):
+    """
+    Pedido cancelado: sus reservas todavía vigentes vuelven al stock.
+    """
+    with transaction.atomic():
+        reservas = _lock(pedido.reservas.filter(estado=ReservaStock.ESTADO_RESERVADA))
+        return _release(list(reservas.values_list("id", "producto_id", "cantidad")))
+
+
+def commit_order(pedido):
+    """
+    Pago aprobado: las reservas pasan a "committed" (el stock ya estaba
+    descontado). Si alguna venció y se liberó antes de que llegara el
+    pago, se intenta volver a tomar el stock; las que ya no tienen stock
+    se devuelven (y se loguean) para revisarlas a mano.
+    """
+    with transaction.atomic():
+        reservas = list(_lock(pedido.reservas.exclude(estado=ReservaStock.ESTADO_CONFIRMADA)))
+        confirmadas, faltantes, retomadas = [], [], defaultdict(int)
+        for reserva in reservas:
+            if reserva.estado == ReservaStock.ESTADO_RESERVADA:
+                confirmadas.append(reserva.pk)
+            elif _take(reserva.producto_id, reserva.cantidad):
+                confirmadas.append(reserva.pk)
+                retomadas[reserva.producto_id] += reserva.cantidad
+            else:
+                faltantes.append(reserva)
+
+        ReservaStock.objects.filter(pk__in=confirmadas).update(
+            estado=ReservaStock.ESTADO_CONFIRMADA
+        )
+        stock_cambiado(retomadas)
+
+    for reserva in faltantes:
+        logger.warning(
+            "Pedido #%s pagado sin stock: producto %s x%s (la reserva había vencido).",
+            pedido.pk, reserva.producto_id, reserva.cantidad,
+        )
+    return faltantes
+
+
+def sync_order_stock(pedido):
+    """
+    Después de cambiar pedido.estado (feedback / webhook de MP, admin):
+    pagado o enviado confirma las reservas (un pedido puede pasar directo
+    de pendiente a enviado), cancelado las libera.
+    """
+    if pedido.estado in (Pedido.ESTADO_PAGADO, Pedido.ESTADO_ENVIADO):
+        commit_order(pedido)
+    elif pedido.estado == Pedido.ESTADO_CANCELADO:
+        release_order(pedido)
@@ -0,0 +1,177 @@
+# shop/tests/test_cart_batch.py
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from shop import cart
+from shop.cart import apply_operations
+from shop.customer import ShopRefreshToken
+from shop.models import Carrito, ItemCarrito, Producto
+
+
+# =========================================================
+#       /api/cart/batch/ Y cart.apply_operations
+# =========================================================
+#
+# Las operaciones se aplican en orden y todas juntas: add suma, remove
+# resta (lo que no está se ignora), set deja la cantidad exacta (0 lo
+# saca). Si otro request crea uno de los items nuevos en el medio, el
+# bulk_create choca y se cae al camino item por item sin perder nada.
+
+
+class CartBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for slug, categoria in (
+            ("remera", "tees"),
+            ("buzo", "hoodies"),
+            ("pantalon", "pants"),
+            ("campera", "hoodies"),
+            ("gorra", "accessories"),
+        ):
+            setattr(cls, slug, Producto.objects.create(
+                nombre=slug.title(), slug=slug, precio=Decimal("1000"), categoria=categoria, stock=20
+            ))
+        cls.inactivo = Producto.objects.create(
+            nombre="Viejo", slug="viejo", precio=Decimal("1000"), categoria="tees", stock=20, activo=False
+        )
+        cls.user = User.objects.create_user(username="cart-batch")
+        cls.carrito = Carrito.objects.get(cliente__user=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {ShopRefreshToken.for_user(self.user).access_token}"
+        )
+        for producto, talle, cantidad in ((self.remera, "M", 2), (self.buzo, "L", 1), (self.pantalon, "S", 3)):
+            ItemCarrito.objects.create(carrito=self.carrito, producto=producto, talle=talle, cantidad=cantidad)
+
+    def _cart(self):
+        return {
+            (slug, talle): cantidad
+            for slug, talle, cantidad in ItemCarrito.objects.filter(carrito=self.carrito)
+            .values_list("producto__slug", "talle", "cantidad")
+        }
+
+    def _version(self):
+        return Carrito.objects.values_list("version", flat=True).get(pk=self.carrito.pk)
+
+    def _batch(self, *operations):
+        return self.client.post(
+            "/api/cart/batch/",
+            {"operations": [
+                {"op": op, "product_slug": slug, "quantity": quantity, "size": size}
+                for op, slug, size, quantity in operations
+            ]},
+            format="json",
+        )
+
+    # ---------- API ----------
+    def test_mixed_operations_apply_in_order(self):
+        version = self._version()
+        response = self._batch(
+            ("add", "remera", "M", 1),
+            ("remove", "buzo", "L", 1),        # queda en 0: se borra
+            ("set", "pantalon", "S", 5),
+            ("add", "campera", "M", 2),
+            ("set", "campera", "M", 1),        # sobre el que acaba de agregar
+            ("add", "remera", "M", 2),
+            ("add", "gorra", None, 1),
+            ("remove", "gorra", None, 1),
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        expected = {("remera", "M"): 5, ("pantalon", "S"): 5, ("campera", "M"): 1}
+        self.assertEqual(self._cart(), expected)
+        self.assertEqual(
+            {(i["producto"]["slug"], i["talle"]): i["cantidad"] for i in response.data["items"]},
+            expected,
+        )
+        self.assertEqual(response.data["total_items"], 11)
+        self.assertEqual(self._version(), version + 1)
+
+    def test_removing_what_is_not_in_the_cart_does_nothing(self):
+        response = self._batch(
+            ("remove", "campera", "M", 1),      # no está
+            ("remove", "remera", "XL", 1),      # está, pero en otro talle
+            ("remove", "no-existe", "M", 1),    # ni siquiera existe
+            ("set", "gorra", None, 0),
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self._cart(), {("remera", "M"): 2, ("buzo", "L"): 1, ("pantalon", "S"): 3})
+
+    def test_unknown_or_inactive_products_reject_the_whole_batch(self):
+        before = self._cart()
+        response = self._batch(
+            ("add", "remera", "M", 1),
+            ("add", "no-existe", "M", 1),
+            ("set", "viejo", "M", 1),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["missing"], ["no-existe", "viejo"])
+        self.assertEqual(self._cart(), before)
+
+    def test_invalid_operations(self):
+        for operations in (
+            [],
+            [("add", "remera", "M", 0)],
+            [("borrar", "remera", "M", 1)],
+            [("add", "remera", "M", 1)] * 51,
+        ):
+            with self.subTest(operations=operations[:1], n=len(operations)):
+                self.assertEqual(self._batch(*operations).status_code, 400)
+
+    # ---------- fallback item por item ----------
+    def test_integrity_error_falls_back_to_one_by_one(self):
+        # otro request agrega campera M y la gorra (sin talle) justo después
+        # de que apply_operations leyó el carrito: el bulk_create choca
+        otros = [
+            ItemCarrito.objects.create(carrito=self.carrito, producto=self.campera, talle="M", cantidad=1),
+            ItemCarrito.objects.create(carrito=self.carrito, producto=self.gorra, talle=None, cantidad=1),
+        ]
+        real_select_for_update = ItemCarrito.objects.select_for_update
+
+        def sin_los_de_otro_request():
+            return real_select_for_update().exclude(pk__in=[i.pk for i in otros])
+
+        version = self._version()
+        with mock.patch.object(ItemCarrito.objects, "select_for_update", sin_los_de_otro_request), \
+                mock.patch.object(cart, "_apply_one_by_one", wraps=cart._apply_one_by_one) as fallback:
+            apply_operations(self.carrito, [
+                ("add", self.remera, "M", 1),       # existente: bulk_update
+                ("remove", self.buzo, "L", 1),      # existente: DELETE
+                ("add", self.campera, "M", 2),      # choca: 1 + 2
+                ("add", self.gorra, None, 1),       # choca: 1 + 1
+                ("set", self.pantalon, "XL", 4),    # nuevo sin choque
+                ("remove", self.campera, "L", 1),   # no está
+            ])
+
+        fallback.assert_called_once()
+        self.assertEqual(self._cart(), {
+            ("remera", "M"): 3,
+            ("pantalon", "S"): 3,
+            ("campera", "M"): 3,
+            ("gorra", None): 2,
+            ("pantalon", "XL"): 4,
+        })
+        self.assertGreater(self._version(), version)
+
+    # ---------- invitado ----------
+    def test_guest_batch(self):
+        client = APIClient()
+        response = client.post(
+            "/api/cart/batch/",
+            {"operations": [
+                {"op": "add", "product_slug": "remera", "quantity": 2, "size": "M"},
+                {"op": "add", "product_slug": "buzo", "quantity": 1, "size": "L"},
+                {"op": "remove", "product_slug": "remera", "quantity": 1, "size": "M"},
+                {"op": "remove", "product_slug": "campera", "quantity": 1, "size": "M"},
+            ]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data["total_items"], 2)
+        self.assertTrue(response.data["guest_token"])
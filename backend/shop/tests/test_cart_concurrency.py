@@ -0,0 +1,70 @@
+# shop/tests/test_cart_concurrency.py
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from shop.cart import add_item, remove_item
+from shop.models import Carrito, ItemCarrito, Producto
+
+from .utils import ConcurrentTestCase, run_parallel
+
+
+# =========================================================
+#          CARRITO: CAMBIOS CONCURRENTES DEL MISMO ITEM
+# =========================================================
+#
+# Varios threads (cada uno con su conexión) suman y restan unidades del
+# mismo item a la vez: no se puede perder ninguna ni quedar el item
+# duplicado. TransactionTestCase: cada cambio se confirma de verdad.
+
+THREADS = 8
+OPS = 25
+
+
+class CartConcurrencyTests(ConcurrentTestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="cart-concurrency")
+        self.carrito = Carrito.objects.get(cliente__user=user)
+        self.producto = Producto.objects.create(
+            nombre="Cart concurrency",
+            slug="cart-concurrency",
+            precio=Decimal("1000"),
+            categoria="accessories",
+            stock=0,
+        )
+
+    @staticmethod
+    def _repeat(op, *args, **kwargs):
+        for _ in range(OPS):
+            op(*args, **kwargs)
+
+    def _rows(self, talle):
+        return list(ItemCarrito.objects.filter(carrito=self.carrito, producto=self.producto, talle=talle))
+
+    def _check_add_then_remove(self, talle):
+        version = Carrito.objects.get(pk=self.carrito.pk).version
+
+        errors = run_parallel(lambda i: self._repeat(add_item, self.carrito, self.producto, talle, 1), THREADS)
+        self.assertEqual(errors, [])
+        rows = self._rows(talle)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].cantidad, THREADS * OPS)
+
+        errors = run_parallel(
+            lambda i: self._repeat(remove_item, self.carrito, talle, 1, producto=self.producto), THREADS
+        )
+        self.assertEqual(errors, [])
+        self.assertEqual(self._rows(talle), [])
+
+        # una versión nueva por cada cambio
+        self.assertEqual(
+            Carrito.objects.get(pk=self.carrito.pk).version, version + 2 * THREADS * OPS
+        )
+
+    def test_parallel_add_and_remove_with_size(self):
+        self._check_add_then_remove("M")
+
+    def test_parallel_add_and_remove_without_size(self):
+        # talle NULL (accesorio): depende de la restricción única
+        # itemcarrito_unico_talle (COALESCE(talle, ''))
+        self._check_add_then_remove(None)
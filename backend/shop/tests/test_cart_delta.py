@@ -0,0 +1,136 @@
+# shop/tests/test_cart_delta.py
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from shop.cart import load_cart_line
+from shop.customer import ShopRefreshToken
+from shop.models import Carrito, ItemCarrito, Producto
+
+
+# =========================================================
+#         ?response=delta: LÍNEA, TOTALES Y VERSIÓN
+# =========================================================
+#
+# La respuesta parcial tiene que decir lo mismo que el carrito entero
+# leído justo después (la línea tocada, los totales) y la versión tiene
+# que subir de a uno por cambio: si no, el front que aplica deltas se
+# desincroniza sin enterarse.
+
+
+class CartDeltaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.remera = Producto.objects.create(
+            nombre="Remera", slug="remera", precio=Decimal("1999.99"), categoria="tees", stock=50
+        )
+        cls.gorra = Producto.objects.create(
+            nombre="Gorra", slug="gorra", precio=Decimal("850.50"), categoria="accessories", stock=50
+        )
+        cls.user = User.objects.create_user(username="cart-delta")
+        cls.carrito = Carrito.objects.get(cliente__user=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {ShopRefreshToken.for_user(self.user).access_token}"
+        )
+
+    def _post(self, action, slug, size, quantity, client=None, **extra):
+        response = (client or self.client).post(
+            f"/api/cart/{action}/?response=delta",
+            {"product_slug": slug, "size": size, "quantity": quantity},
+            format="json",
+            **extra,
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def assertDeltaMatchesCart(self, delta, slug, talle, full):
+        self.assertEqual(delta["version"], full["version"])
+        self.assertEqual(delta["total_items"], full["total_items"])
+        self.assertEqual(delta["total_precio"], full["total_precio"])
+        item = next(
+            (i for i in full["items"] if i["producto"]["slug"] == slug and i["talle"] == talle),
+            None,
+        )
+        line = delta["line"]
+        self.assertEqual((line["product_slug"], line["talle"]), (slug, talle))
+        if item is None:
+            self.assertEqual((line["cantidad"], line["subtotal"]), (0, 0))
+        else:
+            self.assertEqual(line["id"], item["id"])
+            self.assertEqual(line["cantidad"], item["cantidad"])
+            self.assertEqual(Decimal(str(line["subtotal"])), Decimal(str(item["subtotal"])))
+
+    def test_each_delta_matches_the_full_cart(self):
+        steps = (
+            ("add", "remera", "M", 2),      # nuevo
+            ("add", "remera", "M", 1),      # existente
+            ("add", "gorra", None, 3),      # sin talle
+            ("set", "remera", "M", 5),
+            ("add", "remera", "L", 1),      # mismo producto, otro talle
+            ("remove", "remera", "M", 2),
+            ("remove", "gorra", None, 3),   # sale del carrito
+            ("set", "remera", "L", 0),      # sale del carrito
+        )
+        version = Carrito.objects.values_list("version", flat=True).get(pk=self.carrito.pk)
+        for action, slug, size, quantity in steps:
+            with self.subTest(step=(action, slug, size, quantity)):
+                delta = self._post(action, slug, size, quantity)
+                version += 1
+                self.assertEqual(delta["version"], version)
+                full = self.client.get("/api/cart/my/").json()
+                self.assertDeltaMatchesCart(delta, slug, size, full)
+
+        self.assertEqual(full["total_items"], 3)
+        self.assertEqual(full["total_precio"], "5999.97")
+
+    def test_load_cart_line(self):
+        item = ItemCarrito.objects.create(carrito=self.carrito, producto=self.remera, talle="M", cantidad=3)
+        ItemCarrito.objects.create(carrito=self.carrito, producto=self.gorra, talle=None, cantidad=2)
+
+        with self.assertNumQueries(1):
+            por_producto = load_cart_line(self.carrito.pk, "M", producto=self.remera)
+        por_slug = load_cart_line(self.carrito.pk, "M", slug="remera")
+        self.assertEqual(por_producto, por_slug)
+        self.assertEqual(por_producto["line"], {
+            "id": item.pk,
+            "product_slug": "remera",
+            "talle": "M",
+            "cantidad": 3,
+            "subtotal": Decimal("5999.97"),
+        })
+        self.assertEqual(por_producto["total_items"], 5)
+        self.assertEqual(por_producto["total_precio"], Decimal("7700.97"))
+
+        sin_talle = load_cart_line(self.carrito.pk, None, producto=self.gorra)
+        self.assertEqual(sin_talle["line"]["cantidad"], 2)
+
+        # talle que no está: línea en 0, totales igual
+        otro = load_cart_line(self.carrito.pk, "XL", producto=self.remera)
+        self.assertEqual(otro["line"], {
+            "id": None, "product_slug": "remera", "talle": "XL", "cantidad": 0, "subtotal": 0,
+        })
+        self.assertEqual(otro["total_items"], 5)
+
+    def test_empty_cart(self):
+        line = load_cart_line(self.carrito.pk, "M", slug="remera")
+        self.assertEqual((line["total_items"], line["total_precio"]), (0, Decimal("0.00")))
+
+    def test_guest_delta_matches_the_guest_cart(self):
+        guest = APIClient()
+        token = ""
+        for action, slug, size, quantity in (
+            ("add", "remera", "M", 2),
+            ("add", "gorra", None, 1),
+            ("set", "remera", "M", 4),
+            ("remove", "gorra", None, 1),
+        ):
+            delta = self._post(action, slug, size, quantity, client=guest, HTTP_X_GUEST_CART=token)
+            token = delta["guest_token"]
+            full = guest.get("/api/cart/my/", HTTP_X_GUEST_CART=token).json()
+            self.assertIsNone(delta["version"])
+            self.assertDeltaMatchesCart(delta, slug, size, full)
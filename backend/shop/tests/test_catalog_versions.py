@@ -0,0 +1,73 @@
+# shop/tests/test_catalog_versions.py
+from decimal import Decimal
+
+from django.db.models import F
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from shop.cache import (
+    bump_catalog_generation,
+    bump_catalog_stock,
+    catalog_generation,
+    catalog_stock_version,
+    shared_cache,
+    stock_changes,
+    versions_in_db,
+)
+from shop.models import CambioStock, Producto, VersionCatalogo
+
+
+# =========================================================
+#     GENERACIÓN Y STOCK COMPARTIDOS SIN CACHE COMPARTIDO
+# =========================================================
+#
+# Los tests corren con LocMemCache, como un deploy sin REDIS_URL: cada
+# proceso tiene su cache, así que las versiones tienen que salir de la
+# base. "Otro worker" = cambiar la base por fuera de las señales y de
+# este proceso (su bump sólo toca la fila de VersionCatalogo).
+
+
+class CatalogVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.producto = Producto.objects.create(
+            nombre="Buzo", slug="buzo", precio=Decimal("1000"), categoria="hoodies", stock=3
+        )
+
+    def test_versions_live_in_the_db(self):
+        self.assertTrue(versions_in_db())
+        generation, stock = catalog_generation(), catalog_stock_version()
+        shared_cache().clear()
+        self.assertEqual(catalog_generation(), generation)
+        self.assertEqual(catalog_stock_version(), stock)
+
+    def test_bump_returns_previous_and_never_repeats(self):
+        before = catalog_generation()
+        previous, generation = bump_catalog_generation()
+        self.assertEqual(previous, before)
+        self.assertGreater(generation, previous)
+        self.assertEqual(catalog_generation(), generation)
+
+    def test_change_in_another_worker_is_not_served_from_cache(self):
+        client = APIClient()
+        first = client.get("/api/products/")
+        self.assertEqual(first.data["results"][0]["precio"], "1000.00")
+
+        # otro worker cambia el precio: su bump va a la base
+        Producto.objects.filter(pk=self.producto.pk).update(precio=Decimal("2000"))
+        VersionCatalogo.objects.update(generacion=F("generacion") + 1)
+
+        second = client.get("/api/products/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.data["results"][0]["precio"], "2000.00")
+
+    def test_stock_changes_follow_the_chain(self):
+        start = catalog_stock_version()
+        bump_catalog_stock([1, 2])
+        _previous, until = bump_catalog_stock([2, 3])
+        self.assertEqual(stock_changes(start, until), {1, 2, 3})
+
+        # falta un eslabón (ya se borró): no se sabe qué cambió
+        CambioStock.objects.order_by("version").first().delete()
+        self.assertIsNone(stock_changes(start, until))
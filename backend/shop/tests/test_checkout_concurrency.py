@@ -0,0 +1,87 @@
+# shop/tests/test_checkout_concurrency.py
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db.models import Sum
+from rest_framework.test import APIClient
+
+from shop.customer import ShopRefreshToken
+from shop.models import Carrito, ItemCarrito, OrderItem, Producto, ReservaStock
+
+from .utils import ConcurrentTestCase, run_parallel
+
+
+# =========================================================
+#          CHECKOUT: SKU CALIENTE EN PARALELO
+# =========================================================
+#
+# Varios clientes compran a la vez el mismo producto por
+# POST /api/checkout/create-order/ hasta agotarlo. No se puede vender
+# de más: el stock nunca queda negativo, cada unidad vendida sale del
+# stock y los que llegan tarde reciben 409 (sin stock), no un 500.
+
+THREADS = 8
+OPS = 5
+STOCK = THREADS * OPS // 2
+
+
+class CheckoutConcurrencyTests(ConcurrentTestCase):
+    def setUp(self):
+        self.hot = Producto.objects.create(
+            nombre="Checkout (hot)",
+            slug="checkout-hot",
+            precio=Decimal("1000"),
+            categoria="tees",
+            stock=STOCK,
+        )
+        # un segundo producto con stock de sobra en cada pedido: el lock
+        # toma varias filas, siempre en el mismo orden
+        self.cold = Producto.objects.create(
+            nombre="Checkout (cold)",
+            slug="checkout-cold",
+            precio=Decimal("500"),
+            categoria="tees",
+            stock=THREADS * OPS,
+        )
+        self.users = [
+            User.objects.create_user(username=f"checkout-concurrency-{i}")
+            for i in range(THREADS)
+        ]
+
+    def test_parallel_checkouts_never_oversell(self):
+        statuses = [[] for _ in range(THREADS)]
+
+        def buyer(i):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {ShopRefreshToken.for_user(self.users[i]).access_token}"
+            )
+            carrito = Carrito.objects.get(cliente__user=self.users[i])
+            for _ in range(OPS):
+                ItemCarrito.objects.bulk_create([
+                    ItemCarrito(carrito=carrito, producto=self.hot, talle="M", cantidad=1),
+                    ItemCarrito(carrito=carrito, producto=self.cold, talle="M", cantidad=1),
+                ])
+                response = client.post("/api/checkout/create-order/", format="json")
+                statuses[i].append(response.status_code)
+                if response.status_code == 409:
+                    self.assertIn("shortages", response.data)
+                    ItemCarrito.objects.filter(carrito=carrito).delete()
+
+        self.assertEqual(run_parallel(buyer, THREADS), [])
+
+        codes = [code for codes in statuses for code in codes]
+        self.hot.refresh_from_db()
+        sold = OrderItem.objects.filter(producto=self.hot).aggregate(n=Sum("cantidad"))["n"] or 0
+        held = (
+            ReservaStock.objects.filter(producto=self.hot).aggregate(n=Sum("cantidad"))["n"] or 0
+        )
+
+        self.assertGreaterEqual(self.hot.stock, 0)
+        self.assertEqual(set(codes), {201, 409})
+        # se vende exactamente el stock que había, ni una unidad más
+        self.assertEqual(codes.count(201), STOCK)
+        self.assertEqual(codes.count(409), THREADS * OPS - STOCK)
+        self.assertEqual(sold, STOCK)
+        self.assertEqual(held, STOCK)
+        self.assertEqual(self.hot.stock, 0)
@@ -0,0 +1,123 @@
+# shop/tests/test_compact_carts.py
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from shop.cart import add_item
+from shop.management.commands import compact_carts
+from shop.models import Carrito, ItemCarrito, Producto
+
+
+# =========================================================
+#          compact_carts: ITEMS Y CARRITOS ABANDONADOS
+# =========================================================
+#
+# Se borran los items sin cambios en --days días y los carritos viejos
+# que quedan vacíos; lo que se tocó en el medio (un add mientras corre
+# la compactación) se queda.
+
+DIAS = 30
+
+
+class CompactCartsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.remera = Producto.objects.create(
+            nombre="Remera", slug="remera", precio=Decimal("1000"), categoria="tees", stock=50
+        )
+        cls.buzo = Producto.objects.create(
+            nombre="Buzo", slug="buzo", precio=Decimal("2000"), categoria="hoodies", stock=50
+        )
+
+    def setUp(self):
+        viejo = timezone.now() - timedelta(days=DIAS + 5)
+        # abandonado: todo viejo -> se borran items y carrito
+        self.abandonado = self._carrito("abandonado", [(self.remera, "M", viejo), (self.buzo, "L", viejo)], viejo)
+        # mezclado: un item viejo y uno nuevo -> queda el carrito con el nuevo
+        self.mezclado = self._carrito("mezclado", [(self.remera, "M", viejo), (self.buzo, "L", None)], viejo)
+        # vacío y viejo desde antes -> se borra
+        self.vacio = self._carrito("vacio", [], viejo)
+        # activo -> no se toca
+        self.activo = self._carrito("activo", [(self.remera, "S", None)], None)
+        self.versiones = self._versiones()
+
+    def _carrito(self, username, items, actualizado):
+        carrito = Carrito.objects.get(cliente__user=User.objects.create_user(username=username))
+        for producto, talle, cuando in items:
+            item = ItemCarrito.objects.create(carrito=carrito, producto=producto, talle=talle)
+            if cuando is not None:
+                ItemCarrito.objects.filter(pk=item.pk).update(actualizado=cuando)
+        if actualizado is not None:
+            Carrito.objects.filter(pk=carrito.pk).update(actualizado=actualizado)
+        return carrito
+
+    def _versiones(self):
+        return dict(Carrito.objects.values_list("id", "version"))
+
+    def _items(self, carrito):
+        return set(ItemCarrito.objects.filter(carrito=carrito).values_list("producto__slug", "talle"))
+
+    def _compact(self, *args):
+        out = StringIO()
+        call_command("compact_carts", f"--days={DIAS}", *args, stdout=out)
+        return out.getvalue()
+
+    def test_compacts_stale_items_and_carts(self):
+        out = self._compact("--chunk=1")
+
+        self.assertIn("Listo: 3 items y 2 carritos borrados en 3 tandas", out)
+        quedan = set(Carrito.objects.values_list("id", flat=True))
+        self.assertEqual(quedan, {self.mezclado.pk, self.activo.pk})
+        self.assertEqual(self._items(self.mezclado), {("buzo", "L")})
+        self.assertEqual(self._items(self.activo), {("remera", "S")})
+
+        versiones = self._versiones()
+        self.assertEqual(versiones[self.mezclado.pk], self.versiones[self.mezclado.pk] + 1)
+        self.assertEqual(versiones[self.activo.pk], self.versiones[self.activo.pk])
+
+        # una segunda corrida no encuentra nada
+        self.assertIn("Listo: 0 items y 0 carritos", self._compact())
+
+    def test_keep_carts(self):
+        self._compact("--keep-carts")
+        self.assertEqual(Carrito.objects.count(), 4)
+        self.assertEqual(self._items(self.abandonado), set())
+
+    def test_dry_run_deletes_nothing(self):
+        out = self._compact("--dry-run")
+        self.assertIn("Se borrarían 3 items y 2 carritos", out)
+        self.assertEqual(Carrito.objects.count(), 4)
+        self.assertEqual(ItemCarrito.objects.count(), 5)
+
+    def test_after_id_resumes(self):
+        primero = ItemCarrito.objects.filter(carrito=self.abandonado).order_by("id").first()
+        self._compact(f"--after-id={primero.pk}", "--keep-carts")
+        self.assertEqual(set(ItemCarrito.objects.filter(carrito=self.abandonado).values_list("id", flat=True)), {primero.pk})
+
+    def test_add_while_compacting_keeps_the_cart(self):
+        # el usuario del carrito abandonado agrega algo justo cuando la
+        # compactación ya eligió su carrito pero antes de que lo bloquee
+        real_lock = compact_carts._lock_carts
+
+        def add_then_lock(cutoff, ids):
+            if self.abandonado.pk in ids and not ItemCarrito.objects.filter(carrito=self.abandonado, talle="XL").exists():
+                add_item(self.abandonado, self.buzo, "XL", 1)
+            return real_lock(cutoff, ids)
+
+        with mock.patch.object(compact_carts, "_lock_carts", side_effect=add_then_lock):
+            self._compact()
+
+        self.assertTrue(Carrito.objects.filter(pk=self.abandonado.pk).exists())
+        self.assertEqual(self._items(self.abandonado), {("buzo", "XL")})
+        self.assertFalse(Carrito.objects.filter(pk=self.vacio.pk).exists())
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(CommandError):
+            call_command("compact_carts", "--days=0", stdout=StringIO())
@@ -0,0 +1,91 @@
+# shop/tests/test_conditional.py
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from shop.customer import ShopRefreshToken
+from shop.models import OrderItem, Pedido, Producto
+
+
+# =========================================================
+#            GET CONDICIONAL: 304 Y ETAG NUEVO
+# =========================================================
+#
+# Con el ETag que ya tiene el cliente (If-None-Match) la respuesta es un
+# 304 sin cuerpo; cualquier cambio de producto da otro ETag y la
+# respuesta completa, también en el detalle de un pedido.
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.producto = Producto.objects.create(
+            nombre="Remera", slug="remera", precio=Decimal("1000"), categoria="tees", stock=5
+        )
+        cls.user = User.objects.create_user(username="conditional")
+        cls.pedido = Pedido.objects.create(
+            cliente=cls.user.cliente, estado=Pedido.ESTADO_PAGADO, total_final=Decimal("1000")
+        )
+        OrderItem.objects.create(
+            pedido=cls.pedido,
+            producto=cls.producto,
+            nombre_producto=cls.producto.nombre,
+            cantidad=1,
+            precio_unitario=cls.producto.precio,
+            subtotal=cls.producto.precio,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {ShopRefreshToken.for_user(self.user).access_token}"
+        )
+
+    def _cambiar_producto(self):
+        # post_save -> nueva generación (on_commit)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.producto.precio += 1
+            self.producto.save()
+
+    def assertRevalidates(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+        self.assertEqual(cached["ETag"], etag)
+
+        self._cambiar_producto()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+        return changed
+
+    def test_product_list(self):
+        response = self.assertRevalidates("/api/products/")
+        self.assertEqual(response.data["results"][0]["precio"], "1001.00")
+
+    def test_product_detail(self):
+        response = self.assertRevalidates(f"/api/products/{self.producto.slug}/")
+        self.assertEqual(response.data["precio"], "1001.00")
+
+    def test_order_detail(self):
+        url = f"/api/orders/{self.pedido.pk}/"
+        response = self.assertRevalidates(url)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertNotIn("Last-Modified", response)
+
+        # el pedido mismo también cambia el ETag
+        etag = response["ETag"]
+        self.pedido.save(update_fields=["actualizado"])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_other_etag_gets_the_full_response(self):
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH='W/"otra-version"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 1)
@@ -0,0 +1,140 @@
+# shop/tests/test_facets.py
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.http import QueryDict
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from shop.cache import bump_catalog_stock
+from shop.facets import FACET_TAGS, PRICE_BUCKETS, apply_filters, bucket_label, parse_filters
+from shop.models import Pedido, Producto
+from shop.stock import hold_stock
+
+
+# =========================================================
+#          CONTEOS DE FACETAS CONTRA LA BASE
+# =========================================================
+#
+# Los conteos salen de los bitsets en memoria (shop/facets.py); acá se
+# comparan con un COUNT en la base aplicando los mismos filtros menos el
+# de la faceta contada, con filtros combinados y después de mover stock
+# (reserva en este proceso o cambio hecho por otro worker).
+
+FILTROS = (
+    "",
+    "cat=tees",
+    "tag=sale",
+    "price_min=15000&price_max=50000",
+    "in_stock=1",
+    "cat=hoodies&in_stock=1",
+    "cat=tees&tag=new&price_max=30000&in_stock=1",
+    "search=remera",
+    "search=remera&in_stock=1&tag=sale",
+)
+
+
+class FacetCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categorias = [value for value, _label in Producto.CATEGORIES]
+        tags = ["", "new", "sale"]
+        precios = [Decimal("9990"), Decimal("15000"), Decimal("29999.99"), Decimal("42000"), Decimal("80000")]
+        Producto.objects.bulk_create([
+            Producto(
+                nombre=f"{'Remera' if i % 3 else 'Buzo'} {i}",
+                slug=f"facet-{i}",
+                precio=precios[i % len(precios)],
+                categoria=categorias[i % len(categorias)],
+                tag=tags[i % len(tags)],
+                stock=i % 4,
+                activo=i % 11 != 0,
+            )
+            for i in range(60)
+        ])
+        cls.cliente = User.objects.create_user(username="facets").cliente
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _expected(self, query):
+        params = QueryDict(query)
+        filters = parse_filters(params)
+        activos = Producto.objects.filter(activo=True)
+        if params.get("search"):
+            # mismos resultados que la búsqueda de la API
+            ids = [p["id"] for p in self._all_results(f"search={params['search']}")]
+            activos = activos.filter(id__in=ids)
+
+        def without(*keys):
+            return apply_filters(activos, {**filters, **{k: None for k in keys}})
+
+        base = without("cat")
+        categorias = [base.filter(categoria=value).count() for value, _label in Producto.CATEGORIES]
+        base = without("tag")
+        tags = [base.filter(tag=value).count() for value in FACET_TAGS]
+        base = without("price_min", "price_max")
+        precios = [
+            base.filter(precio__gte=low, **({} if high is None else {"precio__lt": high})).count()
+            for low, high in PRICE_BUCKETS
+        ]
+        base = apply_filters(activos, {**filters, "in_stock": False})
+        stock = [base.filter(stock__gt=0).count()]
+        return {"categoria": categorias, "tag": tags, "precio": precios, "stock": stock}
+
+    def _all_results(self, query):
+        results, url = [], f"/api/products/?{query}"
+        while url:
+            data = self.client.get(url).data
+            results += data["results"]
+            url = data["next"]
+        return results
+
+    def _facets(self, query):
+        facets = self.client.get(f"/api/products/?{query}").data["facets"]
+        self.assertEqual(
+            [f["value"] for f in facets["precio"]],
+            [bucket_label(low, high) for low, high in PRICE_BUCKETS],
+        )
+        return {name: [f["count"] for f in values] for name, values in facets.items()}
+
+    def assertFacetsMatchDb(self):
+        for query in FILTROS:
+            with self.subTest(query=query):
+                self.assertEqual(self._facets(query), self._expected(query))
+
+    def test_counts_match_the_db(self):
+        self.assertFacetsMatchDb()
+        # sanity: los filtros sí recortan algo
+        self.assertNotEqual(self._facets("in_stock=1"), self._facets(""))
+
+    def test_counts_follow_a_hold_in_this_process(self):
+        self.assertFacetsMatchDb()
+        agotar = Producto.objects.filter(activo=True, stock__gt=0, categoria="tees")[:3]
+        pedido = Pedido.objects.create(cliente=self.cliente, total_final=Decimal("0"))
+        with self.captureOnCommitCallbacks(execute=True):
+            hold_stock(pedido, [(p, p.stock) for p in agotar])
+        self.assertFacetsMatchDb()
+
+    def test_counts_follow_stock_changed_by_another_worker(self):
+        self.assertFacetsMatchDb()
+        # otro worker: cambia la base y sube la versión del stock, sin
+        # avisarle al índice de este proceso
+        sin_stock = list(Producto.objects.filter(activo=True, stock=0).values_list("id", flat=True)[:4])
+        agotados = list(Producto.objects.filter(activo=True, stock__gt=0).values_list("id", flat=True)[:4])
+        Producto.objects.filter(pk__in=sin_stock).update(stock=7)
+        Producto.objects.filter(pk__in=agotados).update(stock=0)
+        bump_catalog_stock(sin_stock + agotados)
+        self.assertFacetsMatchDb()
+
+    def test_counts_follow_a_product_edit(self):
+        self.assertFacetsMatchDb()
+        producto = Producto.objects.filter(activo=True, categoria="pants").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.categoria = "tees"
+            producto.tag = "sale"
+            producto.precio = Decimal("60000")
+            producto.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Producto.objects.filter(activo=True, categoria="hoodies").first().delete()
+        self.assertFacetsMatchDb()
@@ -0,0 +1,144 @@
+# shop/tests/test_guest_cart.py
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from shop.guest_cart import MAX_AGE, SALT
+from shop.models import ItemCarrito, Producto
+
+
+# =========================================================
+#          CARRITO DE INVITADO: TOKEN Y FUSIÓN AL LOGIN
+# =========================================================
+#
+# El token X-Guest-Cart es todo el estado: uno adulterado o vencido se
+# lee como carrito vacío. Al loguearse / registrarse se suma al Carrito
+# del usuario una sola vez, aunque el request se repita con el mismo
+# token.
+
+PASSWORD = "secreto123"
+
+
+class GuestCartTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.remera = Producto.objects.create(
+            nombre="Remera", slug="remera", precio=Decimal("1000"), categoria="tees", stock=10
+        )
+        cls.buzo = Producto.objects.create(
+            nombre="Buzo", slug="buzo", precio=Decimal("2500"), categoria="hoodies", stock=10
+        )
+        cls.user = User.objects.create_user(
+            username="guest@example.com", email="guest@example.com", password=PASSWORD
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _guest_token(self):
+        # como el front: agrega sin login y se queda con el último token
+        token = ""
+        for slug, size, quantity in (("remera", "M", 2), ("buzo", "L", 1)):
+            response = self.client.post(
+                "/api/cart/add/",
+                {"product_slug": slug, "size": size, "quantity": quantity},
+                format="json",
+                HTTP_X_GUEST_CART=token,
+            )
+            self.assertEqual(response.status_code, 200)
+            token = response.data["guest_token"]
+        return token
+
+    def _cart(self, user):
+        return {
+            (item.producto.slug, item.talle): item.cantidad
+            for item in ItemCarrito.objects.filter(carrito__cliente__user=user).select_related("producto")
+        }
+
+    def _login(self, token):
+        return self.client.post(
+            "/api/auth/login/",
+            {"email": self.user.email, "password": PASSWORD},
+            format="json",
+            HTTP_X_GUEST_CART=token,
+        )
+
+    # ---------- token ----------
+    def test_token_round_trip(self):
+        response = self.client.get("/api/cart/my/", HTTP_X_GUEST_CART=self._guest_token())
+        self.assertEqual(response.data["total_items"], 3)
+        self.assertEqual(response.data["total_precio"], "4500.00")
+
+    def test_tampered_token_is_an_empty_cart(self):
+        token = self._guest_token()
+        payload, signature = token.rsplit(":", 1)
+        forged = signing.dumps([[self.remera.pk, "M", 99]], salt="otra-sal", compress=True)
+        for bad in (
+            f"{payload}:{signature[::-1]}",
+            f"{payload[:-2]}xx:{signature}",
+            forged,
+            "basura",
+        ):
+            response = self.client.get("/api/cart/my/", HTTP_X_GUEST_CART=bad)
+            self.assertEqual(response.data["total_items"], 0, bad)
+            self.assertEqual(response.data["guest_token"], "")
+
+    def test_expired_token_is_an_empty_cart(self):
+        with mock.patch("django.core.signing.time.time", return_value=time.time() - MAX_AGE - 60):
+            token = signing.dumps([[self.remera.pk, "M", 2]], salt=SALT, compress=True)
+        response = self.client.get("/api/cart/my/", HTTP_X_GUEST_CART=token)
+        self.assertEqual(response.data["total_items"], 0)
+
+    # ---------- fusión ----------
+    def test_login_merges_the_guest_cart_once(self):
+        ItemCarrito.objects.create(carrito=self.user.cliente.carrito, producto=self.remera, talle="M", cantidad=1)
+        token = self._guest_token()
+
+        self.assertEqual(self._login(token).status_code, 200)
+        expected = {("remera", "M"): 3, ("buzo", "L"): 1}
+        self.assertEqual(self._cart(self.user), expected)
+
+        # login reintentado (o el front no borró el token): no suma otra vez
+        self.assertEqual(self._login(token).status_code, 200)
+        self.assertEqual(self._cart(self.user), expected)
+
+    def test_register_merges_the_guest_cart_once(self):
+        token = self._guest_token()
+        response = self.client.post(
+            "/api/auth/register/",
+            {"email": "nuevo@example.com", "password": PASSWORD},
+            format="json",
+            HTTP_X_GUEST_CART=token,
+        )
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(email="nuevo@example.com")
+        expected = {("remera", "M"): 2, ("buzo", "L"): 1}
+        self.assertEqual(self._cart(user), expected)
+
+        self.client.post(
+            "/api/auth/login/",
+            {"email": user.email, "password": PASSWORD},
+            format="json",
+            HTTP_X_GUEST_CART=token,
+        )
+        self.assertEqual(self._cart(user), expected)
+
+    def test_login_with_a_tampered_token_merges_nothing(self):
+        token = self._guest_token()
+        self.assertEqual(self._login(token[:-1] + ("A" if token[-1] != "A" else "B")).status_code, 200)
+        self.assertEqual(self._cart(self.user), {})
+
+    def test_a_new_guest_cart_merges_again(self):
+        self._login(self._guest_token())
+        # después de desloguearse arma otro carrito: ese también se suma
+        self.client = APIClient()
+        response = self.client.post(
+            "/api/cart/add/", {"product_slug": "buzo", "size": "L"}, format="json"
+        )
+        self._login(response.data["guest_token"])
+        self.assertEqual(self._cart(self.user), {("remera", "M"): 2, ("buzo", "L"): 2})
@@ -0,0 +1,142 @@
+# shop/tests/test_idempotency.py
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from shop import views
+from shop.customer import ShopRefreshToken
+from shop.models import Carrito, IdempotencyKey, ItemCarrito, Pedido, Producto
+
+from .utils import ConcurrentTestCase, run_parallel
+
+
+# =========================================================
+#            IDEMPOTENCY-KEY: REINTENTOS Y DUPLICADOS
+# =========================================================
+#
+# El mismo POST con la misma key se procesa una sola vez: el reintento
+# recibe la respuesta guardada, un duplicado simultáneo espera a la del
+# original, otra key con otro request da 422 y las respuestas que
+# dependen del momento (409, 5xx) no se guardan.
+
+THREADS = 6
+KEY = "idem-test-key"
+
+
+class IdempotencyTests(ConcurrentTestCase):
+    def setUp(self):
+        self.producto = Producto.objects.create(
+            nombre="Remera idempotente",
+            slug="remera-idempotente",
+            precio=Decimal("1000"),
+            categoria="tees",
+            stock=10,
+        )
+        self.user = User.objects.create_user(username="idempotency")
+        self.carrito = Carrito.objects.get(cliente__user=self.user)
+
+    def _client(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {ShopRefreshToken.for_user(self.user).access_token}"
+        )
+        return client
+
+    def _add(self, client, quantity=1, url="/api/cart/add/", key=KEY):
+        return client.post(
+            url,
+            {"product_slug": self.producto.slug, "quantity": quantity, "size": "M"},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def _cantidad(self):
+        item = ItemCarrito.objects.filter(carrito=self.carrito).first()
+        return item.cantidad if item else 0
+
+    # ---------- reintento ----------
+    def test_retry_replays_the_stored_response(self):
+        client = self._client()
+        first = self._add(client)
+        second = self._add(client)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertNotIn("Idempotent-Replayed", first)
+        self.assertEqual(self._cantidad(), 1)
+
+    def test_same_key_with_another_body_is_rejected(self):
+        client = self._client()
+        self._add(client, quantity=1)
+        response = self._add(client, quantity=2)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self._cantidad(), 1)
+
+    def test_query_string_is_part_of_the_request(self):
+        # ?response=delta devuelve otra forma: no puede recibir la guardada
+        client = self._client()
+        self.assertEqual(self._add(client).status_code, 200)
+        response = self._add(client, url="/api/cart/add/?response=delta")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self._cantidad(), 1)
+
+    # ---------- duplicados simultáneos ----------
+    def test_concurrent_duplicates_run_once(self):
+        real_add_item = views.add_item
+
+        def slow_add_item(*args, **kwargs):
+            # el original tarda: los duplicados llegan mientras está en curso
+            time.sleep(0.3)
+            return real_add_item(*args, **kwargs)
+
+        responses = [None] * THREADS
+
+        def duplicate(i):
+            responses[i] = self._add(self._client())
+
+        with mock.patch.object(views, "add_item", slow_add_item):
+            self.assertEqual(run_parallel(duplicate, THREADS), [])
+
+        self.assertEqual({r.status_code for r in responses}, {200})
+        self.assertEqual(len({r.content for r in responses}), 1)
+        replayed = [r for r in responses if r.get("Idempotent-Replayed") == "true"]
+        self.assertEqual(len(replayed), THREADS - 1)
+        self.assertEqual(self._cantidad(), 1)
+        self.assertEqual(IdempotencyKey.objects.filter(key=KEY).count(), 1)
+
+    # ---------- respuestas que no se guardan ----------
+    def test_conflict_frees_the_key(self):
+        Producto.objects.filter(pk=self.producto.pk).update(stock=0)
+        ItemCarrito.objects.create(carrito=self.carrito, producto=self.producto, talle="M", cantidad=1)
+        client = self._client()
+
+        response = client.post("/api/checkout/create-order/", format="json", HTTP_IDEMPOTENCY_KEY=KEY)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(IdempotencyKey.objects.filter(key=KEY).exists())
+
+        # con stock, el reintento con la misma key se procesa de verdad
+        Producto.objects.filter(pk=self.producto.pk).update(stock=1)
+        response = client.post("/api/checkout/create-order/", format="json", HTTP_IDEMPOTENCY_KEY=KEY)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Pedido.objects.filter(cliente__user=self.user).count(), 1)
+
+    def test_server_error_frees_the_key(self):
+        client = self._client()
+
+        with mock.patch.object(views, "cart_line_response", return_value=Response(status=503)):
+            self.assertEqual(self._add(client).status_code, 503)
+        self.assertFalse(IdempotencyKey.objects.filter(key=KEY).exists())
+
+        with mock.patch.object(views, "add_item", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self._add(client)
+        self.assertFalse(IdempotencyKey.objects.filter(key=KEY).exists())
+
+        self.assertEqual(self._add(client).status_code, 200)
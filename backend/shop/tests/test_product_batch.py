@@ -0,0 +1,92 @@
+# shop/tests/test_product_batch.py
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from shop.models import Producto
+
+
+# =========================================================
+#            /api/products/batch/: ORDEN Y FALTANTES
+# =========================================================
+#
+# Devuelve los productos en el orden pedido, una vez cada uno aunque la
+# clave venga repetida, y en `missing` las que no existen o no están
+# activas. Todo con una sola consulta de productos.
+
+
+class ProductBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Producto.objects.bulk_create([
+            Producto(
+                nombre=f"Remera {letra}",
+                slug=f"remera-{letra}",
+                precio=Decimal("1000"),
+                categoria="tees",
+                stock=3,
+                activo=letra != "x",
+            )
+            for letra in "abcdx"
+        ])
+        cls.ids = dict(Producto.objects.values_list("slug", "id"))
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _batch(self, query):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/api/products/batch/?{query}")
+        self.assertEqual(response.status_code, 200, response.content)
+        productos = [q for q in ctx.captured_queries if 'FROM "shop_producto"' in q["sql"]]
+        self.assertEqual(len(productos), 1)
+        return response.data
+
+    def test_slugs_keep_the_requested_order(self):
+        data = self._batch("slugs=remera-c,remera-a,remera-d,remera-b")
+        self.assertEqual(
+            [p["slug"] for p in data["results"]],
+            ["remera-c", "remera-a", "remera-d", "remera-b"],
+        )
+        self.assertEqual(data["missing"], [])
+
+    def test_ids_keep_the_requested_order(self):
+        order = [self.ids["remera-b"], self.ids["remera-d"], self.ids["remera-a"]]
+        data = self._batch("ids=" + ",".join(map(str, order)))
+        self.assertEqual([p["id"] for p in data["results"]], order)
+
+    def test_duplicates_come_once_in_first_position(self):
+        data = self._batch("slugs=remera-b,remera-a,remera-b, remera-a ,remera-c")
+        self.assertEqual(
+            [p["slug"] for p in data["results"]],
+            ["remera-b", "remera-a", "remera-c"],
+        )
+        self.assertEqual(data["missing"], [])
+
+    def test_missing_and_inactive_are_reported(self):
+        data = self._batch("slugs=remera-a,no-existe,remera-x,remera-c,no-existe")
+        self.assertEqual([p["slug"] for p in data["results"]], ["remera-a", "remera-c"])
+        self.assertEqual(data["missing"], ["no-existe", "remera-x"])
+
+        data = self._batch(f"ids={self.ids['remera-a']},abc,999999,{self.ids['remera-x']}")
+        self.assertEqual([p["slug"] for p in data["results"]], ["remera-a"])
+        self.assertEqual(data["missing"], ["abc", "999999", str(self.ids["remera-x"])])
+
+    def test_sparse_fields(self):
+        data = self._batch("slugs=remera-b,remera-a&fields=slug,precio")
+        self.assertEqual(data["results"], [
+            {"slug": "remera-b", "precio": "1000.00"},
+            {"slug": "remera-a", "precio": "1000.00"},
+        ])
+
+    def test_bad_requests(self):
+        for query in ("", "slugs=remera-a&ids=1"):
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/products/batch/?{query}")
+                self.assertEqual(response.status_code, 400)
+
+        muchos = ",".join(f"slug-{i}" for i in range(51))
+        self.assertEqual(self.client.get(f"/api/products/batch/?slugs={muchos}").status_code, 400)
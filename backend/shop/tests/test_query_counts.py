@@ -0,0 +1,171 @@
+# shop/tests/test_query_counts.py
+from decimal import Decimal
+from itertools import count
+
+from django.contrib.auth.models import User
+from django.db import connection, models
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from shop.cache import catalog_versions
+from shop.customer import ShopRefreshToken
+from shop.models import Carrito, ItemCarrito, OrderItem, Pedido, Producto, ReservaStock
+
+
+# =========================================================
+#       CANTIDAD DE QUERIES DE LOS ENDPOINTS CON LISTAS
+# =========================================================
+#
+# Cada endpoint tiene que hacer la misma cantidad de queries con 1, 20 o
+# 200 items (carrito / pedidos), y que sea la fijada acá. Se cuentan las
+# sentencias reales (assertNumQueries), incluidas las que corren al
+# confirmar la transacción (on_commit: re-index del stock, etc.). Sin
+# Redis (como acá) la versión del stock va a la base: 5 de las queries
+# de los checkouts son ese bump (shop/cache.py).
+# Autentica con JWT como el front; 1 de las queries es siempre la del
+# User (JWTAuthentication).
+# Excepción: los bulk_create que el backend parte en tandas por su límite
+# de parámetros (SQLite con 200 líneas); esas tandas se suman al número
+# fijado, en Postgres es un solo INSERT.
+
+_users = count()
+
+
+class QueryCountTests(TestCase):
+    SIZES = (1, 20, 200)
+
+    @classmethod
+    def setUpTestData(cls):
+        n = max(cls.SIZES)
+        Producto.objects.bulk_create([
+            Producto(
+                nombre=f"Query check {i}",
+                slug=f"query-check-{i}",
+                precio=Decimal("1000") + i,
+                categoria="tees",
+                stock=10_000,
+                imagen=f"products/query-check-{i}.webp",
+            )
+            for i in range(n + 1)
+        ])
+        cls.productos = list(Producto.objects.order_by("id"))
+        # la fila de versiones ya existe, como en cualquier base en uso
+        catalog_versions()
+
+    # ---------- datos ----------
+    def _client_with_cart(self, size, staff=False):
+        n = next(_users)
+        user = User.objects.create_user(
+            username=f"query-check-{n}",
+            email=f"query-check-{n}@example.com",
+            password="x" * 12,
+            is_staff=staff,
+        )
+        # la señal de User ya creó Cliente + Carrito
+        carrito = Carrito.objects.get(cliente__user=user)
+        items = [
+            ItemCarrito(carrito=carrito, producto=p, talle="M", cantidad=1 + i % 3)
+            for i, p in enumerate(self.productos[:size])
+        ]
+        # uno más, en otro talle, para que el batch tenga algo que borrar
+        items.append(ItemCarrito(carrito=carrito, producto=self.productos[-2], talle="S"))
+        ItemCarrito.objects.bulk_create(items)
+
+        # `size` pedidos pagados de 2 líneas (historial de pedidos)
+        pedidos = Pedido.objects.bulk_create([
+            Pedido(cliente_id=carrito.cliente_id, estado=Pedido.ESTADO_PAGADO, total_final=Decimal("2000"))
+            for _ in range(size)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                pedido=pedido,
+                producto=p,
+                nombre_producto=p.nombre,
+                cantidad=1,
+                precio_unitario=p.precio,
+                subtotal=p.precio,
+            )
+            for pedido in pedidos
+            for p in self.productos[:2]
+        ])
+
+        client = APIClient()
+        token = ShopRefreshToken.for_user(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    @staticmethod
+    def _extra_batches(bulk, rows):
+        # INSERTs de más cuando bulk_create no entra en una sola sentencia
+        extra = 0
+        for model in bulk:
+            fields = [f for f in model._meta.concrete_fields if not isinstance(f, models.AutoField)]
+            batch = connection.ops.bulk_batch_size(fields, [None] * rows)
+            extra += -(-rows // batch) - 1
+        return extra
+
+    def assertQueriesPerSize(self, expected, method, url, payload=None, staff=False, bulk=()):
+        for size in self.SIZES:
+            with self.subTest(items=size):
+                client = self._client_with_cart(size, staff=staff)
+                data = payload(size) if payload else None
+                # una fila por línea del carrito (`size` + la del talle S)
+                queries = expected + self._extra_batches(bulk, size + 1)
+                with self.assertNumQueries(queries), self.captureOnCommitCallbacks(execute=True):
+                    response = getattr(client, method)(url, data, format="json")
+                self.assertLess(response.status_code, 400, response.content)
+
+    # ---------- bodies ----------
+    def _add_payload(self, size):
+        return {"product_slug": self.productos[0].slug, "quantity": 1, "size": "M"}
+
+    def _batch_payload(self, size):
+        # sobre un carrito con `size` items: suma a los existentes, borra
+        # el extra y agrega uno nuevo (máx. 50 operaciones por request)
+        ops = [
+            {"op": "add", "product_slug": p.slug, "quantity": 1, "size": "M"}
+            for p in self.productos[:min(size, 48)]
+        ]
+        ops.append({"op": "set", "product_slug": self.productos[-2].slug, "quantity": 0, "size": "S"})
+        ops.append({"op": "add", "product_slug": self.productos[-1].slug, "quantity": 2, "size": "L"})
+        return {"operations": ops}
+
+    @staticmethod
+    def _order_payload(size):
+        return {
+            "direccion": "Calle Falsa 123",
+            "ciudad": "CABA",
+            "provincia": "Buenos Aires",
+            "codigo_postal": "1000",
+        }
+
+    # ---------- carrito ----------
+    def test_cart_read(self):
+        self.assertQueriesPerSize(3, "get", "/api/cart/my/")
+
+    def test_cart_batch(self):
+        self.assertQueriesPerSize(14, "post", "/api/cart/batch/", self._batch_payload)
+
+    def test_cart_add_delta(self):
+        self.assertQueriesPerSize(8, "post", "/api/cart/add/?response=delta", self._add_payload)
+
+    # ---------- pedidos ----------
+    def test_orders_list(self):
+        self.assertQueriesPerSize(2, "get", "/api/orders/")
+
+    def test_orders_my(self):
+        self.assertQueriesPerSize(3, "get", "/api/orders/my/?status=all")
+
+    def test_admin_orders(self):
+        self.assertQueriesPerSize(2, "get", "/api/admin/orders/", staff=True)
+
+    def test_address(self):
+        self.assertQueriesPerSize(2, "get", "/api/me/address/")
+
+    def test_orders_create(self):
+        self.assertQueriesPerSize(
+            22, "post", "/api/orders/create/", self._order_payload, bulk=(ReservaStock, OrderItem)
+        )
+
+    def test_checkout_create(self):
+        self.assertQueriesPerSize(23, "post", "/api/checkout/create-order/", bulk=(ReservaStock, OrderItem))
@@ -0,0 +1,150 @@
+# shop/tests/test_query_plans.py
+import re
+from datetime import timedelta
+from decimal import Decimal
+from unittest import SkipTest
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from shop.models import Cliente, Pedido, Producto
+from shop.pagination import KeysetPagination, OrderCursorPagination
+
+
+# =========================================================
+#       PLANES (EXPLAIN) DE LAS QUERIES CALIENTES
+# =========================================================
+#
+# Sobre un dataset grande (como el de la tienda, con estadísticas al
+# día) las queries de historial de pedidos y del catálogo tienen que ir
+# por índice: ni recorrer la tabla entera (full scan) ni ordenar en
+# memoria. Si un cambio en los modelos / índices / vistas las saca del
+# índice, este test falla.
+#
+# TransactionTestCase: en MySQL ANALYZE TABLE confirma la transacción.
+
+# "full scan" según el motor: SQLite "SCAN tabla" sin índice, Postgres
+# "Seq Scan", MySQL "Table scan" (EXPLAIN FORMAT=TREE)
+FULL_SCAN = {
+    "sqlite": re.compile(r"\bSCAN (shop_\w+)\b(?! USING)"),
+    "postgresql": re.compile(r"Seq Scan on (shop_\w+)"),
+    "mysql": re.compile(r"Table scan on (shop_\w+)"),
+}
+SORT = {
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR ORDER BY"),
+    "postgresql": re.compile(r"\bSort\b"),
+    "mysql": re.compile(r"-> Sort\b"),
+}
+EXPLAIN_OPTIONS = {"mysql": {"format": "tree"}}
+
+PRODUCTS = 5000
+CUSTOMERS = 500
+ORDERS = 20000
+
+
+class HotQueryPlanTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor not in FULL_SCAN:
+            raise SkipTest(f"EXPLAIN no soportado para {connection.vendor}")
+        self.cliente_id = self._seed()
+        self._analyze()
+
+    def test_hot_queries_use_indexes(self):
+        vendor = connection.vendor
+        for name, queryset in self._queries():
+            with self.subTest(query=name):
+                plan = queryset.explain(**EXPLAIN_OPTIONS.get(vendor, {}))
+                scans = FULL_SCAN[vendor].findall(plan)
+                sorts = SORT[vendor].search(plan)
+                if scans and not sorts and vendor == "sqlite" and self._by_rowid(queryset):
+                    # en SQLite la tabla ES el índice por id: recorrerla en
+                    # orden de id hasta el LIMIT no es un full scan
+                    scans = []
+                self.assertEqual(scans, [], f"full scan:\n{plan}")
+                self.assertIsNone(sorts, f"ordena en memoria:\n{plan}")
+
+    # ---------- queries calientes ----------
+    def _queries(self):
+        # las mismas que arman las vistas: primera página y una página
+        # siguiente (con el WHERE del cursor keyset)
+        orders = OrderCursorPagination.orderings["new"]
+        products = KeysetPagination.orderings["new"]
+        page = OrderCursorPagination.page_size + 1
+
+        mis_pagados = Pedido.objects.filter(cliente_id=self.cliente_id, estado=Pedido.ESTADO_PAGADO)
+        pagados = Pedido.objects.filter(estado=Pedido.ESTADO_PAGADO)
+        pendientes = Pedido.objects.filter(estado=Pedido.ESTADO_PENDIENTE)
+        catalogo = Producto.objects.filter(activo=True)
+        categoria = catalogo.filter(categoria="tees")
+
+        return [
+            ("pedidos cliente+estado", mis_pagados.order_by(*orders)[:page]),
+            ("pedidos cliente+estado p2", self._next_page(mis_pagados, orders)[:page]),
+            ("pedidos pagados (admin)", pagados.order_by(*orders)[:page]),
+            ("pedidos pagados (admin) p2", self._next_page(pagados, orders)[:page]),
+            ("pedidos pendientes", pendientes.order_by(*orders)[:page]),
+            ("productos activos", catalogo.order_by(*products)[:25]),
+            ("productos activos p2", self._next_page(catalogo, products)[:25]),
+            ("productos activos+categoria", categoria.order_by(*products)[:25]),
+            ("productos activos+categoria p2", self._next_page(categoria, products)[:25]),
+        ]
+
+    @staticmethod
+    def _next_page(queryset, ordering):
+        middle = queryset.order_by(*ordering)[queryset.count() // 2]
+        position = [getattr(middle, field.lstrip("-")) for field in ordering]
+        return queryset.order_by(*ordering).filter(KeysetPagination._after(ordering, position))
+
+    @staticmethod
+    def _by_rowid(queryset):
+        ordering = [field.lstrip("-") for field in queryset.query.order_by]
+        return ordering in (["id"], ["pk"]) and queryset.query.high_mark is not None
+
+    # ---------- datos ----------
+    @staticmethod
+    def _seed():
+        categorias = [c for c, _ in Producto.CATEGORIES]
+        Producto.objects.bulk_create([
+            Producto(
+                nombre=f"Explain {i}",
+                slug=f"explain-{i}",
+                precio=Decimal("1000") + i % 500,
+                categoria=categorias[i % len(categorias)],
+                # la mayoría activos, como en la tienda
+                activo=i % 10 != 0,
+            )
+            for i in range(PRODUCTS)
+        ], batch_size=1000)
+
+        users = User.objects.bulk_create([
+            User(username=f"explain-{i}") for i in range(CUSTOMERS)
+        ], batch_size=1000)
+        clientes = Cliente.objects.bulk_create(
+            [Cliente(user=u) for u in users], batch_size=1000
+        )
+
+        # estados con la proporción habitual: pocos pendientes y cancelados
+        estados = [Pedido.ESTADO_PAGADO] * 6 + [Pedido.ESTADO_PENDIENTE] * 3 + [Pedido.ESTADO_CANCELADO]
+        now = timezone.now()
+        pedidos = Pedido.objects.bulk_create([
+            Pedido(cliente=clientes[i % CUSTOMERS], estado=estados[i % len(estados)])
+            for i in range(ORDERS)
+        ], batch_size=1000)
+        # creado repartido en el último año (auto_now_add no deja pasarlo)
+        for i in range(0, ORDERS, 1000):
+            chunk = pedidos[i:i + 1000]
+            Pedido.objects.filter(pk__in=[p.pk for p in chunk]).update(
+                creado=now - timedelta(minutes=(ORDERS - i) * 25)
+            )
+        return clientes[0].pk
+
+    @staticmethod
+    def _analyze():
+        # estadísticas al día para que el planner vea el tamaño real
+        with connection.cursor() as cursor:
+            if connection.vendor == "mysql":
+                cursor.execute("ANALYZE TABLE shop_pedido, shop_producto")
+            else:
+                cursor.execute("ANALYZE")
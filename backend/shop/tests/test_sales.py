@@ -0,0 +1,142 @@
+# shop/tests/test_sales.py
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from shop.models import OrderItem, Pedido, Producto, VentaDiaria, VentaPedido
+from shop.sales import rebuild_sales, record_sale, sync_order_sales, unrecord_sale
+
+
+# =========================================================
+#          VENTAS DIARIAS: SUMA INCREMENTAL VS. REBUILD
+# =========================================================
+#
+# Los pagos suman y las cancelaciones restan de VentaDiaria de a un
+# pedido; rebuild_sales_rollups lo recalcula todo desde los pedidos. Las
+# dos cuentas tienen que dar las mismas filas.
+
+
+class SalesRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = User.objects.create_user(username="sales").cliente
+        cls.remera = Producto.objects.create(
+            nombre="Remera", slug="remera", precio=Decimal("1000"), categoria="tees", stock=50
+        )
+        cls.buzo = Producto.objects.create(
+            nombre="Buzo", slug="buzo", precio=Decimal("2500"), categoria="hoodies", stock=50
+        )
+        cls.gorra = Producto.objects.create(
+            nombre="Gorra", slug="gorra", precio=Decimal("800"), categoria="hoodies", stock=50
+        )
+
+    def _pedido(self, *lineas, dias_atras=0, estado=Pedido.ESTADO_PAGADO):
+        pedido = Pedido.objects.create(cliente=self.cliente, total_final=Decimal("0"), estado=estado)
+        for producto, talle, cantidad in lineas:
+            OrderItem.objects.create(
+                pedido=pedido,
+                producto=producto,
+                nombre_producto=producto.nombre,
+                talle=talle,
+                cantidad=cantidad,
+                precio_unitario=producto.precio,
+                subtotal=producto.precio * cantidad,
+            )
+        if dias_atras:
+            Pedido.objects.filter(pk=pedido.pk).update(creado=timezone.now() - timedelta(days=dias_atras))
+        return Pedido.objects.get(pk=pedido.pk)
+
+    def _rollups(self):
+        return sorted(
+            VentaDiaria.objects.values_list("fecha", "categoria", "producto_id", "pedidos", "unidades", "ingresos"),
+            key=lambda row: (row[0], row[1], row[2] or 0),
+        )
+
+    def _total(self, fecha=None):
+        fecha = fecha or timezone.localdate()
+        return VentaDiaria.objects.values_list("pedidos", "unidades", "ingresos").get(
+            fecha=fecha, categoria="", producto=None
+        )
+
+    # ---------- una sola vez ----------
+    def test_order_is_counted_once(self):
+        pedido = self._pedido((self.remera, "M", 2), (self.buzo, "L", 1))
+
+        self.assertTrue(record_sale(pedido))
+        self.assertFalse(record_sale(pedido))  # webhook + feedback
+        self.assertTrue(VentaPedido.objects.filter(pedido=pedido).exists())
+        self.assertEqual(self._total(), (1, 3, Decimal("4500.00")))
+        self.assertEqual(
+            VentaDiaria.objects.values_list("pedidos", "unidades").get(categoria="tees", producto=None),
+            (1, 2),
+        )
+
+    def test_cancel_subtracts_the_order(self):
+        otro = self._pedido((self.buzo, "L", 1))
+        pedido = self._pedido((self.remera, "M", 2))
+        record_sale(otro)
+        record_sale(pedido)
+
+        pedido.estado = Pedido.ESTADO_CANCELADO
+        self.assertTrue(sync_order_sales(pedido))
+        self.assertFalse(unrecord_sale(pedido))  # ya estaba restado
+
+        self.assertFalse(VentaPedido.objects.filter(pedido=pedido).exists())
+        self.assertEqual(self._total(), (1, 1, Decimal("2500.00")))
+        self.assertEqual(
+            VentaDiaria.objects.values_list("pedidos", "unidades", "ingresos").get(producto=self.remera),
+            (0, 0, Decimal("0.00")),
+        )
+
+    def test_delete_subtracts_the_order(self):
+        pedido = self._pedido((self.remera, "M", 2))
+        record_sale(pedido)
+        self.assertEqual(self._total(), (1, 2, Decimal("2000.00")))
+
+        pedido.delete()
+        self.assertEqual(self._total(), (0, 0, Decimal("0.00")))
+
+    def test_sale_stays_on_the_day_it_was_recorded(self):
+        pedido = self._pedido((self.remera, "M", 1), dias_atras=3)
+        record_sale(pedido)
+        fecha = timezone.localdate() - timedelta(days=3)
+        self.assertEqual(self._total(fecha), (1, 1, Decimal("1000.00")))
+
+        pedido.estado = Pedido.ESTADO_CANCELADO
+        sync_order_sales(pedido)
+        self.assertEqual(self._total(fecha), (0, 0, Decimal("0.00")))
+        self.assertFalse(VentaDiaria.objects.filter(fecha=timezone.localdate()).exists())
+
+    # ---------- incremental == rebuild ----------
+    def test_incremental_rollups_match_rebuild(self):
+        pedidos = [
+            self._pedido((self.remera, "M", 2), (self.remera, "L", 1), (self.buzo, "L", 1)),
+            self._pedido((self.gorra, None, 3), (self.buzo, "S", 2)),
+            self._pedido((self.remera, "S", 1), dias_atras=1),
+            self._pedido((self.buzo, "M", 1), (self.gorra, None, 1), dias_atras=1),
+            self._pedido(),  # sin items: también es un pedido del día
+        ]
+        for pedido in pedidos:
+            record_sale(pedido)
+
+        # uno se cancela, uno se envía y uno nunca se paga
+        cancelado = pedidos[1]
+        cancelado.estado = Pedido.ESTADO_CANCELADO
+        sync_order_sales(cancelado)
+        Pedido.objects.filter(pk=cancelado.pk).update(estado=Pedido.ESTADO_CANCELADO)
+        enviado = pedidos[3]
+        enviado.estado = Pedido.ESTADO_ENVIADO
+        self.assertFalse(sync_order_sales(enviado))
+        Pedido.objects.filter(pk=enviado.pk).update(estado=Pedido.ESTADO_ENVIADO)
+        self._pedido((self.remera, "M", 5), estado=Pedido.ESTADO_PENDIENTE)
+
+        # las filas que quedaron en cero no las genera el rebuild
+        incremental = [row for row in self._rollups() if row[3]]
+        marcas = set(VentaPedido.objects.values_list("pedido_id", "fecha"))
+
+        rebuild_sales()
+        self.assertEqual(self._rollups(), incremental)
+        self.assertEqual(set(VentaPedido.objects.values_list("pedido_id", "fecha")), marcas)
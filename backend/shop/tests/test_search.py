@@ -0,0 +1,113 @@
+# shop/tests/test_search.py
+import re
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from shop.cache import bump_catalog_generation
+from shop.models import Producto
+from shop.search import SortedSearchQuery
+
+
+# =========================================================
+#        BÚSQUEDA: RESULTADO COMPLETO, SIN TOPE
+# =========================================================
+#
+# La búsqueda no corta el ranking: paginando se llega a todos los
+# productos que matchean y las facetas cuentan todos, no sólo los
+# primeros N. Los ids van a la base de a tandas, con cualquier orden.
+
+MATCHES = 1200
+
+
+class SearchPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Producto.objects.bulk_create([
+            Producto(
+                nombre=f"Remera buscable {i}",
+                slug=f"remera-buscable-{i}",
+                precio=Decimal("1000") + i,
+                categoria="tees" if i % 3 else "hoodies",
+                stock=1,
+            )
+            for i in range(MATCHES)
+        ] + [
+            Producto(nombre="Gorra", slug="gorra", precio=Decimal("1000"), categoria="accessories"),
+        ])
+
+    def setUp(self):
+        # los índices en memoria se rearman con los datos de este test
+        bump_catalog_generation()
+        self.client = APIClient()
+
+    def _all_pages(self, url):
+        ids, facets = [], None
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [item["id"] for item in response.data["results"]]
+            facets = facets or response.data["facets"]
+            url = response.data["next"]
+        return ids, facets
+
+    def test_relevance_pages_reach_every_match(self):
+        ids, facets = self._all_pages("/api/products/?search=buscable&page_size=100")
+        self.assertEqual(len(ids), MATCHES)
+        self.assertEqual(len(set(ids)), MATCHES)
+        counts = {f["value"]: f["count"] for f in facets["categoria"]}
+        self.assertEqual(counts["tees"] + counts["hoodies"], MATCHES)
+        self.assertEqual(counts["hoodies"], MATCHES // 3)
+
+    def test_relevance_pages_with_filters(self):
+        ids, _facets = self._all_pages("/api/products/?search=buscable&cat=hoodies&page_size=100")
+        self.assertEqual(len(ids), MATCHES // 3)
+
+    def test_other_sort_reaches_every_match(self):
+        ids, _facets = self._all_pages("/api/products/?search=buscable&sort=price&page_size=100")
+        self.assertEqual(len(ids), MATCHES)
+        precios = list(
+            Producto.objects.filter(pk__in=ids).order_by("precio", "id").values_list("id", flat=True)
+        )
+        self.assertEqual(ids, precios)
+
+    def test_other_sorts_with_ties_and_filters(self):
+        # precios repetidos (la mitad a 500): el desempate es el id, igual
+        # que en la base
+        ids = list(Producto.objects.filter(slug__startswith="remera-buscable").values_list("id", flat=True))
+        Producto.objects.filter(pk__in=ids[::2]).update(precio=Decimal("500"))
+        bump_catalog_generation()
+        for sort, ordering in (("-price", ("-precio", "-id")), ("new", ("-id",)), ("price", ("precio", "id"))):
+            with self.subTest(sort=sort):
+                ids, _facets = self._all_pages(
+                    f"/api/products/?search=buscable&cat=tees&sort={sort}&page_size=100"
+                )
+                expected = list(
+                    Producto.objects.filter(slug__startswith="remera-buscable", categoria="tees")
+                    .order_by(*ordering).values_list("id", flat=True)
+                )
+                self.assertEqual(ids, expected)
+
+    def test_other_sort_sends_the_ids_in_chunks(self):
+        with mock.patch.object(SortedSearchQuery, "chunk_size", 100), \
+                CaptureQueriesContext(connection) as ctx:
+            ids, _facets = self._all_pages("/api/products/?search=buscable&sort=price&page_size=100")
+        self.assertEqual(len(ids), MATCHES)
+        in_lists = [
+            len(match.split(","))
+            for q in ctx.captured_queries
+            for match in re.findall(r'"shop_producto"\."id" IN \(([^)]*)\)', q["sql"])
+        ]
+        if not settings.SHOP_CATALOG_ENGINE:
+            self.assertTrue(in_lists)
+        self.assertLessEqual(max(in_lists, default=0), 100)
+
+
+@override_settings(SHOP_CATALOG_ENGINE=True)
+class CatalogEngineSearchPaginationTests(SearchPaginationTests):
+    """Lo mismo servido desde el catálogo en memoria (shop/catalog.py)."""
@@ -0,0 +1,114 @@
+# shop/tests/test_snapshots.py
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from shop import snapshots
+from shop.cache import bump_catalog_generation, shared_cache
+from shop.models import Producto
+from shop.pagination import KeysetPagination
+
+
+# =========================================================
+#        SNAPSHOTS: PÁGINAS, MANIFEST AL DÍA Y UN SOLO REARMADO
+# =========================================================
+#
+# Los listados se parten en páginas como las de la API, sin stock; el
+# manifest viejo no se publica, el que armó otro proceso (deploy) vale
+# para todos los workers y el rearmado lo hace un proceso a la vez
+# (flock en el directorio).
+
+PRODUCTOS = 30
+
+
+class CatalogSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Producto.objects.bulk_create([
+            Producto(
+                nombre=f"Remera {i}",
+                slug=f"remera-{i}",
+                precio=Decimal("1000") + i,
+                categoria="tees" if i % 2 else "pants",
+                stock=5,
+            )
+            for i in range(PRODUCTOS)
+        ])
+
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root, ignore_errors=True)
+        settings = override_settings(
+            STATIC_ROOT=self.static_root,
+            SHOP_CATALOG_SNAPSHOTS={"ENABLED": False, "DIR": "catalog"},
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        bump_catalog_generation()
+        self.client = APIClient()
+
+    def _get(self, url):
+        # los snapshots los sirve WhiteNoise: acá se leen del disco
+        name = url.rsplit("/", 1)[-1]
+        with open(os.path.join(snapshots.snapshot_dir(), name), "rb") as f:
+            return json.loads(f.read())
+
+    def test_listing_pages_match_the_api(self):
+        manifest = snapshots.build_snapshots()
+        self.assertEqual(manifest["page_size"], KeysetPagination.page_size)
+        self.assertEqual(len(manifest["products"]), 2)
+
+        first = self._get(manifest["products"][0])
+        api = self.client.get("/api/products/").data["results"]
+        self.assertEqual([p["id"] for p in first], [p["id"] for p in api])
+
+        ids = [p["id"] for url in manifest["products"] for p in self._get(url)]
+        self.assertEqual(len(ids), PRODUCTOS)
+        tees = [p for url in manifest["categories"]["tees"] for p in self._get(url)]
+        self.assertEqual({p["categoria"] for p in tees}, {"tees"})
+        self.assertEqual(len(manifest["categories"]["hoodies"]), 1)
+        self.assertEqual(self._get(manifest["categories"]["hoodies"][0]), [])
+
+    def test_snapshots_carry_no_stock(self):
+        manifest = snapshots.build_snapshots()
+        self.assertNotIn("stock", self._get(manifest["products"][0])[0])
+        self.assertNotIn("stock", self._get(manifest["detail"]["remera-0"]))
+
+    def test_stale_manifest_is_not_served(self):
+        snapshots.build_snapshots()
+        self.assertEqual(self.client.get("/api/catalog/manifest/").status_code, 200)
+
+        bump_catalog_generation()
+        self.assertEqual(self.client.get("/api/catalog/manifest/").status_code, 404)
+
+        self.assertTrue(snapshots.rebuild_if_stale())
+        self.assertEqual(self.client.get("/api/catalog/manifest/").status_code, 200)
+
+    def test_manifest_from_another_process_is_fresh(self):
+        # build_catalog_snapshot en el deploy: otro proceso, con su
+        # propio LocMem; la generación sale de la base
+        snapshots.build_snapshots()
+        shared_cache().clear()
+        self.assertFalse(snapshots.is_stale(snapshots.read_manifest()))
+        self.assertEqual(self.client.get("/api/catalog/manifest/").status_code, 200)
+
+    @unittest.skipIf(snapshots.fcntl is None, "sin fcntl no hay lock entre procesos")
+    def test_only_one_process_rebuilds(self):
+        first = snapshots.build_snapshots()
+        bump_catalog_generation()
+
+        # otro proceso tiene el lock del directorio: no se escribe nada
+        with open(os.path.join(snapshots.snapshot_dir(), snapshots.LOCK_NAME), "a") as other:
+            snapshots.fcntl.flock(other.fileno(), snapshots.fcntl.LOCK_EX)
+            self.assertFalse(snapshots.rebuild_if_stale(force=True))
+            self.assertEqual(snapshots.read_manifest()["generation"], first["generation"])
+
+        # al soltarlo, el próximo que mira lo rearma
+        self.assertTrue(snapshots.rebuild_if_stale())
+        self.assertFalse(snapshots.is_stale(snapshots.read_manifest()))
@@ -0,0 +1,102 @@
+# shop/tests/test_sparse_fields.py
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from shop.models import Producto
+from shop.serializers import ProductoSerializer
+
+
+# =========================================================
+#       ?fields= : CAMPOS DE LA RESPUESTA Y COLUMNAS LEÍDAS
+# =========================================================
+#
+# Con ?fields= la respuesta trae sólo esos campos (o los del fieldset
+# con nombre, ej. card) y el SELECT sólo las columnas que hacen falta
+# para armarlos (.only()); lo que no se reconoce se ignora.
+
+CARD = set(ProductoSerializer.fieldsets["card"])
+TODOS = set(ProductoSerializer.Meta.fields)
+
+
+class SparseFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Producto.objects.bulk_create([
+            Producto(
+                nombre=f"Remera {i}",
+                slug=f"remera-{i}",
+                precio=Decimal("1000") + i,
+                categoria="tees",
+                descripcion="Algodón peinado " * 20,
+                stock=3,
+                imagen=f"products/remera-{i}.webp",
+            )
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _list(self, fields=None):
+        url = "/api/products/" if fields is None else f"/api/products/?fields={fields}"
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"], ctx.captured_queries
+
+    def _producto_columns(self, queries):
+        # columnas del SELECT de la página (el índice de facetas también
+        # lee shop_producto, pero sin ORDER BY / LIMIT)
+        [sql] = [
+            q["sql"] for q in queries
+            if 'FROM "shop_producto"' in q["sql"] and " LIMIT " in q["sql"]
+        ]
+        select = sql.split(" FROM ", 1)[0]
+        return {
+            field.column
+            for field in Producto._meta.concrete_fields
+            if f'"shop_producto"."{field.column}"' in select
+        }
+
+    def test_no_fields_returns_everything(self):
+        results, queries = self._list()
+        self.assertEqual(set(results[0]), TODOS)
+        self.assertIn("descripcion", self._producto_columns(queries))
+
+    def test_explicit_fields(self):
+        results, queries = self._list("nombre,precio")
+        self.assertEqual([set(r) for r in results], [{"nombre", "precio"}] * 3)
+        # + id (siempre) y precio (clave del cursor)
+        self.assertEqual(self._producto_columns(queries), {"id", "nombre", "precio"})
+
+    def test_card_fieldset(self):
+        results, queries = self._list("card")
+        self.assertEqual(set(results[0]), CARD)
+        self.assertTrue(results[0]["image_url"])
+        self.assertEqual(
+            self._producto_columns(queries),
+            {"id", "nombre", "slug", "precio", "categoria", "tag",
+             "imagen", "imagen_hover", "imagen_3", "imagen_4"},
+        )
+
+    def test_fieldset_plus_fields_and_unknown_names(self):
+        results, _queries = self._list("card, stock ,no_existe")
+        self.assertEqual(set(results[0]), CARD | {"stock"})
+
+        # nada válido: respuesta completa
+        results, _queries = self._list("no_existe")
+        self.assertEqual(set(results[0]), TODOS)
+
+    def test_detail(self):
+        response = self.client.get("/api/products/remera-1/?fields=nombre,descripcion")
+        self.assertEqual(response.data, {"nombre": "Remera 1", "descripcion": "Algodón peinado " * 20})
+
+    def test_fields_are_part_of_the_cache_key(self):
+        # la misma URL sin ?fields= no recibe la respuesta recortada
+        self._list("nombre")
+        results, _queries = self._list()
+        self.assertEqual(set(results[0]), TODOS)
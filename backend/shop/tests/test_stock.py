@@ -0,0 +1,199 @@
+# shop/tests/test_stock.py
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+
+from shop.models import Pedido, Producto, ReservaStock
+from shop.stock import (
+    OutOfStock,
+    commit_order,
+    hold_stock,
+    release_expired,
+    release_order,
+    sync_order_stock,
+)
+
+
+# =========================================================
+#          RESERVAS DE STOCK: HOLD, VENCIMIENTO, PAGO
+# =========================================================
+#
+# Producto.stock es el disponible. Lo que sale de ahí queda en una
+# reserva: en todo momento stock + reservado/confirmado = stock inicial.
+
+STOCK = 5
+
+
+class StockHoldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = User.objects.create_user(username="stock-holds").cliente
+        cls.remera = Producto.objects.create(
+            nombre="Remera", slug="remera", precio=Decimal("1000"), categoria="tees", stock=STOCK
+        )
+        cls.buzo = Producto.objects.create(
+            nombre="Buzo", slug="buzo", precio=Decimal("2000"), categoria="hoodies", stock=STOCK
+        )
+
+    def _pedido(self):
+        return Pedido.objects.create(cliente=self.cliente, total_final=Decimal("1000"))
+
+    def _stock(self, producto):
+        return Producto.objects.values_list("stock", flat=True).get(pk=producto.pk)
+
+    def _apartado(self, producto):
+        # lo que salió del stock y sigue afuera: reservado o confirmado
+        return ReservaStock.objects.filter(
+            producto=producto,
+            estado__in=[ReservaStock.ESTADO_RESERVADA, ReservaStock.ESTADO_CONFIRMADA],
+        ).aggregate(n=Sum("cantidad"))["n"] or 0
+
+    def assertStockBalanced(self, producto):
+        self.assertEqual(self._stock(producto) + self._apartado(producto), STOCK)
+
+    def _estados(self, pedido):
+        return set(pedido.reservas.values_list("estado", flat=True))
+
+    # ---------- hold ----------
+    def test_hold_takes_stock_and_sums_sizes(self):
+        pedido = self._pedido()
+        hold_stock(pedido, [(self.remera, 2), (self.remera, 1), (self.buzo, 1)])
+
+        self.assertEqual(self._stock(self.remera), STOCK - 3)
+        self.assertEqual(self._stock(self.buzo), STOCK - 1)
+        self.assertEqual(
+            dict(pedido.reservas.values_list("producto_id", "cantidad")),
+            {self.remera.pk: 3, self.buzo.pk: 1},
+        )
+        self.assertStockBalanced(self.remera)
+
+    def test_hold_is_all_or_nothing(self):
+        with self.assertRaises(OutOfStock) as ctx:
+            hold_stock(self._pedido(), [(self.remera, 1), (self.buzo, STOCK + 1)])
+
+        [shortage] = ctx.exception.shortages
+        self.assertEqual(shortage["product_id"], self.buzo.pk)
+        self.assertEqual((shortage["requested"], shortage["available"]), (STOCK + 1, STOCK))
+        # la remera sí alcanzaba, pero no se descontó
+        self.assertEqual(self._stock(self.remera), STOCK)
+        self.assertFalse(ReservaStock.objects.exists())
+
+    # ---------- vencimiento ----------
+    def test_expired_holds_go_back_to_stock_once(self):
+        pedido = self._pedido()
+        hold_stock(pedido, [(self.remera, 2)], ttl=0)
+        hold_stock(self._pedido(), [(self.remera, 1)])  # vigente
+
+        self.assertEqual(release_expired(), 1)
+        self.assertEqual(release_expired(), 0)
+        self.assertEqual(self._estados(pedido), {ReservaStock.ESTADO_LIBERADA})
+        self.assertEqual(self._stock(self.remera), STOCK - 1)
+        self.assertStockBalanced(self.remera)
+
+    def test_hold_frees_expired_holds_when_short(self):
+        viejo = self._pedido()
+        hold_stock(viejo, [(self.remera, STOCK)], ttl=0)
+
+        # no queda stock, pero la reserva vieja venció: se libera y alcanza
+        hold_stock(self._pedido(), [(self.remera, 2)])
+        self.assertEqual(self._estados(viejo), {ReservaStock.ESTADO_LIBERADA})
+        self.assertEqual(self._stock(self.remera), STOCK - 2)
+        self.assertStockBalanced(self.remera)
+
+    def test_release_expired_holds_command(self):
+        for _ in range(STOCK):
+            hold_stock(self._pedido(), [(self.remera, 1), (self.buzo, 1)], ttl=0)
+
+        out = StringIO()
+        call_command("release_expired_holds", chunk=3, stdout=out)
+
+        self.assertIn(f"{2 * STOCK} reservas vencidas liberadas", out.getvalue())
+        self.assertEqual(self._stock(self.remera), STOCK)
+        self.assertEqual(self._stock(self.buzo), STOCK)
+        self.assertFalse(ReservaStock.objects.exclude(estado=ReservaStock.ESTADO_LIBERADA).exists())
+
+    # ---------- cancelación ----------
+    def test_release_order_returns_stock_once(self):
+        pedido = self._pedido()
+        hold_stock(pedido, [(self.remera, 3)])
+
+        self.assertEqual(release_order(pedido), 1)
+        self.assertEqual(release_order(pedido), 0)
+        self.assertEqual(self._stock(self.remera), STOCK)
+        self.assertStockBalanced(self.remera)
+
+    def test_release_does_not_touch_committed_holds(self):
+        pedido = self._pedido()
+        hold_stock(pedido, [(self.remera, 3)])
+        commit_order(pedido)
+
+        self.assertEqual(release_order(pedido), 0)
+        self.assertEqual(release_expired(), 0)
+        self.assertEqual(self._stock(self.remera), STOCK - 3)
+        self.assertStockBalanced(self.remera)
+
+    # ---------- pago ----------
+    def test_commit_keeps_the_held_stock(self):
+        pedido = self._pedido()
+        hold_stock(pedido, [(self.remera, 2), (self.buzo, 1)])
+
+        self.assertEqual(commit_order(pedido), [])
+        self.assertEqual(self._estados(pedido), {ReservaStock.ESTADO_CONFIRMADA})
+        self.assertEqual(self._stock(self.remera), STOCK - 2)
+        # confirmar dos veces (webhook + feedback) no descuenta otra vez
+        self.assertEqual(commit_order(pedido), [])
+        self.assertEqual(self._stock(self.remera), STOCK - 2)
+        self.assertStockBalanced(self.remera)
+        self.assertStockBalanced(self.buzo)
+
+    def test_commit_retakes_stock_after_the_hold_expired(self):
+        pedido = self._pedido()
+        hold_stock(pedido, [(self.remera, 2)], ttl=0)
+        release_expired()
+        self.assertEqual(self._stock(self.remera), STOCK)
+
+        # el pago llega tarde, pero todavía hay stock: se vuelve a tomar
+        self.assertEqual(commit_order(pedido), [])
+        self.assertEqual(self._estados(pedido), {ReservaStock.ESTADO_CONFIRMADA})
+        self.assertEqual(self._stock(self.remera), STOCK - 2)
+        self.assertStockBalanced(self.remera)
+
+    def test_commit_after_expiry_without_stock_reports_the_shortage(self):
+        pedido = self._pedido()
+        hold_stock(pedido, [(self.remera, 2), (self.buzo, 1)], ttl=0)
+        release_expired()
+        # otro cliente se llevó todas las remeras mientras tanto
+        hold_stock(self._pedido(), [(self.remera, STOCK)])
+
+        faltantes = commit_order(pedido)
+
+        self.assertEqual([(r.producto_id, r.cantidad) for r in faltantes], [(self.remera.pk, 2)])
+        estados = dict(pedido.reservas.values_list("producto_id", "estado"))
+        self.assertEqual(estados[self.remera.pk], ReservaStock.ESTADO_LIBERADA)
+        self.assertEqual(estados[self.buzo.pk], ReservaStock.ESTADO_CONFIRMADA)
+        self.assertEqual(self._stock(self.remera), 0)
+        self.assertStockBalanced(self.remera)
+        self.assertStockBalanced(self.buzo)
+
+    def test_sync_order_stock_follows_the_order_state(self):
+        pagado, cancelado, enviado = self._pedido(), self._pedido(), self._pedido()
+        for pedido in (pagado, cancelado, enviado):
+            hold_stock(pedido, [(self.remera, 1)])
+
+        for pedido, estado in (
+            (pagado, Pedido.ESTADO_PAGADO),
+            (cancelado, Pedido.ESTADO_CANCELADO),
+            (enviado, Pedido.ESTADO_ENVIADO),
+        ):
+            pedido.estado = estado
+            sync_order_stock(pedido)
+
+        self.assertEqual(self._estados(pagado), {ReservaStock.ESTADO_CONFIRMADA})
+        self.assertEqual(self._estados(cancelado), {ReservaStock.ESTADO_LIBERADA})
+        self.assertEqual(self._estados(enviado), {ReservaStock.ESTADO_CONFIRMADA})
+        self.assertEqual(self._stock(self.remera), STOCK - 2)
+        self.assertStockBalanced(self.remera)
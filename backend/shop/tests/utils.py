@@ -0,0 +1,45 @@
+# shop/tests/utils.py
+import threading
+from unittest import SkipTest
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+
+def run_parallel(target, threads):
+    """
+    Corre target(i) en `threads` threads (cada uno con su conexión a la
+    base), todos arrancando a la vez. Devuelve las excepciones que hubo.
+    """
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def worker(i):
+        try:
+            barrier.wait()
+            target(i)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return errors
+
+
+class ConcurrentTestCase(TransactionTestCase):
+    """
+    TransactionTestCase para tests con varios threads: cada cambio se
+    confirma de verdad y cada thread usa su propia conexión. Con SQLite
+    hace falta la base de tests en archivo (settings: TEST NAME).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            raise SkipTest("SQLite en memoria no admite una conexión por thread.")
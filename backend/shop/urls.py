@@ -7,15 +7,20 @@ from .views_admin import (
     AdminProductDetailView,
     AdminOrdersListView,
     AdminOrderDetailView,
+    AdminSalesView,
 )
  
 # Vistas principales (PÚBLICO / USER)
 from .views import (
     ProductListView,
+    ProductBatchView,
     ProductDetailView,
+    CatalogManifestView,
     MyCartView,
     CartAddItemView,
     CartRemoveItemView,
+    CartSetItemView,
+    CartBatchView,
     RegisterView,
     LoginView,
     LogoutView,
@@ -45,7 +50,9 @@ urlpatterns = [
     # Productos (público)
     # --------------------
     path("products/", ProductListView.as_view(), name="product-list"),
+    path("products/batch/", ProductBatchView.as_view(), name="product-batch"),  # antes del <slug>
     path("products/<slug:slug>/", ProductDetailView.as_view(), name="product-detail"),
+    path("catalog/manifest/", CatalogManifestView.as_view(), name="catalog-manifest"),
  
     # --------------------
     # Autenticación
@@ -62,6 +69,8 @@ urlpatterns = [
     path("cart/my/", MyCartView.as_view(), name="cart-my"),
     path("cart/add/", CartAddItemView.as_view(), name="cart-add"),
     path("cart/remove/", CartRemoveItemView.as_view(), name="cart-remove"),
+    path("cart/set/", CartSetItemView.as_view(), name="cart-set"),
+    path("cart/batch/", CartBatchView.as_view(), name="cart-batch"),
  
     # --------------------
     # Contacto + Newsletter
@@ -105,6 +114,11 @@ urlpatterns = [
     path("admin/orders/", AdminOrdersListView.as_view(), name="admin-orders-list"),
     path("admin/orders/<int:pk>/", AdminOrderDetailView.as_view(), name="admin-orders-detail"),
  
+    # --------------------
+    # Admin - Ventas
+    # --------------------
+    path("admin/sales/", AdminSalesView.as_view(), name="admin-sales"),
+ 
     # --------------------
     # Webhook Mercado Pago
     # --------------------
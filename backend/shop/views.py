@@ -1,4 +1,3 @@
-from decimal import Decimal
 import json
 import mercadopago
  
@@ -7,7 +6,8 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404, redirect
 from django.core.mail import send_mail
-from django.http import HttpResponse
+from django.db import transaction
+from django.http import Http404, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
  
 from rest_framework import generics, status, serializers
@@ -21,8 +21,8 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from .models import (
     Producto,
     Carrito,
-    ItemCarrito,
     Cliente,
+    ItemCarrito,
     NewsletterSubscriber,
     Pedido,
     OrderItem,
@@ -31,11 +31,35 @@ from .models import (
 from .serializers import (
     ProductoSerializer,
     CarritoSerializer,
+    CartDeltaSerializer,
+    CartOperationSerializer,
     RegisterSerializer,
     UserSerializer,
     ClienteAddressSerializer,
     PedidoDetailSerializer,
 )
+from . import snapshots
+from .cache import CatalogCacheMixin
+from .cart import (
+    add_item,
+    apply_operations,
+    load_cart,
+    load_cart_line,
+    load_customer_cart,
+    remove_item,
+    set_item,
+    touch_cart,
+)
+from .catalog import catalog_engine, enabled as catalog_engine_enabled
+from .customer import ShopRefreshToken
+from .guest_cart import GuestCart, claim_merge, find_products, token_from_request
+from .idempotency import idempotent
+from .money import ZERO, from_cents, line_cents
+from .conditional import not_modified, set_validators
+from .pagination import OrderCursorPagination, ProductCursorPagination
+from .facets import apply_filters, facet_index, parse_filters
+from .search import RankedQuery, SortedSearchQuery, search_index
+from .stock import OutOfStock, hold_stock
  
  
 # ============================
@@ -68,7 +92,8 @@ class AdminProductoSerializer(serializers.ModelSerializer):
  
 # ---------- HELPER JWT ----------
 def get_tokens_for_user(user: User):
-    refresh = RefreshToken.for_user(user)
+    # con el claim "cliente_id" (ver shop/customer.py)
+    refresh = ShopRefreshToken.for_user(user)
     return {
         "refresh": str(refresh),
         "access": str(refresh.access_token),
@@ -76,27 +101,173 @@ def get_tokens_for_user(user: User):
  
  
 # ---------- PRODUCTOS ----------
-class ProductListView(generics.ListAPIView):
+def sparse_queryset(queryset, request):
+    """
+    Si el request pide ?fields=, sólo trae de la base las columnas que
+    esos campos necesitan (+ precio, que puede ser clave del cursor).
+    """
+    fields = ProductoSerializer.requested_fields(request)
+    if not fields:
+        return queryset
+    columns = ProductoSerializer.columns_for(fields) | {"precio"}
+    return queryset.only(*columns)
+ 
+ 
+class ProductListView(CatalogCacheMixin, generics.ListAPIView):
+    """
+    Listado público paginado por cursor (keyset), ver ProductCursorPagination.
+    El orden lo define el paginador según ?sort=, acá sólo se filtra.
+    Las respuestas se cachean por generación del catálogo (shop/cache.py).
+ 
+    Filtros: cat, tag, price_min (>=), price_max (<), in_stock=1, search.
+    """
     permission_classes = [AllowAny]
     serializer_class = ProductoSerializer
     throttle_classes = []
+    pagination_class = ProductCursorPagination
+    cache_endpoint = "product-list"
+ 
+    search_ids = None
  
     def get_queryset(self):
-        queryset = Producto.objects.filter(activo=True).order_by("-id")
-        category = self.request.query_params.get("cat")
+        self.filters = parse_filters(self.request.query_params)
         search = self.request.query_params.get("search")
-        if category:
-            queryset = queryset.filter(categoria=category)
+        if catalog_engine_enabled():
+            # catálogo en memoria (shop/catalog.py): el paginador lo recorre
+            # igual que a un queryset, sin consultas a la base
+            if search:
+                self.search_ids = search_index.search(search)
+            return catalog_engine.query(self.filters, ranking=self.search_ids)
+
+        queryset = sparse_queryset(Producto.objects.filter(activo=True), self.request)
+        queryset = apply_filters(queryset, self.filters)
         if search:
-            queryset = queryset.filter(nombre__icontains=search)
+            queryset = self.search_queryset(queryset, search)
         return queryset
  
- 
-class ProductDetailView(generics.RetrieveAPIView):
+    def get_paginated_response(self, data):
+        """
+        Agrega los conteos de facetas (categoría, tag, rango de precio,
+        stock) al lado de los resultados. Salen del índice en memoria
+        (shop/facets.py), no de un GROUP BY por faceta.
+        """
+        response = super().get_paginated_response(data)
+        response.data["facets"] = facet_index.counts(self.filters, ids=self.search_ids)
+        return response
+ 
+    def search_queryset(self, queryset, search):
+        """
+        Filtra por el índice invertido (shop.search), con TODOS los
+        resultados (las facetas se cuentan sobre el resultado completo).
+        El paginador pide los ids a la base de a tandas: ordenado por
+        relevancia recorre el ranking (RankedQuery: `relevancia` =
+        posición, 0 = mejor), con otro orden junta lo primero de cada
+        tanda (SortedSearchQuery).
+        """
+        ids = search_index.search(search)
+        self.search_ids = ids
+        if self.paginator.get_sort(self.request) == "relevance":
+            return RankedQuery(queryset, ids)
+        return SortedSearchQuery(queryset, ids)
+ 
+ 
+class ProductDetailView(CatalogCacheMixin, generics.RetrieveAPIView):
     permission_classes = [AllowAny]
-    queryset = Producto.objects.filter(activo=True)
     serializer_class = ProductoSerializer
     lookup_field = "slug"
+    cache_endpoint = "product-detail"
+ 
+    def get_queryset(self):
+        return sparse_queryset(Producto.objects.filter(activo=True), self.request)
+ 
+    def get_object(self):
+        if not catalog_engine_enabled():
+            return super().get_object()
+        producto = catalog_engine.get_by_slug(self.kwargs[self.lookup_field])
+        if producto is None:
+            raise Http404
+        return producto
+ 
+ 
+class ProductBatchView(CatalogCacheMixin, generics.ListAPIView):
+    """
+    Varios productos en un solo request (badges del carrito, vistos
+    recientemente, favoritos...):
+ 
+      GET /api/products/batch/?slugs=a,b,c
+      GET /api/products/batch/?ids=3,1,2
+ 
+    Se resuelve con un único in_bulk. Respeta el orden pedido y devuelve
+    en `missing` las claves que no existen o no están activas.
+    Acepta ?fields= igual que el listado.
+    """
+    permission_classes = [AllowAny]
+    serializer_class = ProductoSerializer
+    throttle_classes = []
+    pagination_class = None
+    cache_endpoint = "product-batch"
+    max_keys = 50
+ 
+    def list(self, request, *args, **kwargs):
+        slugs = request.query_params.get("slugs")
+        ids = request.query_params.get("ids")
+        if bool(slugs) == bool(ids):
+            return Response(
+                {"detail": "Mandá 'slugs' o 'ids' (separados por coma), no ambos."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+ 
+        raw = slugs or ids
+        keys = list(dict.fromkeys(k.strip() for k in raw.split(",") if k.strip()))
+        if len(keys) > self.max_keys:
+            return Response(
+                {"detail": f"Máximo {self.max_keys} productos por request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+ 
+        queryset = sparse_queryset(Producto.objects.filter(activo=True), request)
+        if slugs:
+            found = queryset.in_bulk(keys, field_name="slug")
+            lookup = {k: found.get(k) for k in keys}
+        else:
+            numeric = [int(k) for k in keys if k.isdigit()]
+            found = queryset.in_bulk(numeric)
+            lookup = {k: found.get(int(k)) if k.isdigit() else None for k in keys}
+ 
+        productos = [p for p in lookup.values() if p is not None]
+        missing = [k for k, p in lookup.items() if p is None]
+ 
+        serializer = self.get_serializer(productos, many=True)
+        return Response({"results": serializer.data, "missing": missing})
+ 
+ 
+class CatalogManifestView(APIView):
+    """
+    Manifest de los snapshots estáticos del catálogo (shop/snapshots.py):
+    URLs con hash de las páginas del listado, de cada categoría y del
+    detalle de cada producto. El front lo pide primero y después baja
+    los JSON directo de WhiteNoise. Se lee del disco, sin tocar la base.
+ 
+    Si el manifest quedó atrás de la generación del catálogo responde
+    404 (el front usa la API) y pide el rearmado.
+    """
+    permission_classes = [AllowAny]
+    throttle_classes = []
+ 
+    def get(self, request):
+        manifest = snapshots.read_manifest()
+        if snapshots.is_stale(manifest):
+            snapshots.request_rebuild()
+            return Response(
+                {"detail": "Los snapshots del catálogo no están al día."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+ 
+        etag = f'W/"snap-{manifest["generation"]}-{manifest["built_at"]}"'
+        response = not_modified(request, etag=etag)
+        if response is not None:
+            return response
+        return set_validators(Response(manifest), etag=etag)
  
  
 # ---------- AUTH ----------
@@ -110,6 +281,7 @@ class RegisterView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
+        merge_guest_cart(request, user)
         tokens = get_tokens_for_user(user)
         user_data = UserSerializer(user).data
         return Response(
@@ -155,6 +327,7 @@ class LoginView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
  
+        merge_guest_cart(request, user)
         tokens = get_tokens_for_user(user)
         return Response(
             {
@@ -226,23 +399,87 @@ def get_or_create_cliente_y_carrito(user: User) -> Carrito:
     return carrito
  
  
+def cart_response(carrito, status_code=status.HTTP_200_OK):
+    """
+    Respuesta estándar de los endpoints del carrito. Lee el carrito con
+    load_cart() (shop/cart.py): cantidad de queries fija, sin N+1.
+    """
+    serializer = CarritoSerializer(load_cart(carrito.pk))
+    return Response(serializer.data, status=status_code)
+ 
+ 
+def wants_delta(request):
+    """
+    ?response=delta en cart/add|remove|set/: en vez del carrito entero
+    (items con producto e imágenes) se devuelve sólo el item que cambió,
+    los totales y la versión del carrito (CartDeltaSerializer).
+    """
+    return request.query_params.get("response") == "delta"
+ 
+ 
+def cart_line_response(request, carrito, talle, producto=None, slug=None):
+    if not wants_delta(request):
+        return cart_response(carrito)
+    data = load_cart_line(carrito.pk, talle, producto=producto, slug=slug)
+    return Response(CartDeltaSerializer(data).data)
+ 
+ 
+def merge_guest_cart(request, user):
+    """
+    Al loguearse / registrarse: si el request trae un carrito de
+    invitado (header X-Guest-Cart), se suma al Carrito del usuario con
+    un solo bulk upsert. El mismo token no se suma dos veces (login
+    reintentado, o el front que no lo borró).
+    """
+    token = token_from_request(request)
+    guest = GuestCart.from_token(token)
+    operations = guest.operations() if guest else []
+    if not operations:
+        return
+    with transaction.atomic():
+        if claim_merge(user, token):
+            apply_operations(get_or_create_cliente_y_carrito(user), operations)
+ 
+ 
 # ---------- CARRITO ----------
+def guest_cart_update(request, op, product_slug, size, quantity):
+    """
+    add / remove / set sobre el carrito de invitado. Devuelve el carrito
+    con el token nuevo; mismos errores que la versión con login.
+    """
+    guest = GuestCart.from_request(request)
+    producto = find_products(slugs=[product_slug]).get(product_slug)
+    if op == "remove":
+        if producto is None or not guest.contains(producto, size):
+            return Response(
+                {"detail": "Ese producto con ese talle no está en el carrito."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+    elif producto is None:
+        raise Http404
+    guest.apply([(op, producto, size, quantity)])
+    if wants_delta(request):
+        return Response(guest.delta(producto, size))
+    return Response(guest.data())
+ 
+ 
+# Sin login, los endpoints del carrito trabajan sobre el carrito de
+# invitado (shop/guest_cart.py): token firmado, sin escribir en la base.
 class MyCartView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
  
     def get(self, request):
-        carrito = get_or_create_cliente_y_carrito(request.user)
-        serializer = CarritoSerializer(carrito)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if not request.user.is_authenticated:
+            return Response(GuestCart.from_request(request).data())
+        serializer = CarritoSerializer(load_customer_cart(request.customer))
+        return Response(serializer.data)
  
  
 class CartAddItemView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
  
+    @idempotent
     def post(self, request):
-        user = request.user
-        carrito = get_or_create_cliente_y_carrito(user)
- 
         product_slug = request.data.get("product_slug")
         if not product_slug:
             return Response(
@@ -261,30 +498,24 @@ class CartAddItemView(APIView):
         if size == "":
             size = None
  
-        producto = get_object_or_404(Producto, slug=product_slug, activo=True)
+        if not request.user.is_authenticated:
+            return guest_cart_update(request, "add", product_slug, size, quantity)
  
-        item, created = ItemCarrito.objects.get_or_create(
-            carrito=carrito,
-            producto=producto,
-            talle=size,
-            defaults={"cantidad": quantity},
-        )
+        carrito = request.customer.carrito
+        producto = get_object_or_404(Producto, slug=product_slug, activo=True)
  
-        if not created:
-            item.cantidad += quantity
-            item.save()
+        # UPDATE cantidad = cantidad + n (o INSERT si no estaba): sin
+        # leer el item antes, así dos clicks seguidos no se pisan
+        add_item(carrito, producto, size, quantity)
  
-        serializer = CarritoSerializer(carrito)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return cart_line_response(request, carrito, size, producto=producto)
  
  
 class CartRemoveItemView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
  
+    @idempotent
     def post(self, request):
-        user = request.user
-        carrito = get_or_create_cliente_y_carrito(user)
- 
         product_slug = request.data.get("product_slug")
         if not product_slug:
             return Response(
@@ -303,26 +534,131 @@ class CartRemoveItemView(APIView):
         if size == "":
             size = None
  
+        if not request.user.is_authenticated:
+            return guest_cart_update(request, "remove", product_slug, size, quantity)
+ 
+        # resta con F() o borra si no quedan unidades (DELETE condicional)
+        carrito = request.customer.carrito
+        if not remove_item(carrito, size, quantity, slug=product_slug):
+            return Response(
+                {"detail": "Ese producto con ese talle no está en el carrito."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+ 
+        return cart_line_response(request, carrito, size, slug=product_slug)
+ 
+ 
+class CartSetItemView(APIView):
+    """
+    Fija la cantidad de un item (ej. el selector de cantidad del
+    carrito). quantity=0 lo saca del carrito.
+    """
+    permission_classes = [AllowAny]
+ 
+    @idempotent
+    def post(self, request):
+        product_slug = request.data.get("product_slug")
+        if not product_slug:
+            return Response(
+                {"detail": "Falta el campo 'product_slug'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+ 
         try:
-            item = ItemCarrito.objects.get(
-                carrito=carrito,
-                producto__slug=product_slug,
-                talle=size,
+            quantity = int(request.data.get("quantity"))
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "El campo 'quantity' tiene que ser un número."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if quantity < 0:
+            quantity = 0
+ 
+        size = request.data.get("size") or request.data.get("talle") or None
+        if size == "":
+            size = None
+ 
+        if not request.user.is_authenticated:
+            return guest_cart_update(request, "set", product_slug, size, quantity)
+ 
+        carrito = request.customer.carrito
+        producto = get_object_or_404(Producto, slug=product_slug, activo=True)
+        set_item(carrito, producto, size, quantity)
+ 
+        return cart_line_response(request, carrito, size, producto=producto)
+ 
+ 
+class CartBatchView(APIView):
+    """
+    Varias operaciones sobre el carrito en un solo request (sincronizar
+    el carrito al loguearse, agregar un "buy the look" entero...):
+ 
+      POST /api/cart/batch/
+      {"operations": [
+          {"op": "add", "product_slug": "remera-x", "quantity": 2, "size": "M"},
+          {"op": "remove", "product_slug": "gorra-y"},
+          {"op": "set", "product_slug": "buzo-z", "quantity": 0, "size": "L"}
+      ]}
+ 
+    Se aplican en orden y todas juntas (o ninguna): un solo query para
+    resolver los slugs, bulk upsert en una transacción (ver
+    shop.cart.apply_operations) y el carrito se serializa una vez.
+    Sin login se aplican sobre el carrito de invitado.
+    """
+    permission_classes = [AllowAny]
+    max_operations = 50
+ 
+    @idempotent
+    def post(self, request):
+        operations = request.data.get("operations")
+        if not isinstance(operations, list) or not operations:
+            return Response(
+                {"detail": "Mandá 'operations': una lista de operaciones."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        except ItemCarrito.DoesNotExist:
+        if len(operations) > self.max_operations:
             return Response(
-                {"detail": "Ese producto con ese talle no está en el carrito."},
+                {"detail": f"Máximo {self.max_operations} operaciones por request."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
  
-        if item.cantidad > quantity:
-            item.cantidad -= quantity
-            item.save()
-        else:
-            item.delete()
+        serializer = CartOperationSerializer(data=operations, many=True)
+        serializer.is_valid(raise_exception=True)
+        ops = serializer.validated_data
  
-        serializer = CarritoSerializer(carrito)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        productos = Producto.objects.in_bulk(
+            {op["product_slug"] for op in ops}, field_name="slug"
+        )
+ 
+        resolved = []
+        missing = []
+        for op in ops:
+            producto = productos.get(op["product_slug"])
+            if producto is None or (op["op"] != "remove" and not producto.activo):
+                if op["op"] != "remove":
+                    missing.append(op["product_slug"])
+                continue
+            resolved.append((op["op"], producto, op["size"], op["quantity"]))
+ 
+        if missing:
+            return Response(
+                {
+                    "detail": "Hay productos que no existen o no están disponibles.",
+                    "missing": sorted(set(missing)),
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+ 
+        if not request.user.is_authenticated:
+            guest = GuestCart.from_request(request)
+            guest.apply(resolved)
+            return Response(guest.data())
+ 
+        carrito = request.customer.carrito
+        if resolved:
+            apply_operations(carrito, resolved)
+ 
+        return cart_response(carrito)
  
  
 # ---------- CONTACTO ----------
@@ -487,8 +823,11 @@ class MeShippingAddressView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
  
     def get_object(self):
-        cliente, _ = Cliente.objects.get_or_create(user=self.request.user)
-        return cliente
+        customer = self.request.customer
+        if customer.cliente_id is None:
+            cliente, _ = Cliente.objects.get_or_create(user=self.request.user)
+            return cliente
+        return customer.cliente
  
  
 # ============================
@@ -497,20 +836,22 @@ class MeShippingAddressView(generics.RetrieveUpdateAPIView):
 class CreateOrderView(APIView):
     permission_classes = [IsAuthenticated]
  
+    @idempotent
     def post(self, request):
         user = request.user
  
         try:
-            cliente = user.cliente
+            cliente = request.customer.cliente
         except Cliente.DoesNotExist:
             return Response(
                 {"detail": "No hay perfil de cliente para este usuario."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
  
-        carrito = get_or_create_cliente_y_carrito(user)
-        items = carrito.items.all()
-        if not items.exists():
+        carrito = request.customer.carrito
+        # una sola query: líneas + productos (precio, nombre, stock)
+        items = list(carrito.items.select_related("producto").order_by("id"))
+        if not items:
             return Response({"detail": "El carrito está vacío."}, status=status.HTTP_400_BAD_REQUEST)
  
         data = request.data or {}
@@ -527,38 +868,61 @@ class CreateOrderView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
  
-        pedido = Pedido.objects.create(
-            cliente=cliente,
-            estado=Pedido.ESTADO_PENDIENTE,
-            email=user.email or "",
-            nombre=user.get_full_name() or user.username,
-            telefono=telefono or "",
-            direccion=direccion,
-            ciudad=ciudad,
-            provincia=provincia,
-            codigo_postal=codigo_postal,
-            observaciones=observaciones,
-        )
- 
-        total_productos = Decimal("0.00")
+        # líneas y totales se calculan antes de escribir nada (en
+        # centavos, shop/money.py): el pedido se inserta ya con el total
+        lines = []
+        total_cents = 0
         for item in items:
-            precio_unitario = item.producto.precio
-            subtotal = precio_unitario * item.cantidad
-            OrderItem.objects.create(
-                pedido=pedido,
-                producto=item.producto,
-                nombre_producto=item.producto.nombre,
-                talle=item.talle,
-                cantidad=item.cantidad,
-                precio_unitario=precio_unitario,
-                subtotal=subtotal,
-            )
-            total_productos += subtotal
+            cents = line_cents(item.producto.precio, item.cantidad)
+            lines.append((item, from_cents(cents)))
+            total_cents += cents
+        total_productos = from_cents(total_cents)
  
-        pedido.total_productos = total_productos
-        pedido.total_final = pedido.total_productos + pedido.costo_envio
-        pedido.save()
-        carrito.items.all().delete()
+        # pedido + reserva de stock + items + vaciar el carrito: todo o nada
+        try:
+            with transaction.atomic():
+                pedido = Pedido.objects.create(
+                    cliente=cliente,
+                    estado=Pedido.ESTADO_PENDIENTE,
+                    email=user.email or "",
+                    nombre=user.get_full_name() or user.username,
+                    telefono=telefono or "",
+                    direccion=direccion,
+                    ciudad=ciudad,
+                    provincia=provincia,
+                    codigo_postal=codigo_postal,
+                    observaciones=observaciones,
+                    total_productos=total_productos,
+                    costo_envio=ZERO,
+                    total_final=total_productos,
+                )
+ 
+                # reservar el stock (vence si no se paga, shop/stock.py)
+                hold_stock(pedido, [(item.producto, item.cantidad) for item in items])
+ 
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        pedido=pedido,
+                        producto=item.producto,
+                        nombre_producto=item.producto.nombre,
+                        talle=item.talle,
+                        cantidad=item.cantidad,
+                        precio_unitario=item.producto.precio,
+                        subtotal=subtotal,
+                    )
+                    for item, subtotal in lines
+                ])
+ 
+                # sólo las líneas que entraron al pedido (si se agregó algo
+                # al carrito en el medio, queda para la próxima compra) y
+                # nueva versión del carrito
+                ItemCarrito.objects.filter(pk__in=[item.pk for item in items]).delete()
+                touch_cart(carrito)
+        except OutOfStock as e:
+            return Response(
+                {"detail": str(e), "shortages": e.shortages, "lines": e.by_line(items)},
+                status=status.HTTP_409_CONFLICT,
+            )
  
         return Response(
             {
@@ -574,13 +938,13 @@ class MyOrdersView(APIView):
     permission_classes = [IsAuthenticated]
  
     def get(self, request):
-        try:
-            cliente = request.user.cliente
-        except Cliente.DoesNotExist:
-            return Response([], status=status.HTTP_200_OK)
+        cliente_id = request.customer.cliente_id
+        if cliente_id is None:
+            qs = Pedido.objects.none()
+        else:
+            qs = Pedido.objects.filter(cliente_id=cliente_id)
  
         status_filter = request.query_params.get("status", "pending")
-        qs = Pedido.objects.filter(cliente=cliente)
  
         if status_filter == "pending":
             qs = qs.filter(estado=Pedido.ESTADO_PENDIENTE)
@@ -591,9 +955,12 @@ class MyOrdersView(APIView):
         else:
             qs = qs.filter(estado=Pedido.ESTADO_PENDIENTE)
  
-        pedidos = qs.order_by("-creado")
+        # página por cursor (-creado, -id); los items se traen en una
+        # sola query para los pedidos de la página
+        paginator = OrderCursorPagination()
+        pedidos = paginator.paginate_queryset(qs.prefetch_related("items"), request, view=self)
         serializer = PedidoDetailSerializer(pedidos, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginator.get_paginated_response(serializer.data)
  
  
 # ============================
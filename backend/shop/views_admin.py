@@ -4,11 +4,16 @@ from rest_framework import generics, permissions, status, serializers
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.views import APIView  # 👈 LO QUE FALTABA
-from django.db.models import ProtectedError
+from datetime import date, timedelta
+
+from django.db.models import ProtectedError, Sum
 from django.db import IntegrityError
+from django.utils import timezone
 
-from .models import Producto, Pedido, OrderItem
+from .models import Producto, Pedido, OrderItem, VentaDiaria
+from .money import ZERO, as_money, sum_field
 from .serializers import ProductoSerializer
+from .pagination import OrderCursorPagination
 
 
 # ============================
@@ -138,20 +143,20 @@ class AdminPedidoDetailSerializer(serializers.ModelSerializer):
 # ============================
 class AdminOrdersListView(APIView):
     """
-    GET /api/admin/orders/ -> lista de pedidos PAGADOS (para dashboard admin).
+    GET /api/admin/orders/ -> lista de pedidos PAGADOS (para dashboard admin),
+    de a páginas (?cursor=..., ?page_size=...).
     """
     permission_classes = [IsStaffUser]
 
     def get(self, request, *args, **kwargs):
-        # Solo pedidos pagados
-        pedidos = (
-            Pedido.objects
-            .filter(estado=Pedido.ESTADO_PAGADO)
-            .order_by("-creado")
+        # Solo pedidos pagados, página por cursor (-creado, -id)
+        paginator = OrderCursorPagination()
+        pedidos = paginator.paginate_queryset(
+            Pedido.objects.filter(estado=Pedido.ESTADO_PAGADO), request, view=self
         )
 
         serializer = AdminPedidoListSerializer(pedidos, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class AdminOrderDetailView(generics.RetrieveAPIView):
@@ -169,4 +174,120 @@ class AdminOrderDetailView(generics.RetrieveAPIView):
             .select_related("cliente")
             .prefetch_related("items__producto")
             .order_by("-creado")
-        )
\ No newline at end of file
+        )
+
+# ============================
+# Ventas (dashboard admin)
+# ============================
+class AdminSalesView(APIView):
+    """
+    GET /api/admin/sales/ -> ventas por día desde las ventas diarias ya
+    sumadas (shop/sales.py): el costo depende de los días, no de los pedidos.
+
+      ?from=YYYY-MM-DD&to=YYYY-MM-DD  rango (default: últimos 30 días)
+      ?group=day       total por día (default, con los días sin ventas en 0)
+      ?group=category  por día y categoría (?cat=tees para una sola)
+      ?group=product   productos más vendidos del rango (?cat=, ?limit=)
+    """
+    permission_classes = [IsStaffUser]
+
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 366
+    MAX_PRODUCTS = 100
+
+    def get(self, request, *args, **kwargs):
+        try:
+            hasta = self._date(request.query_params.get("to")) or timezone.localdate()
+            desde = self._date(request.query_params.get("from")) or (
+                hasta - timedelta(days=self.DEFAULT_DAYS - 1)
+            )
+        except ValueError:
+            return Response(
+                {"detail": "Fechas inválidas (formato YYYY-MM-DD)."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if desde > hasta or (hasta - desde).days >= self.MAX_DAYS:
+            return Response(
+                {"detail": f"El rango tiene que ser de 1 a {self.MAX_DAYS} días."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        group = request.query_params.get("group", "day")
+        ventas = VentaDiaria.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+        categoria = request.query_params.get("cat")
+
+        # totales del rango (filas de total del día)
+        totales = ventas.filter(categoria="", producto__isnull=True).aggregate(
+            pedidos=Sum("pedidos"), unidades=Sum("unidades"), ingresos=sum_field("ingresos")
+        )
+
+        if group == "day":
+            por_dia = {
+                v.fecha: v for v in ventas.filter(categoria="", producto__isnull=True)
+            }
+            results = []
+            for n in range((hasta - desde).days + 1):
+                fecha = desde + timedelta(days=n)
+                venta = por_dia.get(fecha)
+                results.append(self._row(venta, fecha=fecha))
+        elif group == "category":
+            filas = ventas.filter(producto__isnull=True).exclude(categoria="")
+            if categoria:
+                filas = filas.filter(categoria=categoria)
+            results = [
+                self._row(v, fecha=v.fecha, categoria=v.categoria)
+                for v in filas.order_by("fecha", "categoria")
+            ]
+        elif group == "product":
+            try:
+                limit = min(int(request.query_params.get("limit", 20)), self.MAX_PRODUCTS)
+            except ValueError:
+                limit = 20
+            filas = ventas.filter(producto__isnull=False)
+            if categoria:
+                filas = filas.filter(categoria=categoria)
+            results = [
+                {
+                    "product_id": row["producto_id"],
+                    "nombre": row["producto__nombre"],
+                    "product_slug": row["producto__slug"],
+                    "categoria": row["categoria"],
+                    "pedidos": row["pedidos"],
+                    "unidades": row["unidades"],
+                    "ingresos": str(as_money(row["ingresos"])),
+                }
+                for row in filas
+                .values("producto_id", "producto__nombre", "producto__slug", "categoria")
+                .annotate(pedidos=Sum("pedidos"), unidades=Sum("unidades"), ingresos=sum_field("ingresos"))
+                .order_by("-ingresos", "producto_id")[:max(limit, 1)]
+            ]
+        else:
+            return Response(
+                {"detail": "group tiene que ser day, category o product."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response({
+            "from": desde,
+            "to": hasta,
+            "group": group,
+            "totals": {
+                "pedidos": totales["pedidos"] or 0,
+                "unidades": totales["unidades"] or 0,
+                "ingresos": str(as_money(totales["ingresos"])),
+            },
+            "results": results,
+        })
+
+    @staticmethod
+    def _date(value):
+        return date.fromisoformat(value) if value else None
+
+    @staticmethod
+    def _row(venta, **keys):
+        return {
+            **keys,
+            "pedidos": venta.pedidos if venta else 0,
+            "unidades": venta.unidades if venta else 0,
+            "ingresos": str(venta.ingresos if venta else ZERO),
+        }
@@ -4,6 +4,7 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.core.mail import send_mail
+from django.db import transaction
 import mercadopago
 
 from rest_framework.views import APIView
@@ -11,7 +12,26 @@ from rest_framework.response import Response
 from rest_framework import status, serializers
 from rest_framework.permissions import IsAuthenticated, AllowAny
 
-from .models import Cliente, Pedido, OrderItem, Payment
+from .cache import catalog_generation
+from .cart import touch_cart
+from .conditional import not_modified, set_validators
+from .idempotency import idempotent
+from .money import from_cents, line_cents
+from .pagination import OrderCursorPagination
+from .sales import sync_order_sales
+from .models import Cliente, ItemCarrito, Pedido, OrderItem, Payment
+from .stock import OutOfStock, hold_stock, lock_products, sync_order_stock
+
+
+def customer_id(request):
+    """
+    Id del Cliente del usuario logueado, sin query si vino en el token
+    (request.customer, shop/customer.py). Cliente.DoesNotExist si no tiene.
+    """
+    cliente_id = request.customer.cliente_id
+    if cliente_id is None:
+        raise Cliente.DoesNotExist("El usuario no tiene Cliente asociado.")
+    return cliente_id
 
 
 # ============================
@@ -94,63 +114,80 @@ class CreateOrderFromCartView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         user = request.user
 
-        # Cliente asociado al usuario
+        # Cliente asociado al usuario (request.customer, shop/customer.py)
         try:
-            cliente = Cliente.objects.get(user=user)
+            cliente = request.customer.cliente
         except Cliente.DoesNotExist:
             return Response(
                 {"detail": "El usuario no tiene Cliente asociado."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        carrito = cliente.get_or_create_carrito()
-        items = carrito.items.select_related("producto")
-
-        if not items.exists():
-            return Response(
-                {"detail": "El carrito está vacío."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # calcular total de productos
-        total_productos = Decimal("0.00")
-        for item in items:
-            total_productos += item.producto.precio * item.cantidad
-
-        # crear Pedido (estado = pending, todavía NO pagado)
-        pedido = Pedido.objects.create(
-            cliente=cliente,
-            estado="pending",
-            email=user.email or "",
-            nombre=user.first_name or user.username,
-            telefono=cliente.telefono or "",
-            total_productos=total_productos,
-            costo_envio=Decimal("0.00"),
-            total_final=total_productos,
-        )
+        carrito = request.customer.carrito
 
-        # crear OrderItems
-        bulk_items = []
-        for item in items:
-            subtotal = item.producto.precio * item.cantidad
-            bulk_items.append(
-                OrderItem(
-                    pedido=pedido,
-                    producto=item.producto,
-                    nombre_producto=item.producto.nombre,
-                    talle=item.talle,
-                    cantidad=item.cantidad,
-                    precio_unitario=item.producto.precio,
-                    subtotal=subtotal,
+        # sección crítica, todo en una transacción: bloquear los productos
+        # (en orden de id), tomar precio y stock ya bloqueados, descontar
+        # el stock con UPDATE condicional, crear el pedido y vaciar el
+        # carrito. Si falta stock no queda nada escrito.
+        try:
+            with transaction.atomic():
+                items = list(carrito.items.order_by("id"))
+                if not items:
+                    return Response(
+                        {"detail": "El carrito está vacío."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+                productos = lock_products(item.producto_id for item in items)
+                for item in items:
+                    item.producto = productos[item.producto_id]
+
+                # calcular total de productos (en centavos, shop/money.py)
+                lines = [(item, line_cents(item.producto.precio, item.cantidad)) for item in items]
+                total_productos = from_cents(sum(cents for _, cents in lines))
+
+                # crear Pedido (estado = pending, todavía NO pagado)
+                pedido = Pedido.objects.create(
+                    cliente=cliente,
+                    estado="pending",
+                    email=user.email or "",
+                    nombre=user.first_name or user.username,
+                    telefono=cliente.telefono or "",
+                    total_productos=total_productos,
+                    costo_envio=Decimal("0.00"),
+                    total_final=total_productos,
                 )
-            )
-        OrderItem.objects.bulk_create(bulk_items)
 
-        # vaciar carrito
-        items.delete()
+                # reservar el stock (vence si no se paga, shop/stock.py)
+                hold_stock(pedido, [(item.producto, item.cantidad) for item in items])
+
+                # crear OrderItems
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        pedido=pedido,
+                        producto=item.producto,
+                        nombre_producto=item.producto.nombre,
+                        talle=item.talle,
+                        cantidad=item.cantidad,
+                        precio_unitario=item.producto.precio,
+                        subtotal=from_cents(cents),
+                    )
+                    for item, cents in lines
+                ])
+
+                # vaciar carrito (sólo lo que entró al pedido); el carrito
+                # cambió: nueva versión (shop/cart.py)
+                ItemCarrito.objects.filter(pk__in=[item.pk for item in items]).delete()
+                touch_cart(carrito)
+        except OutOfStock as e:
+            return Response(
+                {"detail": str(e), "shortages": e.shortages, "lines": e.by_line(items)},
+                status=status.HTTP_409_CONFLICT,
+            )
 
         return Response(
             {
@@ -173,8 +210,8 @@ class ConfirmShippingView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
-        user = request.user
         data = request.data
 
         order_id = data.get("order_id")
@@ -186,8 +223,7 @@ class ConfirmShippingView(APIView):
 
         # nos aseguramos que el pedido sea de este cliente
         try:
-            cliente = Cliente.objects.get(user=user)
-            pedido = Pedido.objects.get(id=order_id, cliente=cliente)
+            pedido = Pedido.objects.get(id=order_id, cliente_id=customer_id(request))
         except (Cliente.DoesNotExist, Pedido.DoesNotExist):
             return Response(
                 {"detail": "Pedido no encontrado para este usuario."},
@@ -232,9 +268,8 @@ class MercadoPagoCreatePreferenceView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
-        user = request.user
-
         order_id = kwargs.get("order_id")
         if not order_id:
             return Response(
@@ -245,8 +280,7 @@ class MercadoPagoCreatePreferenceView(APIView):
         try:
             # 1) Validar pedido del usuario
             try:
-                cliente = Cliente.objects.get(user=user)
-                pedido = Pedido.objects.get(id=order_id, cliente=cliente)
+                pedido = Pedido.objects.get(id=order_id, cliente_id=customer_id(request))
             except (Cliente.DoesNotExist, Pedido.DoesNotExist):
                 return Response(
                     {"detail": "Pedido no encontrado para este usuario."},
@@ -407,6 +441,11 @@ class MercadoPagoFeedbackView(APIView):
         pedido.mp_merchant_order_id = merchant_order_id or ""
         pedido.save()
 
+        # pagado -> confirma las reservas de stock; cancelado -> las libera
+        sync_order_stock(pedido)
+        # y suma / resta el pedido en las ventas diarias del dashboard
+        sync_order_sales(pedido)
+
         # 🔐 Crear / actualizar registro Payment
         payment_obj, _created = Payment.objects.get_or_create(
             pedido=pedido,
@@ -530,6 +569,11 @@ class MercadoPagoWebhookView(APIView):
 
         pedido.save()
 
+        # pagado -> confirma las reservas de stock; cancelado -> las libera
+        sync_order_stock(pedido)
+        # y suma / resta el pedido en las ventas diarias del dashboard
+        sync_order_sales(pedido)
+
         # Crear / actualizar registro Payment asociado
         payment_obj, _created = Payment.objects.get_or_create(
             pedido=pedido,
@@ -608,29 +652,28 @@ class MercadoPagoWebhookView(APIView):
 # -----------------------------------------
 class MyOrdersListView(APIView):
     """
-    Devuelve SOLO los pedidos PAGADOS del usuario autenticado.
+    Devuelve SOLO los pedidos PAGADOS del usuario autenticado, de a
+    páginas (?cursor=..., ?page_size=...).
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        user = request.user
-
         try:
-            cliente = Cliente.objects.get(user=user)
+            cliente_id = customer_id(request)
         except Cliente.DoesNotExist:
             return Response(
                 {"detail": "El usuario no tiene cliente asociado."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        pedidos = (
-            Pedido.objects
-            .filter(cliente=cliente, estado="paid")
-            .order_by("-creado")
+        # página por cursor (-creado, -id); la lista no muestra items
+        paginator = OrderCursorPagination()
+        pedidos = paginator.paginate_queryset(
+            Pedido.objects.filter(cliente_id=cliente_id, estado="paid"), request, view=self
         )
 
         serializer = PedidoListSerializer(pedidos, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginator.get_paginated_response(serializer.data)
 
 
 # -----------------------------------------
@@ -639,26 +682,47 @@ class MyOrdersListView(APIView):
 class MyOrderDetailView(APIView):
     """
     Devuelve el detalle de un pedido PAGADO del usuario autenticado.
+    Soporta GET condicional con un ETag de `actualizado` del pedido y la
+    generación del catálogo (los ítems apuntan a productos que pueden
+    cambiar sin tocar el pedido).
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, order_id, *args, **kwargs):
-        user = request.user
-
         try:
-            cliente = Cliente.objects.get(user=user)
+            cliente_id = customer_id(request)
         except Cliente.DoesNotExist:
             return Response(
                 {"detail": "El usuario no tiene cliente asociado."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        pedidos = Pedido.objects.filter(id=order_id, cliente_id=cliente_id, estado="paid")
+
+        # validador barato: `actualizado` + generación, antes de cargar ítems
+        actualizado = pedidos.values_list("actualizado", flat=True).first()
+        if actualizado is None:
+            return Response(
+                {"detail": "Pedido no encontrado para este usuario o no está pagado."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        # sin Last-Modified: una fecha no refleja un cambio de producto y
+        # un If-Modified-Since solo daría 304 con datos viejos
+        etag = (
+            f'W/"pedido-{order_id}-{int(actualizado.timestamp() * 1_000_000)}'
+            f'-{catalog_generation()}"'
+        )
+        not_modified_response = not_modified(request, etag=etag, private=True)
+        if not_modified_response is not None:
+            return not_modified_response
+
         try:
             pedido = (
-                Pedido.objects
+                pedidos
                 .select_related("cliente")
                 .prefetch_related("items__producto")
-                .get(id=order_id, cliente=cliente, estado="paid")
+                .get()
             )
         except Pedido.DoesNotExist:
             return Response(
@@ -667,4 +731,5 @@ class MyOrderDetailView(APIView):
             )
 
         serializer = PedidoDetailSerializer(pedido)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        response = Response(serializer.data, status=status.HTTP_200_OK)
+        return set_validators(response, etag=etag, private=True)
\ No newline at end of file
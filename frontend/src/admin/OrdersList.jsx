@@ -5,16 +5,26 @@ import { Loader2, Eye } from "lucide-react";
 
 export default function OrdersList() {
   const [orders, setOrders] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  async function fetchOrders() {
+  // una página de pedidos (paginación por cursor); cursor = null es la primera
+  async function fetchOrders(cursor = null) {
     try {
-      const res = await api.get("/admin/orders/");
-      setOrders(res.data);
+      if (cursor) setLoadingMore(true);
+      const res = await api.get("/admin/orders/", {
+        params: cursor ? { cursor } : {},
+      });
+      const data = res.data;
+      const results = Array.isArray(data) ? data : data.results || [];
+      setOrders((prev) => (cursor ? [...prev, ...results] : results));
+      setNextCursor(Array.isArray(data) ? null : data.next_cursor || null);
     } catch (err) {
       console.error("Error cargando pedidos:", err);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   }
 
@@ -119,6 +129,19 @@ export default function OrdersList() {
             No hay pedidos todavía.
           </p>
         )}
+
+        {nextCursor && (
+          <div className="flex justify-center py-4 border-t border-slate-100">
+            <button
+              onClick={() => fetchOrders(nextCursor)}
+              disabled={loadingMore}
+              className="inline-flex items-center gap-2 px-4 py-2 text-sm rounded-md border border-slate-200 text-slate-700 hover:bg-slate-50 disabled:opacity-60"
+            >
+              {loadingMore && <Loader2 className="animate-spin" size={14} />}
+              Ver más pedidos
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
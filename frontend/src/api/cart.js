@@ -8,7 +8,13 @@ export async function getMyCart() {
 }
 
 // Agregar producto al carrito (soporta talle opcional)
-export async function addToCart(productSlug, quantity = 1, size = null) {
+// ({ delta: true }: respuesta parcial, ver removeFromCart / patchCart)
+export async function addToCart(
+  productSlug,
+  quantity = 1,
+  size = null,
+  { delta = false } = {}
+) {
   const payload = {
     product_slug: productSlug,
     quantity,
@@ -18,12 +24,20 @@ export async function addToCart(productSlug, quantity = 1, size = null) {
     payload.size = size; // el backend acepta size o talle
   }
 
-  const res = await api.post("/cart/add/", payload);
+  const url = delta ? "/cart/add/?response=delta" : "/cart/add/";
+  const res = await api.post(url, payload);
   return res.data; // devuelve el carrito actualizado
 }
 
 // Restar unidades / eliminar producto del carrito
-export async function removeFromCart(productSlug, quantity = 1, size = null) {
+// Con { delta: true } el backend devuelve sólo el item que cambió, los
+// totales y la versión del carrito (aplicar con patchCart)
+export async function removeFromCart(
+  productSlug,
+  quantity = 1,
+  size = null,
+  { delta = false } = {}
+) {
   const payload = {
     product_slug: productSlug,
     quantity,
@@ -33,7 +47,65 @@ export async function removeFromCart(productSlug, quantity = 1, size = null) {
     payload.size = size;
   }
 
-  const res = await api.post("/cart/remove/", payload);
+  const url = delta ? "/cart/remove/?response=delta" : "/cart/remove/";
+  const res = await api.post(url, payload);
+  return res.data;
+}
+
+// Aplica una respuesta delta sobre el carrito que ya tenemos.
+// Devuelve null si no se puede (hubo otro cambio en el medio o el item
+// es nuevo y no tenemos el producto): en ese caso, pedir el carrito.
+export function patchCart(cart, delta) {
+  if (!cart || !delta?.line) return null;
+
+  const { line } = delta;
+  const sameLine = (it) =>
+    it.producto?.slug === line.product_slug &&
+    (it.talle || null) === (line.talle || null);
+
+  // carrito de invitado: sin versión, el token ya es el estado completo
+  if (delta.version != null && delta.version !== (cart.version ?? -1) + 1) {
+    return null;
+  }
+
+  const items = cart.items || [];
+  const exists = items.some(sameLine);
+  if (!exists && line.cantidad > 0) return null;
+
+  return {
+    ...cart,
+    version: delta.version,
+    items: items
+      .map((it) =>
+        sameLine(it)
+          ? { ...it, cantidad: line.cantidad, subtotal: line.subtotal }
+          : it
+      )
+      .filter((it) => it.cantidad > 0),
+    total_items: delta.total_items,
+    total_precio: delta.total_precio,
+  };
+}
+
+// Fijar la cantidad exacta de un producto (0 lo saca del carrito)
+export async function setCartItemQuantity(productSlug, quantity, size = null) {
+  const payload = {
+    product_slug: productSlug,
+    quantity,
+  };
+
+  if (size) {
+    payload.size = size;
+  }
+
+  const res = await api.post("/cart/set/", payload);
+  return res.data;
+}
+
+// Varias operaciones en un solo request (sync al loguearse, "buy the look")
+// operations: [{ op: "add" | "remove" | "set", product_slug, quantity, size }]
+export async function applyCartOperations(operations) {
+  const res = await api.post("/cart/batch/", { operations });
   return res.data;
 }
 
@@ -1,6 +1,11 @@
 // src/api/client.js
 import axios from "axios";
 import { BASE_URL } from "./api"; // usamos la misma base que en api.js
+import {
+  GUEST_CART_HEADER,
+  getGuestCartToken,
+  saveGuestCartToken,
+} from "./guestCart.js";
 
 // Instancia principal para requests autenticadas
 const api = axios.create({
@@ -16,7 +21,21 @@ api.interceptors.request.use((config) => {
     config.headers.Authorization = `Bearer ${token}`;
   }
 
+  // carrito de invitado (sin login) o para fundirlo al loguearse
+  const guestCart = getGuestCartToken();
+  if (guestCart) {
+    config.headers[GUEST_CART_HEADER] = guestCart;
+  }
+
   return config;
 });
 
+// Las respuestas del carrito sin login traen el token actualizado
+api.interceptors.response.use((response) => {
+  if (response.data && "guest_token" in response.data) {
+    saveGuestCartToken(response.data.guest_token);
+  }
+  return response;
+});
+
 export default api;
\ No newline at end of file
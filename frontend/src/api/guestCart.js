@@ -0,0 +1,23 @@
+// src/api/guestCart.js
+// Carrito de invitado: el backend lo devuelve como un token firmado
+// (`guest_token`) y lo espera de vuelta en el header X-Guest-Cart.
+// Al loguearse / registrarse el backend lo suma al carrito del usuario.
+
+export const GUEST_CART_HEADER = "X-Guest-Cart";
+const STORAGE_KEY = "guestCart";
+
+export function getGuestCartToken() {
+  return localStorage.getItem(STORAGE_KEY) || "";
+}
+
+export function saveGuestCartToken(token) {
+  if (token) {
+    localStorage.setItem(STORAGE_KEY, token);
+  } else {
+    localStorage.removeItem(STORAGE_KEY);
+  }
+}
+
+export function clearGuestCartToken() {
+  localStorage.removeItem(STORAGE_KEY);
+}
@@ -41,13 +41,81 @@ function extractImagePath(obj = {}) {
   return obj.image || obj.image_url || obj.foto || "";
 }
  
-// 🔹 Lista de productos
-export async function fetchProducts({ cat, search } = {}) {
+function normalizeProduct(p) {
+  const rawPath = extractImagePath(p);
+  const finalUrl = getImageUrl(rawPath);
+  return { ...p, imagen: finalUrl };
+}
+ 
+// 🔹 Snapshots estáticos del catálogo (backend: shop/snapshots.py)
+// El manifest mapea cada página del listado / categoría y el detalle de
+// cada producto a un JSON con hash que sirve WhiteNoise (cache immutable).
+// Se pide una vez y se reusa un rato; si no hay o quedó viejo (la API da
+// 404) se usa la API de siempre.
+const MANIFEST_TTL_MS = 60 * 1000;
+let manifestCache = null; // { promise, at }
+
+function fetchManifest() {
+  const now = Date.now();
+  if (manifestCache && now - manifestCache.at < MANIFEST_TTL_MS) {
+    return manifestCache.promise;
+  }
+  const promise = fetch(`${API_URL}/catalog/manifest/`)
+    .then((res) => (res.ok ? res.json() : null))
+    .catch(() => null);
+  manifestCache = { promise, at: now };
+  return promise;
+}
+
+async function fetchSnapshot(url) {
+  // las URLs del manifest son relativas al backend (STATIC_URL)
+  const res = await fetch(new URL(url, API_BASE_URL));
+  if (!res.ok) throw new Error("Snapshot no disponible");
+  return res.json();
+}
+
+// El cursor de una página de snapshot guarda el manifest con el que se
+// empezó, así "Ver más" sigue en las mismas páginas aunque se rearme.
+async function fetchSnapshotPage({ cat, cursor }) {
+  const manifest = cursor ? cursor.manifest : await fetchManifest();
+  if (!manifest) return null;
+
+  const pages = cat ? manifest.categories[cat] : manifest.products;
+  if (!pages) return null;
+
+  const index = cursor ? cursor.page : 0;
+  const results = await fetchSnapshot(pages[index]);
+  return {
+    results: results.map(normalizeProduct),
+    nextCursor: index + 1 < pages.length ? { manifest, page: index + 1 } : null,
+  };
+}
+
+// 🔹 Una página de productos (paginación por cursor)
+// Devuelve { results, nextCursor }. nextCursor = null cuando no hay más.
+// Sin búsqueda ni orden ni page_size propio sale de los snapshots.
+export async function fetchProductsPage({ cat, search, sort, cursor, pageSize } = {}) {
+  const fromSnapshot =
+    !search && !sort && !pageSize && (!cursor || typeof cursor === "object");
+  if (fromSnapshot) {
+    try {
+      const page = await fetchSnapshotPage({ cat, cursor });
+      if (page) return page;
+    } catch (err) {
+      // "Ver más" sobre un snapshot ya borrado: no hay cursor de la API
+      if (cursor) throw err;
+      manifestCache = null;
+    }
+  }
+
   let url = `${API_URL}/products/`;
  
   const params = new URLSearchParams();
   if (cat) params.append("cat", cat);
   if (search) params.append("search", search);
+  if (sort) params.append("sort", sort);
+  if (cursor) params.append("cursor", cursor);
+  if (pageSize) params.append("page_size", pageSize);
  
   const qs = params.toString();
   if (qs) url += `?${qs}`;
@@ -56,25 +124,56 @@ export async function fetchProducts({ cat, search } = {}) {
   if (!res.ok) throw new Error("Error al obtener productos");
  
   const data = await res.json();
+  const results = Array.isArray(data) ? data : data.results || [];
  
-  return data.map((p) => {
-    const rawPath = extractImagePath(p);
-    const finalUrl = getImageUrl(rawPath);
-    return { ...p, imagen: finalUrl };
-  });
+  return {
+    results: results.map(normalizeProduct),
+    nextCursor: Array.isArray(data) ? null : data.next_cursor || null,
+  };
 }
  
 // 🔹 Detalle de producto por slug
+// (del snapshot si está en el manifest; no trae stock)
 export async function fetchProductBySlug(slug) {
-  const cleanSlug = encodeURIComponent(String(slug || "").split("/")[0].trim());
-  const url = `${API_URL}/products/${cleanSlug}/`;
+  const rawSlug = String(slug || "").split("/")[0].trim();
+  const data = (await fetchProductSnapshot(rawSlug)) || (await fetchProductFromApi(rawSlug));
+  const rawPath = extractImagePath(data);
+  const finalUrl = getImageUrl(rawPath);
+ 
+  return { ...data, imagen: finalUrl };
+}
+ 
+async function fetchProductSnapshot(slug) {
+  const manifest = await fetchManifest();
+  const url = manifest?.detail[slug];
+  if (!url) return null;
+  try {
+    return await fetchSnapshot(url);
+  } catch {
+    manifestCache = null;
+    return null;
+  }
+}
+ 
+async function fetchProductFromApi(slug) {
+  const url = `${API_URL}/products/${encodeURIComponent(slug)}/`;
   const res = await fetch(url);
  
   if (!res.ok) throw new Error("Error al obtener el producto");
  
-  const data = await res.json();
-  const rawPath = extractImagePath(data);
-  const finalUrl = getImageUrl(rawPath);
+  return res.json();
+}
  
-  return { ...data, imagen: finalUrl };
-}
\ No newline at end of file
+// 🔹 Varios productos por slug en un solo request
+// Devuelve { results, missing } respetando el orden pedido.
+export async function fetchProductsBySlugs(slugs = [], { fields } = {}) {
+  const params = new URLSearchParams();
+  params.append("slugs", slugs.join(","));
+  if (fields) params.append("fields", fields);
+ 
+  const res = await fetch(`${API_URL}/products/batch/?${params.toString()}`);
+  if (!res.ok) throw new Error("Error al obtener productos");
+ 
+  const data = await res.json();
+  return { results: data.results.map(normalizeProduct), missing: data.missing };
+}
@@ -1,6 +1,7 @@
 // src/auth/AuthContext.jsx
 import { createContext, useContext, useEffect, useState } from "react";
 import api from "../api/client.js";
+import { clearGuestCartToken } from "../api/guestCart.js";
 
 const AuthContext = createContext(null);
 
@@ -48,6 +49,9 @@ export function AuthProvider({ children }) {
       localStorage.setItem("refresh", refresh);
       setAuthToken(access);
 
+      // el backend ya sumó el carrito de invitado al del usuario
+      clearGuestCartToken();
+
 
       const me = await fetchMe();
       return me;
@@ -4,6 +4,7 @@ import {
   getMyCart,
   addToCart as apiAdd,
   removeFromCart as apiRemove,
+  patchCart,
 } from "../api/cart.js";
 
 const CartContext = createContext(null);
@@ -98,8 +99,12 @@ export function CartProvider({ children }) {
     try {
       setUpdating(true);
       setError("");
-      const data = await apiRemove(productSlug, quantity, size);
-      setCart(data);
+      // el item ya está en el carrito: alcanza con la respuesta parcial
+      const delta = await apiRemove(productSlug, quantity, size, {
+        delta: true,
+      });
+      const patched = patchCart(cart, delta);
+      setCart(patched ?? (await getMyCart()));
     } catch (err) {
       console.error(
         "Error al quitar del carrito:",
@@ -147,11 +147,14 @@ export default function Cart() {
       }
 
       // 1) Crear pedido
+      // Idempotency-Key: un doble click / reintento con el mismo carrito
+      // (misma versión) recibe el mismo pedido en vez de crear otro
       const createRes = await fetch(`${API_BASE_URL}/checkout/create-order/`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
           Authorization: `Bearer ${token}`,
+          "Idempotency-Key": `checkout-${cart?.id}-${cart?.version}`,
         },
         body: JSON.stringify({}),
       });
@@ -172,6 +175,7 @@ export default function Cart() {
         headers: {
           "Content-Type": "application/json",
           Authorization: `Bearer ${token}`,
+          "Idempotency-Key": `shipping-${orderId}`,
         },
         body: JSON.stringify({
           order_id: orderId,
@@ -199,6 +203,7 @@ export default function Cart() {
           headers: {
             "Content-Type": "application/json",
             Authorization: `Bearer ${token}`,
+            "Idempotency-Key": `mp-preference-${orderId}`,
           },
           body: JSON.stringify({}),
         }
@@ -5,7 +5,7 @@ import { motion } from "framer-motion";
 import { getImageUrl } from "../api/products.js";
 
 import Hero from "../components/Hero.jsx";
-import { fetchProducts } from "../api/products.js";
+import { fetchProductsPage } from "../api/products.js";
 import { CATEGORY_LABELS } from "../data/products.js";
 
 function FeaturedProductsSection() {
@@ -18,9 +18,10 @@ function FeaturedProductsSection() {
       try {
         setLoading(true);
         setError("");
-        const data = await fetchProducts({});
-        const list = Array.isArray(data) ? data : data.results || [];
-        setProducts(list.slice(0, 10));
+        // sólo los 10 más nuevos: la primera página (del snapshot si hay),
+        // no el catálogo entero
+        const page = await fetchProductsPage();
+        setProducts(page.results.slice(0, 10));
       } catch (err) {
         console.error(err);
         setError("No se pudieron cargar los productos destacados.");
@@ -81,7 +82,7 @@ function FeaturedProductsSection() {
           {products.map((product) => {
             const priceNumber = Number(product.precio ?? 0);
 
-            // product.imagen ya viene procesado por fetchProducts con getImageUrl
+            // product.imagen ya viene procesado por fetchProductsPage con getImageUrl
             const img1 = product.imagen || "";
 
             const img2 = getImageUrl(
@@ -1,5 +1,5 @@
 // src/pages/MyOrders.jsx
-import { useEffect, useState } from "react";
+import { useCallback, useEffect, useState } from "react";
 import { Link, useNavigate } from "react-router-dom";
 import { motion } from "framer-motion";
 import { BASE_URL } from "../api/api.js";
@@ -22,41 +22,57 @@ const statusLabels = {
 
 export default function MyOrders() {
   const [orders, setOrders] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
   const navigate = useNavigate();
 
+  // una página del historial (paginación por cursor)
+  const fetchOrdersPage = useCallback(
+    async (cursor) => {
+      const token =
+        localStorage.getItem("accessToken") ||
+        localStorage.getItem("access");
+
+      const params = new URLSearchParams({ status: "paid" });
+      if (cursor) params.append("cursor", cursor);
+
+      const res = await fetch(`${API_BASE_URL}/api/orders/my/?${params}`, {
+        headers: {
+          "Content-Type": "application/json",
+          ...(token ? { Authorization: `Bearer ${token}` } : {}),
+        },
+      });
+
+      if (!res.ok) {
+        if (res.status === 401) {
+          navigate("/login?next=/my-orders");
+          return null;
+        }
+        const data = await res.json().catch(() => ({}));
+        throw new Error(data.detail || "Error al cargar tus pedidos.");
+      }
+
+      const data = await res.json();
+      return {
+        results: Array.isArray(data) ? data : data.results || [],
+        nextCursor: Array.isArray(data) ? null : data.next_cursor || null,
+      };
+    },
+    [navigate]
+  );
+
   useEffect(() => {
     const fetchOrders = async () => {
       try {
         setLoading(true);
         setError("");
 
-        const token =
-          localStorage.getItem("accessToken") ||
-          localStorage.getItem("access");
-
-        const res = await fetch(
-          `${API_BASE_URL}/api/orders/my/?status=paid`,
-          {
-            headers: {
-              "Content-Type": "application/json",
-              ...(token ? { Authorization: `Bearer ${token}` } : {}),
-            },
-          }
-        );
-
-        if (!res.ok) {
-          if (res.status === 401) {
-            navigate("/login?next=/my-orders");
-            return;
-          }
-          const data = await res.json().catch(() => ({}));
-          throw new Error(data.detail || "Error al cargar tus pedidos.");
-        }
-
-        const data = await res.json();
-        setOrders(Array.isArray(data) ? data : []);
+        const page = await fetchOrdersPage(null);
+        if (!page) return;
+        setOrders(page.results);
+        setNextCursor(page.nextCursor);
       } catch (err) {
         setError(err.message || "Error al cargar tus pedidos.");
       } finally {
@@ -65,7 +81,22 @@ export default function MyOrders() {
     };
 
     fetchOrders();
-  }, [navigate]);
+  }, [fetchOrdersPage]);
+
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const page = await fetchOrdersPage(nextCursor);
+      if (!page) return;
+      setOrders((prev) => [...prev, ...page.results]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      setError(err.message || "Error al cargar tus pedidos.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   return (
     <div className="min-h-screen bg-slate-50 pt-24 pb-16">
@@ -261,6 +292,18 @@ export default function MyOrders() {
                 );
               })}
             </ul>
+
+            {nextCursor && (
+              <div className="flex justify-center border-t border-slate-100 py-4">
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="inline-flex items-center justify-center rounded-full px-4 py-2 text-sm font-medium border border-slate-200 bg-white hover:bg-slate-50 transition disabled:opacity-60"
+                >
+                  {loadingMore ? "Cargando..." : "Ver más pedidos"}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
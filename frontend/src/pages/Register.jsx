@@ -5,6 +5,11 @@ import { motion } from "framer-motion";
 import { useAuth } from "../auth/AuthContext.jsx";
 import registerHero from "../assets/registerhero.webp";
 import { BASE_URL } from "../api/api.js";
+import {
+  GUEST_CART_HEADER,
+  clearGuestCartToken,
+  getGuestCartToken,
+} from "../api/guestCart.js";
 
 const API_BASE_URL = BASE_URL; // ya viene con /api
 
@@ -65,6 +70,10 @@ export default function Register() {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
+          // el backend suma el carrito de invitado a la cuenta nueva
+          ...(getGuestCartToken()
+            ? { [GUEST_CART_HEADER]: getGuestCartToken() }
+            : {}),
         },
         body: JSON.stringify({
           username: trimmedEmail,
@@ -100,6 +109,7 @@ export default function Register() {
         }
       }
 
+      clearGuestCartToken();
       navigate("/login");
     } catch (err) {
       console.error("Error de registro:", err);
@@ -2,7 +2,7 @@
 import { useEffect, useState } from "react";
 import { Link, useSearchParams, useNavigate } from "react-router-dom";
 
-import { fetchProducts, getImageUrl } from "../api/products.js";
+import { fetchProductsPage, getImageUrl } from "../api/products.js";
 import { CATEGORY_LABELS } from "../data/products.js";
 import { useCart } from "../cart/CartContext.jsx";
 import { useAuth } from "../auth/AuthContext.jsx";
@@ -18,32 +18,63 @@ export default function ShopAll() {
   const search = searchParams.get("search") || "";
 
   const [products, setProducts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
 
+  // primera página (paginación por cursor); el resto con "Ver más"
   useEffect(() => {
+    let cancelled = false;
+
     async function load() {
       try {
         setLoading(true);
         setError("");
+        setProducts([]);
+        setNextCursor(null);
 
-        const data = await fetchProducts({
+        const page = await fetchProductsPage({
           cat: cat || undefined,
           search: search || undefined,
         });
+        if (cancelled) return;
 
-        const list = Array.isArray(data) ? data : data.results || [];
-        setProducts(list);
+        setProducts(page.results);
+        setNextCursor(page.nextCursor);
       } catch (err) {
         console.error(err);
-        setError("No se pudieron cargar los productos.");
+        if (!cancelled) setError("No se pudieron cargar los productos.");
       } finally {
-        setLoading(false);
+        if (!cancelled) setLoading(false);
       }
     }
     load();
+
+    return () => {
+      cancelled = true;
+    };
   }, [cat, search]);
 
+  async function loadMore() {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const page = await fetchProductsPage({
+        cat: cat || undefined,
+        search: search || undefined,
+        cursor: nextCursor,
+      });
+      setProducts((prev) => [...prev, ...page.results]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error(err);
+      setError("No se pudieron cargar más productos.");
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
   async function handleQuickAdd(e, product) {
     e.preventDefault();
     if (!isAuthenticated) {
@@ -158,6 +189,18 @@ export default function ShopAll() {
             );
           })}
         </div>
+
+        {!loading && nextCursor && (
+          <div className="flex justify-center pt-12">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="inline-flex items-center justify-center rounded-full px-4 py-2 text-sm font-medium border border-slate-200 bg-white hover:bg-slate-50 transition disabled:opacity-60"
+            >
+              {loadingMore ? "Cargando..." : "Ver más productos"}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );